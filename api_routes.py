@@ -1,19 +1,144 @@
 # app/api_routes.py
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Request
-from dependencies import get_document_service
-from services.document_service import DocumentService
-from models import DocumentInfoDTO, TextDocumentDTO
+import json
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form, Query, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from dependencies import get_document_service, get_uploader, get_job_service, get_summary_cache
+from services.document_service import DocumentService, SearchUnavailableError
+from services.job_service import JobService
+from services.summary_cache import SummaryCache
+from file_handler import FileUploader, UploadTooLargeError
+from http_cache import cache_headers, not_modified
+from models import DocumentInfoDTO, DocumentPageDTO, SearchPageDTO, KeywordBrowseDTO, RelatedDocumentDTO, TextDocumentDTO, JobDTO, JobProgressDTO
 
 router = APIRouter()
 
-@router.get("/documents/", response_model=List[DocumentInfoDTO])
-async def api_list_documents(service: DocumentService = Depends(get_document_service)):
-    return await service.list_documents_info()
+@router.get("/documents/", response_model=DocumentPageDTO)
+async def api_list_documents(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    service: DocumentService = Depends(get_document_service),
+):
+    try:
+        return await service.list_documents_info(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/documents/{doc_id}", response_model=TextDocumentDTO)
-async def api_get_document(doc_id: int, service: DocumentService = Depends(get_document_service)):
+async def api_get_document(doc_id: int, request: Request, service: DocumentService = Depends(get_document_service)):
+    try:
+        headers = cache_headers(await service.get_validators(doc_id), variant="json")
+        if (cached := not_modified(request, headers)) is not None:
+            return cached
+        doc = await service.get_document(doc_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return JSONResponse(content=doc.model_dump(mode="json"), headers=headers)
+
+@router.get("/documents/{doc_id}/related", response_model=List[RelatedDocumentDTO])
+async def api_related_documents(
+    doc_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    service: DocumentService = Depends(get_document_service),
+):
+    try:
+        return await service.related_documents(doc_id, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/keywords", response_model=KeywordBrowseDTO)
+async def api_browse_keywords(
+    selected: List[str] = Query(default=[]),
+    lang: Optional[str] = Query(None, pattern="^(ru|en)$"),
+    prefix: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    service: DocumentService = Depends(get_document_service),
+):
+    return await service.browse_keywords(selected=selected, lang=lang, prefix=prefix, limit=limit)
+
+@router.get("/search", response_model=SearchPageDTO)
+async def api_search(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    service: DocumentService = Depends(get_document_service),
+):
+    try:
+        return await service.search(q, limit=limit, offset=offset)
+    except SearchUnavailableError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+@router.post("/documents/upload", status_code=status.HTTP_202_ACCEPTED)
+async def api_upload_document(
+    file: UploadFile = File(...),
+    name: str = Form(...),
+    jobs: JobService = Depends(get_job_service),
+    uploader: FileUploader = Depends(get_uploader),
+):
+    name = name.strip()
+    if not name:
+        raise HTTPException(status_code=400, detail="Имя документа обязательно")
+    if await jobs.is_name_taken(name):
+        raise HTTPException(status_code=409, detail=f"Документ с именем '{name}' уже существует")
+    try:
+        saved = await uploader.save_upload(file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    job_id = await jobs.submit(name=name, upload=saved)
+    return {"job_id": job_id, "file_sha256": saved.sha256, "status_url": f"/api/jobs/{job_id}"}
+
+@router.get("/jobs/{job_id}", response_model=JobDTO)
+async def api_get_job(job_id: int, jobs: JobService = Depends(get_job_service)):
+    try:
+        return await jobs.get_job(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.get("/jobs/{job_id}/events")
+async def api_job_events(job_id: int, jobs: JobService = Depends(get_job_service)):
+    """Server-Sent Events: результат каждого этапа резюмирования сразу после его завершения."""
+    try:
+        await jobs.get_job(job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    async def event_stream():
+        async for event in jobs.stream_events(job_id):
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            name, data = event
+            yield f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/jobs/{job_id}/progress", response_model=JobProgressDTO)
+async def api_get_job_progress(job_id: int, jobs: JobService = Depends(get_job_service)):
     try:
-        return await service.get_document(doc_id)
+        job = await jobs.get_job(job_id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    return JobProgressDTO(
+        id=job.id,
+        status=job.status,
+        stage=job.stage,
+        progress=job.progress,
+        document_id=job.document_id
+    )
+
+@router.get("/stats/summary-cache")
+async def api_summary_cache_stats(cache: SummaryCache = Depends(get_summary_cache)):
+    return cache.stats()
+
+@router.get("/stats/models")
+async def api_model_load_stats(request: Request):
+    return request.app.state.model_registry.load_timings
+
+@router.get("/stats/ollama")
+async def api_ollama_stats(request: Request):
+    """Метрики клиента Ollama: запросы, ожидание слота семафора, время до первого токена."""
+    return request.app.state.ollama_client.metrics.snapshot()
@@ -0,0 +1,43 @@
+# benchmarks/bench_clustering.py
+"""
+Сравнение индексированной кластеризации ключевых фраз с эталонной O(n³).
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_clustering
+"""
+import random
+import time
+
+from services.extraction_keyword.clustering import (
+    _init_items, _greedy_merge_naive, _greedy_merge_indexed
+)
+from services.extraction_keyword.config import MERGE_THRESH, load_stop_words
+
+
+def make_phrases(n: int, vocab_size: int, seed: int = 42):
+    rnd = random.Random(seed)
+    vocab = [f"term{i}" for i in range(vocab_size)]
+    return [" ".join(rnd.sample(vocab, rnd.randint(1, 4))) for _ in range(n)]
+
+
+def main():
+    load_stop_words()
+    print(f"{'phrases':>8} {'naive, s':>10} {'indexed, s':>11} {'equal':>6}")
+    for n in (40, 200, 500, 1000, 2000):
+        phrases = make_phrases(n, vocab_size=max(50, n // 2))
+
+        started = time.perf_counter()
+        naive = _greedy_merge_naive(_init_items(phrases, "en"), MERGE_THRESH) if n <= 500 else None
+        naive_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        indexed = _greedy_merge_indexed(_init_items(phrases, "en"), MERGE_THRESH)
+        indexed_time = time.perf_counter() - started
+
+        equal = "-" if naive is None else str(naive == indexed)
+        naive_str = "skipped" if naive is None else f"{naive_time:.3f}"
+        print(f"{n:>8} {naive_str:>10} {indexed_time:>11.3f} {equal:>6}")
+
+
+if __name__ == "__main__":
+    main()
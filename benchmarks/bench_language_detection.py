@@ -0,0 +1,66 @@
+# benchmarks/bench_language_detection.py
+"""
+Определение языка на текстах 1–16 МБ: прежняя посимвольная проверка re.match
+(extraction_text/utils), langdetect (если установлен) и выборочный подсчёт
+классов символов services.language.detect_language.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_language_detection
+"""
+import random
+import re
+import time
+
+from services.language import detect_language
+
+
+def detect_language_regex(text: str) -> str:
+    """Прежняя реализация из extraction_text/utils.py."""
+    if not text or not any(ch.isalpha() for ch in text):
+        return "en"
+    letters = [ch for ch in text if re.match(r"[A-Za-zА-Яа-яЁё]", ch)]
+    if not letters:
+        return "en"
+    cyr = sum(1 for ch in letters if re.match(r"[А-Яа-яЁё]", ch))
+    return "ru" if (cyr / len(letters)) > 0.30 else "en"
+
+
+def make_text(n_chars: int, cyrillic_share: float, seed: int = 42) -> str:
+    rnd = random.Random(seed)
+    ru = ["документ", "резюме", "текст", "модель", "перевод", "анализ"]
+    en = ["document", "summary", "text", "model", "translation", "analysis"]
+    words, size = [], 0
+    while size < n_chars:
+        word = rnd.choice(ru if rnd.random() < cyrillic_share else en)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:n_chars]
+
+
+def timed(fn, text: str):
+    started = time.perf_counter()
+    result = fn(text)
+    return result, time.perf_counter() - started
+
+
+def main():
+    try:
+        from langdetect import DetectorFactory, detect
+        DetectorFactory.seed = 0
+    except ImportError:
+        detect = None
+    print(f"{'MB':>4} {'share':>6} {'regex, s':>9} {'langdetect, s':>14} {'sampled, ms':>12} {'agree':>6}")
+    for megabytes in (1, 4, 16):
+        for share in (0.9, 0.1):
+            text = make_text(megabytes * 1024 * 1024, share)
+            expected, regex_time = timed(detect_language_regex, text)
+            lang, sampled_time = timed(detect_language, text)
+            langdetect_time = f"{timed(detect, text)[1]:.3f}" if detect is not None else "-"
+            print(
+                f"{megabytes:>4} {share:>6.1f} {regex_time:>9.3f} {langdetect_time:>14} "
+                f"{sampled_time * 1000:>12.2f} {str(lang == expected):>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# benchmarks/bench_sentence_scoring.py
+"""
+Сравнение векторизованной оценки предложений ClassicalSummarizer с эталонной
+поточечной реализацией на синтетических текстах 10k–100k предложений.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_sentence_scoring
+"""
+import random
+import time
+
+from services.extraction_text.summarizer import ClassicalSummarizer
+from services.extraction_text.utils import fix_glued_words
+
+
+def make_text(n_sentences: int, vocab_size: int = 5000, seed: int = 42) -> str:
+    rnd = random.Random(seed)
+    vocab = [f"term{i}" for i in range(vocab_size)] + ["the", "and", "of", "to", "in"] * 50
+    sentences = []
+    for _ in range(n_sentences):
+        words = rnd.choices(vocab, k=rnd.randint(4, 30))
+        sentences.append(" ".join(words).capitalize() + rnd.choice([".", "!", "?"]))
+    return " ".join(sentences)
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    summarizer = ClassicalSummarizer(prefer_sentence_len=15)
+    summarizer.summarize("Warm up.", "en", 1)  # таблица символов \w строится один раз на процесс
+    print("Время оценки = время summarize минус общая часть (fix_glued_words + разбиение на предложения)")
+    print(f"{'sentences':>10} {'split, s':>9} {'naive, s':>9} {'vector, s':>10} {'speedup':>8} {'equal':>6}")
+    for n in (10_000, 30_000, 100_000):
+        text = make_text(n)
+        split_time = best_of(lambda: summarizer._split_sentences(fix_glued_words(text), "en"))
+        naive_time = best_of(lambda: summarizer._summarize_naive(text, "en", 10)) - split_time
+        vector_time = best_of(lambda: summarizer.summarize(text, "en", 10)) - split_time
+        equal = summarizer._summarize_naive(text, "en", 10) == summarizer.summarize(text, "en", 10)
+        print(
+            f"{n:>10} {split_time:>9.3f} {naive_time:>9.3f} {vector_time:>10.3f} "
+            f"{naive_time / vector_time:>7.1f}x {str(equal):>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_storage_layout.py
+"""
+Размер БД до и после переноса текстов и summary в сжатые таблицы.
+
+Создаёт БД в старой схеме (тексты в text_documents), затем запускает
+TextRepositoryAsync.init_models(), которая выполняет миграцию, и печатает размеры.
+Можно указать существующую БД (будет использована её копия):
+    python -m benchmarks.bench_storage_layout [path/to/texts_async.db]
+"""
+import asyncio
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+from repository import TextRepositoryAsync
+
+LEGACY_SCHEMA = """
+CREATE TABLE text_documents (
+    id INTEGER NOT NULL,
+    file_name VARCHAR NOT NULL,
+    name VARCHAR NOT NULL,
+    original_text VARCHAR NOT NULL,
+    summary_json JSON NOT NULL,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    PRIMARY KEY (id),
+    UNIQUE (name)
+)
+"""
+
+
+def make_legacy_db(path: str, docs: int = 500, words_per_doc: int = 20000) -> None:
+    rnd = random.Random(7)
+    vocab = [f"слово{i}" for i in range(3000)] + [f"word{i}" for i in range(3000)]
+    summary = {
+        "llm_text_summary": {"ru": "резюме " * 50, "en": "summary " * 50},
+        "llm_keyword_summary": {"ru": [{"name": "узел", "children": []}], "en": [{"name": "node", "children": []}]},
+        "extraction_text_summary": {"ru": "резюме " * 50, "en": "summary " * 50},
+        "extraction_keyword_summary": {"ru": [{"name": "узел", "children": []}], "en": [{"name": "node", "children": []}]},
+    }
+    conn = sqlite3.connect(path)
+    conn.execute(LEGACY_SCHEMA)
+    conn.executemany(
+        "INSERT INTO text_documents (file_name, name, original_text, summary_json) VALUES (?, ?, ?, ?)",
+        [
+            (f"doc{i}.pdf", f"doc{i}", " ".join(rnd.choices(vocab, k=words_per_doc)), json.dumps(summary))
+            for i in range(docs)
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+async def main():
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, "bench.db")
+    if len(sys.argv) > 1:
+        shutil.copy(sys.argv[1], path)
+    else:
+        make_legacy_db(path)
+
+    size_before = os.path.getsize(path)
+    repo = TextRepositoryAsync(db_url=f"sqlite+aiosqlite:///{path}")
+    started = time.perf_counter()
+    await repo.init_models()
+    elapsed = time.perf_counter() - started
+    await repo.engine.dispose()
+    size_after = os.path.getsize(path)
+
+    print(f"before:    {size_before / 1e6:.2f} MB")
+    print(f"after:     {size_after / 1e6:.2f} MB ({size_after / size_before:.1%})")
+    print(f"migration: {elapsed:.2f} s")
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,149 @@
+# project_root/bootstrap.py
+"""
+Сборка сервисов приложения из переменных окружения.
+
+Используется и веб-приложением (main.lifespan), и CLI массовой загрузки (ingest.py),
+поэтому оба работают с одной и той же БД, моделями и настройками.
+"""
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from repository import TextRepositoryAsync
+from services.document_service import DocumentService
+from services.summary_generation_service import SummaryGenerationService
+
+from services.llm_text.llm_text_summary_service import LLMTextSummaryService
+
+from services.extraction_text.facade import ExtractionTextSummaryService
+
+from services.extraction_keyword.facade import ExtractionKeywordService
+
+from services.llm_keyword.keyword_tree_generator_llm import LLMKeywordService
+
+from services.ollama_client import OllamaClient, DEFAULT_HOST
+from services.compute_pool import ComputePool
+from services.summary_cache import SummaryCache
+from services.phrase_cache import PhraseCache
+from services.model_registry import ModelRegistry
+from services.report_service import ReportService
+from services.report_cache import ReportCache
+from services.corpus_stats import CorpusStats
+
+from file_handler import FileUploader
+
+BASE_DIR = Path(__file__).parent
+UPLOADS_DIR = BASE_DIR / "uploads"
+REPORTS_DIR = Path(os.environ.get("REPORTS_DIR", BASE_DIR / "reports"))
+MODELS_DIR = Path(os.environ.get("MODELS_DIR", BASE_DIR / "models"))
+
+
+@dataclass
+class AppServices:
+    repo: TextRepositoryAsync
+    model_registry: ModelRegistry
+    compute: ComputePool
+    ollama_client: OllamaClient
+    summary_cache: SummaryCache
+    corpus: CorpusStats
+    document_service: DocumentService
+    uploader: FileUploader
+
+
+async def build_services() -> AppServices:
+    db_url = os.environ.get("DB_URL", f"sqlite+aiosqlite:///{BASE_DIR / 'texts_async.db'}")
+    repo = TextRepositoryAsync(
+        db_url=db_url,
+        pool_size=int(os.environ.get("DB_POOL_SIZE", "10")),
+        max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", "20")),
+    )
+    await repo.init_models()
+
+    registry = ModelRegistry(
+        models_dir=MODELS_DIR,
+        allow_download=os.environ.get("ALLOW_MODEL_DOWNLOAD") == "1",
+        translation_cache=PhraseCache(BASE_DIR / "translation_cache.db"),
+    ).load()
+
+    compute_workers = os.environ.get("COMPUTE_WORKERS")
+    compute = ComputePool(workers=int(compute_workers) if compute_workers else None, models_dir=MODELS_DIR)
+    compute.start()
+
+    ollama_client = OllamaClient(
+        model_name=os.environ.get("OLLAMA_MODEL", "gpt-oss:120b-cloud"),
+        host=os.environ.get("OLLAMA_HOST", DEFAULT_HOST),
+        max_concurrency=int(os.environ.get("OLLAMA_MAX_CONCURRENCY", "4")),
+        connect_timeout=float(os.environ.get("OLLAMA_CONNECT_TIMEOUT", "10")),
+        read_timeout=float(os.environ.get("OLLAMA_READ_TIMEOUT", "120")),
+    )
+    # Длинные документы обрабатываются map-reduce по фрагментам не длиннее LLM_CHUNK_CHARS
+    llm_chunking = {
+        "chunk_chars": int(os.environ.get("LLM_CHUNK_CHARS", "12000")),
+        "max_parallel": int(os.environ.get("LLM_MAX_PARALLEL", "4")),
+    }
+    llm_keyword_svc = LLMKeywordService(client=ollama_client, **llm_chunking)
+    llm_text_svc = LLMTextSummaryService(client=ollama_client, **llm_chunking)
+
+    corpus = await CorpusStats(repo).load()
+
+    summary_cache = SummaryCache(
+        repo=repo,
+        max_bytes=int(os.environ.get("SUMMARY_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    )
+    summary_service = SummaryGenerationService(
+        llm_text_svc=llm_text_svc,
+        llm_keyword_svc=llm_keyword_svc,
+        extraction_text_svc=ExtractionTextSummaryService(
+            registry.translator,
+            summary_size=10,
+            scoring=os.environ.get("EXTRACTION_SCORING", "frequency"),
+            mode=os.environ.get("EXTRACTION_TEXT_MODE", "summarize_first"),
+            compute=compute,
+            corpus=corpus,
+        ),
+        extraction_keyword_svc=ExtractionKeywordService(
+            registry.translator, compute=compute, corpus=corpus, idf_mode=os.environ.get("KEYWORD_IDF") == "1"
+        ),
+        cache=summary_cache,
+        compute=compute,
+        stage_timeouts={
+            "llm_text_summary": float(os.environ.get("STAGE_TIMEOUT_LLM", "600")),
+            "llm_keyword_summary": float(os.environ.get("STAGE_TIMEOUT_LLM", "600")),
+            "extraction_text_summary": float(os.environ.get("STAGE_TIMEOUT_EXTRACTION", "120")),
+            "extraction_keyword_summary": float(os.environ.get("STAGE_TIMEOUT_EXTRACTION", "120")),
+        },
+    )
+
+    document_service = DocumentService(
+        repo=repo,
+        summary_service=summary_service,
+        report_cache=ReportCache(REPORTS_DIR, ReportService(compute=compute)),
+        corpus=corpus,
+        max_stage_attempts=int(os.environ.get("STAGE_MAX_ATTEMPTS", "5")),
+        eager_reports=os.environ.get("EAGER_REPORTS") == "1",
+    )
+    max_pages = os.environ.get("PDF_MAX_PAGES")
+    max_chars = os.environ.get("TEXT_MAX_CHARS")
+    uploader = FileUploader(
+        UPLOADS_DIR,
+        compute=compute,
+        max_upload_bytes=int(os.environ.get("MAX_UPLOAD_BYTES", str(50 * 1024 * 1024))),
+        max_pages=int(max_pages) if max_pages else None,
+        max_chars=int(max_chars) if max_chars else None,
+    )
+    return AppServices(
+        repo=repo,
+        model_registry=registry,
+        compute=compute,
+        ollama_client=ollama_client,
+        summary_cache=summary_cache,
+        corpus=corpus,
+        document_service=document_service,
+        uploader=uploader,
+    )
+
+
+async def close_services(services: AppServices) -> None:
+    await services.ollama_client.aclose()
+    services.compute.shutdown()
+    await services.repo.engine.dispose()
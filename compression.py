@@ -0,0 +1,49 @@
+# project_root/compression.py
+import json
+import zlib
+from typing import Any
+
+try:
+    import zstandard
+except ImportError:  # zstd необязателен — без него используется zlib
+    zstandard = None
+
+DEFAULT_CODEC = "zstd" if zstandard is not None else "zlib"
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 10
+
+
+def compress(data: bytes, codec: str = DEFAULT_CODEC) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard not installed. Install with: pip install zstandard")
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if codec == "zlib":
+        return zlib.compress(data, ZLIB_LEVEL)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard not installed. Install with: pip install zstandard")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def compress_text(text: str, codec: str = DEFAULT_CODEC) -> bytes:
+    return compress(text.encode("utf-8"), codec)
+
+
+def decompress_text(data: bytes, codec: str) -> str:
+    return decompress(data, codec).decode("utf-8")
+
+
+def compress_json(obj: Any, codec: str = DEFAULT_CODEC) -> bytes:
+    return compress(json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8"), codec)
+
+
+def decompress_json(data: bytes, codec: str) -> Any:
+    return json.loads(decompress(data, codec))
@@ -1,6 +1,8 @@
 # app/dependencies.py
 from fastapi import Request
 from services.document_service import DocumentService
+from services.job_service import JobService
+from services.summary_cache import SummaryCache
 from file_handler import FileUploader
 
 def get_document_service(request: Request) -> DocumentService:
@@ -8,3 +10,9 @@ def get_document_service(request: Request) -> DocumentService:
 
 def get_uploader(request: Request) -> FileUploader:
     return request.app.state.uploader
+
+def get_job_service(request: Request) -> JobService:
+    return request.app.state.job_service
+
+def get_summary_cache(request: Request) -> SummaryCache:
+    return request.app.state.summary_cache
@@ -1,49 +1,209 @@
 # project_root/file_handler.py
 import asyncio
-import shutil
+import hashlib
+import io
+import os
+import uuid
+from collections import deque
+from dataclasses import dataclass
 from pathlib import Path
-from datetime import datetime
+from typing import AsyncIterator, List, Optional
 from fastapi import UploadFile
 
+from services.compute_pool import ComputePool
+
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Загружаемый файл превышает допустимый размер."""
+
+
+@dataclass(frozen=True)
+class SavedUpload:
+    """Сохранённая загрузка: путь в хранилище, исходное имя и SHA-256 содержимого."""
+    path: Path
+    original_name: str
+    sha256: str
+    size: int
+
+
+def count_pdf_pages(path: str) -> int:
+    """Считает страницы PDF по дереву страниц (без разбора содержимого)."""
+    try:
+        from pdfminer.pdfpage import PDFPage
+    except ImportError as e:
+        raise RuntimeError("pdfminer.six not installed. Install with: pip install pdfminer.six") from e
+    with open(path, "rb") as fp:
+        return sum(1 for _ in PDFPage.get_pages(fp))
+
+
+def extract_pdf_pages(path: str, start: int, end: int) -> List[str]:
+    """
+    Извлекает текст страниц [start, end) — по строке на страницу.
+
+    Файл открывается один раз; PDFPage.get_pages разбирает содержимое только
+    страниц диапазона и останавливается после последней из них.
+    Функция модульного уровня, чтобы её можно было выполнять в пуле процессов.
+    """
+    try:
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+    except ImportError as e:
+        raise RuntimeError("pdfminer.six not installed. Install with: pip install pdfminer.six") from e
+    pages = [""] * (end - start)
+    rsrcmgr = PDFResourceManager(caching=True)
+    out = io.StringIO()
+    device = TextConverter(rsrcmgr, out, laparams=LAParams())
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+    try:
+        with open(path, "rb") as fp:
+            page_iter = PDFPage.get_pages(fp, pagenos=set(range(start, end)), maxpages=end)
+            for index, page in enumerate(page_iter):
+                interpreter.process_page(page)
+                # TextConverter завершает каждую страницу символом \f
+                pages[index] = out.getvalue().removesuffix("\f")
+                out.seek(0)
+                out.truncate()
+    finally:
+        device.close()
+    return pages
+
+
 class FileUploader:
-    def __init__(self, uploads_dir: Path):
+    def __init__(
+        self,
+        uploads_dir: Path,
+        compute: Optional[ComputePool] = None,
+        max_upload_bytes: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        max_chars: Optional[int] = None,
+        pages_per_task: int = 16,
+    ):
         self.uploads_dir = uploads_dir
         self.uploads_dir.mkdir(parents=True, exist_ok=True)
+        self.max_upload_bytes = max_upload_bytes
+        # Без пула страницы извлекаются в отдельном потоке
+        self.compute = compute or ComputePool(workers=0)
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.pages_per_task = max(1, pages_per_task)
+
+    def _check_size(self, size: int) -> None:
+        if self.max_upload_bytes is not None and size > self.max_upload_bytes:
+            raise UploadTooLargeError(
+                f"Файл больше допустимого размера ({self.max_upload_bytes // (1024 * 1024)} МБ)"
+            )
 
-    async def save_upload(self, upload: UploadFile) -> Path:
-        filename = Path(upload.filename).name
-        target = self.uploads_dir / f"{int(datetime.utcnow().timestamp())}_{filename}"
-        await asyncio.to_thread(self._write_file, upload, target)
-        return target
+    async def save_upload(self, upload: UploadFile) -> SavedUpload:
+        """
+        Потоково сохраняет загрузку: читает её частями, считает SHA-256 на лету и
+        прерывает запись при превышении max_upload_bytes. Файл хранится под именем
+        <sha256><расширение>, поэтому одинаковые файлы сохраняются один раз, а
+        одновременные загрузки не конфликтуют по именам.
+        """
+        original_name = Path(upload.filename or "upload").name
+        if upload.size is not None:
+            self._check_size(upload.size)
 
-    def _write_file(self, upload: UploadFile, target_path: Path):
+        hasher = hashlib.sha256()
+        size = 0
+        tmp_path = self.uploads_dir / f".{uuid.uuid4().hex}.part"
+        out_f = await asyncio.to_thread(open, tmp_path, "wb")
         try:
-            upload.file.seek(0)
-            with open(target_path, "wb") as out_f:
-                shutil.copyfileobj(upload.file, out_f)
+            while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                self._check_size(size)
+                hasher.update(chunk)
+                await asyncio.to_thread(out_f.write, chunk)
+        except BaseException:
+            await asyncio.to_thread(out_f.close)
+            tmp_path.unlink(missing_ok=True)
+            raise
         finally:
-            upload.file.close()
+            await upload.close()
+        await asyncio.to_thread(out_f.close)
 
-    async def extract_text(self, file_path: Path) -> str:
+        digest = hasher.hexdigest()
+        target = self.uploads_dir / f"{digest}{Path(original_name).suffix.lower()}"
+        if target.exists():
+            tmp_path.unlink(missing_ok=True)  # такой файл уже сохранён
+        else:
+            os.replace(tmp_path, target)
+        return SavedUpload(path=target, original_name=original_name, sha256=digest, size=size)
+
+    async def stream_text(self, file_path: Path) -> AsyncIterator[str]:
+        """Отдаёт текст документа частями: по странице для PDF, по абзацу для DOCX."""
         suffix = file_path.suffix.lower()
         if suffix == ".pdf":
-            return await asyncio.to_thread(self._extract_text_pdf, str(file_path))
+            async for page in self._iter_pdf_pages(str(file_path)):
+                yield page
         elif suffix == ".docx":
-            return await asyncio.to_thread(self._extract_text_docx, str(file_path))
+            for paragraph in await asyncio.to_thread(self._extract_paragraphs_docx, str(file_path)):
+                yield paragraph
         else:
             raise ValueError("Unsupported file type: only PDF and DOCX are allowed")
 
-    def _extract_text_docx(self, path: str) -> str:
+    async def extract_text(self, file_path: Path) -> str:
+        """
+        Собирает текст из потока частей с учётом ограничения max_chars.
+
+        Этапы резюмирования работают с документом целиком, поэтому страницы
+        склеиваются здесь; память ограничена самим текстом (max_chars), а
+        извлечение оставшихся страниц прекращается, как только лимит достигнут.
+        Потребителям, которым хватает частей, нужен stream_text.
+        """
+        separator = "\n" if file_path.suffix.lower() == ".pdf" else "\n\n"
+        parts: List[str] = []
+        total = 0
+        stream = self.stream_text(file_path)
+        try:
+            async for part in stream:
+                if not part:
+                    continue
+                if self.max_chars is not None and total + len(part) > self.max_chars:
+                    parts.append(part[:self.max_chars - total])
+                    break
+                parts.append(part)
+                total += len(part)
+        finally:
+            # Досрочная остановка отменяет ещё не извлечённые диапазоны страниц
+            await stream.aclose()
+        return separator.join(parts)
+
+    async def _iter_pdf_pages(self, path: str) -> AsyncIterator[str]:
+        """
+        Извлекает страницы PDF диапазонами по pages_per_task в пуле процессов.
+        В работе одновременно не больше двух диапазонов на воркер, поэтому память
+        ограничена, а страницы отдаются строго по порядку.
+        """
+        total_pages = await asyncio.to_thread(count_pdf_pages, path)
+        if self.max_pages is not None:
+            total_pages = min(total_pages, self.max_pages)
+        ranges = deque(
+            (start, min(start + self.pages_per_task, total_pages))
+            for start in range(0, total_pages, self.pages_per_task)
+        )
+        window = max(1, self.compute.workers) * 2
+        in_flight: "deque[asyncio.Task]" = deque()
+        try:
+            while ranges or in_flight:
+                while ranges and len(in_flight) < window:
+                    start, end = ranges.popleft()
+                    in_flight.append(asyncio.create_task(self.compute.run(extract_pdf_pages, path, start, end)))
+                for page in await in_flight.popleft():
+                    yield page
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    def _extract_paragraphs_docx(self, path: str) -> List[str]:
         try:
             from docx import Document
         except ImportError as e:
             raise RuntimeError("python-docx not installed. Install with: pip install python-docx") from e
         doc = Document(path)
-        return "\n\n".join([p.text for p in doc.paragraphs if p.text])
-
-    def _extract_text_pdf(self, path: str) -> str:
-        try:
-            from pdfminer.high_level import extract_text
-        except ImportError as e:
-            raise RuntimeError("pdfminer.six not installed. Install with: pip install pdfminer.six") from e
-        return extract_text(path) or ""
\ No newline at end of file
+        return [p.text for p in doc.paragraphs if p.text]
@@ -0,0 +1,67 @@
+# app/http_cache.py
+"""
+Условные GET-запросы для документов и отчётов.
+
+ETag строится из id документа и content_hash, Last-Modified — из updated_at;
+оба берутся из метаданных документа, поэтому 304 отдаётся до загрузки тела
+из БД и до рендера PDF.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request, Response, status
+
+from models import DocumentValidatorsDTO
+
+# Готовый документ меняется только при повторе этапов, поэтому кэшируется надолго;
+# документ с незавершёнными этапами браузер перепроверяет при каждом показе.
+CACHE_CONTROL_FINAL = "public, max-age=86400, stale-while-revalidate=604800"
+CACHE_CONTROL_PENDING = "no-cache"
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    # SQLite возвращает время без часового пояса — оно записано в UTC
+    value = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def cache_headers(validators: DocumentValidatorsDTO, variant: str = "") -> Dict[str, str]:
+    """Заголовки ETag / Last-Modified / Cache-Control для представления документа (variant: "pdf", "html" …)."""
+    suffix = f"-{variant}" if variant else ""
+    headers = {
+        "ETag": f'"{validators.id}-{validators.content_hash[:32]}{suffix}"',
+        "Cache-Control": CACHE_CONTROL_PENDING if validators.pending else CACHE_CONTROL_FINAL,
+    }
+    last_modified = _as_utc(validators.updated_at)
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Слабое сравнение (RFC 9110 §13.1.2): W/"x" совпадает с "x"
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def not_modified(request: Request, headers: Dict[str, str]) -> Optional[Response]:
+    """Ответ 304, если кэш клиента актуален; If-None-Match имеет приоритет над If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, headers["ETag"])
+    elif (if_modified_since := request.headers.get("if-modified-since")) and "Last-Modified" in headers:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return None
+        fresh = parsedate_to_datetime(headers["Last-Modified"]) <= _as_utc(since)
+    else:
+        return None
+    if not fresh:
+        return None
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
@@ -0,0 +1,250 @@
+# project_root/ingest.py
+"""
+Массовая загрузка документов из каталога или zip-архива.
+
+    python -m ingest /data/reports
+    python -m ingest /data/reports.zip --extract-workers 4 --summarize-workers 2
+
+Файлы проходят ограниченный конвейер извлечение → резюмирование: очереди между
+этапами имеют фиксированный размер, поэтому чтение источника не убегает вперёд
+медленного резюмирования. Результат каждого файла сразу дописывается в файл
+контрольной точки (JSON Lines); при повторном запуске уже обработанные файлы
+пропускаются, так что после падения загрузка продолжается с места остановки.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import zipfile
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from bootstrap import AppServices, build_services, close_services
+
+SUPPORTED_SUFFIXES = {".pdf", ".docx"}
+
+
+@dataclass(frozen=True)
+class SourceItem:
+    """Файл для загрузки; key — стабильный идентификатор для контрольной точки и имя документа."""
+    key: str
+    file_name: str
+    path: Optional[Path] = None
+    archive: Optional[Path] = None
+    member: Optional[str] = None
+
+
+def iter_sources(source: Path) -> Iterator[SourceItem]:
+    """Файлы PDF/DOCX каталога (рекурсивно) или zip-архива в детерминированном порядке."""
+    if source.is_dir():
+        for path in sorted(source.rglob("*")):
+            if path.is_file() and path.suffix.lower() in SUPPORTED_SUFFIXES:
+                yield SourceItem(key=path.relative_to(source).as_posix(), file_name=path.name, path=path)
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            members = sorted(info.filename for info in archive.infolist() if not info.is_dir())
+        for member in members:
+            if Path(member).suffix.lower() in SUPPORTED_SUFFIXES:
+                yield SourceItem(
+                    key=f"{source.name}:{member}", file_name=Path(member).name, archive=source, member=member
+                )
+    else:
+        raise ValueError(f"{source} не является каталогом или zip-архивом")
+
+
+class IngestCheckpoint:
+    """Файл контрольной точки: одна JSON-строка на обработанный файл, запись с fsync."""
+    def __init__(self, path: Path):
+        self.path = path
+        self.completed: Dict[str, dict] = {}
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # недописанная строка при падении
+                    self.completed[record["key"]] = record
+        self._file = open(path, "a", encoding="utf-8")
+
+    def should_skip(self, key: str, retry_failed: bool) -> bool:
+        record = self.completed.get(key)
+        if record is None:
+            return False
+        return not (retry_failed and record["status"] == "failed")
+
+    def record(self, key: str, status: str, **fields: Any) -> None:
+        record = {"key": key, "status": status, **fields}
+        self.completed[key] = record
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class BulkIngester:
+    """
+    Конвейер массовой загрузки поверх FileUploader.extract_text и DocumentService.
+
+    extract_workers задач извлекают текст, summarize_workers — резюмируют и
+    сохраняют документы; между этапами — очередь на queue_size элементов.
+    """
+    def __init__(
+        self,
+        services: AppServices,
+        checkpoint: IngestCheckpoint,
+        extract_workers: int = 2,
+        summarize_workers: int = 2,
+        queue_size: int = 8,
+        retry_failed: bool = False,
+    ):
+        self.services = services
+        self.checkpoint = checkpoint
+        self.extract_workers = max(1, extract_workers)
+        self.summarize_workers = max(1, summarize_workers)
+        self.queue_size = max(1, queue_size)
+        self.retry_failed = retry_failed
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self.counts: Dict[str, int] = defaultdict(int)
+        self._tmp_dir = Path(tempfile.mkdtemp(prefix="ingest-"))
+
+    def _record(self, item: SourceItem, status: str, **fields: Any) -> None:
+        self.counts[status] += 1
+        self.checkpoint.record(item.key, status, **fields)
+        suffix = f" ({fields['error']})" if "error" in fields else ""
+        print(f"{'✅' if status == 'done' else '⏭️' if status == 'skipped' else '❌'} {item.key}: {status}{suffix}")
+
+    def _materialize(self, item: SourceItem) -> Path:
+        """Путь к файлу на диске (член архива распаковывается во временный каталог)."""
+        if item.path is not None:
+            return item.path
+        target = self._tmp_dir / f"{hashlib.sha1(item.key.encode()).hexdigest()}{Path(item.member).suffix.lower()}"
+        with zipfile.ZipFile(item.archive) as archive, archive.open(item.member) as src, open(target, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        return target
+
+    async def _feed(self, source: Path, extract_q: asyncio.Queue) -> None:
+        for item in await asyncio.to_thread(lambda: list(iter_sources(source))):
+            if self.checkpoint.should_skip(item.key, self.retry_failed):
+                self.counts["resumed"] += 1
+                continue
+            await extract_q.put(item)
+        for _ in range(self.extract_workers):
+            await extract_q.put(None)
+
+    async def _extract_worker(self, extract_q: asyncio.Queue, summarize_q: asyncio.Queue) -> None:
+        while (item := await extract_q.get()) is not None:
+            try:
+                if await self.services.document_service.find_by_name(item.key):
+                    self._record(item, "skipped", reason="exists")
+                    continue
+                started = time.perf_counter()
+                path = await asyncio.to_thread(self._materialize, item)
+                try:
+                    text = await self.services.uploader.extract_text(path)
+                finally:
+                    if item.path is None:
+                        path.unlink(missing_ok=True)
+                self.timings["extract"].append(time.perf_counter() - started)
+            except Exception as e:
+                self._record(item, "failed", stage="extract", error=str(e))
+                continue
+            await summarize_q.put((item, text))
+
+    async def _summarize_worker(self, summarize_q: asyncio.Queue) -> None:
+        while (entry := await summarize_q.get()) is not None:
+            item, text = entry
+            started = time.perf_counter()
+
+            async def on_stage(stage: str, _result: Any) -> None:
+                self.timings[stage].append(time.perf_counter() - started)
+
+            try:
+                doc_id = await self.services.document_service.create_document(
+                    file_name=item.file_name, text=text or "", name=item.key, on_stage=on_stage
+                )
+            except Exception as e:
+                self._record(item, "failed", stage="summarize", error=str(e))
+                continue
+            self.timings["summarize"].append(time.perf_counter() - started)
+            self._record(item, "done", document_id=doc_id)
+
+    async def run(self, source: Path) -> None:
+        extract_q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        summarize_q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        started = time.perf_counter()
+        try:
+            extractors = [
+                asyncio.create_task(self._extract_worker(extract_q, summarize_q))
+                for _ in range(self.extract_workers)
+            ]
+            summarizers = [
+                asyncio.create_task(self._summarize_worker(summarize_q))
+                for _ in range(self.summarize_workers)
+            ]
+            await self._feed(source, extract_q)
+            await asyncio.gather(*extractors)
+            for _ in summarizers:
+                await summarize_q.put(None)
+            await asyncio.gather(*summarizers)
+        finally:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+        self.report(time.perf_counter() - started)
+
+    def report(self, elapsed: float) -> None:
+        done = self.counts["done"]
+        print(
+            f"📊 Готово за {elapsed:.1f} с: загружено {done}, ошибок {self.counts['failed']}, "
+            f"пропущено {self.counts['skipped']}, уже в контрольной точке {self.counts['resumed']}; "
+            f"{done / elapsed if elapsed else 0.0:.2f} док/с"
+        )
+        for stage, values in self.timings.items():
+            ordered = sorted(values)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            print(
+                f"   {stage:<28} n={len(values):<6} mean={statistics.fmean(values):.3f} с  "
+                f"p95={p95:.3f} с  total={sum(values):.1f} с"
+            )
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Массовая загрузка PDF/DOCX из каталога или zip-архива")
+    parser.add_argument("source", type=Path, help="каталог или zip-архив")
+    parser.add_argument("--checkpoint", type=Path, help="файл контрольной точки (по умолчанию <source>.ingest.jsonl)")
+    parser.add_argument("--extract-workers", type=int, default=2)
+    parser.add_argument("--summarize-workers", type=int, default=2)
+    parser.add_argument("--queue-size", type=int, default=8, help="ёмкость очередей между этапами")
+    parser.add_argument("--retry-failed", action="store_true", help="повторить файлы, завершившиеся ошибкой")
+    return parser.parse_args()
+
+
+async def main() -> None:
+    args = parse_args()
+    source = args.source.resolve()
+    checkpoint = IngestCheckpoint(args.checkpoint or source.with_name(source.name + ".ingest.jsonl"))
+    services = await build_services()
+    try:
+        await BulkIngester(
+            services,
+            checkpoint,
+            extract_workers=args.extract_workers,
+            summarize_workers=args.summarize_workers,
+            queue_size=args.queue_size,
+            retry_failed=args.retry_failed,
+        ).run(source)
+    finally:
+        checkpoint.close()
+        await close_services(services)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
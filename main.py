@@ -1,70 +1,45 @@
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from pathlib import Path
 import os
 from contextlib import asynccontextmanager
 
 from web_routes import router as web_router
 from api_routes import router as api_router
 
-from repository import TextRepositoryAsync
-from services.document_service import DocumentService
-from services.summary_generation_service import SummaryGenerationService
+from services.job_service import JobService
+from bootstrap import BASE_DIR, build_services, close_services
 
-from services.llm_text.facade import LLMTextSummaryService
-#from services.llm_text.llm_text_summary_service import  LLMTextSummaryService
-
-from services.extraction_text.facade import ExtractionTextSummaryService
-
-
-
-from services.extraction_keyword.facade import ExtractionKeywordService
-from services.translator import LocalTranslator
-
-from services.llm_keyword.facade import LLMKeywordService
-#from services.llm_keyword.keyword_tree_generator_llm import LLMKeywordService
-
-from services.ollama_client import OllamaClient
-
-from file_handler import FileUploader
-from dependencies import get_document_service, get_uploader
-
-BASE_DIR = Path(__file__).parent
 TEMPLATES_DIR = BASE_DIR / "templates"
 STATIC_DIR = BASE_DIR / "static"
-UPLOADS_DIR = BASE_DIR / "uploads"
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    db_url = os.environ.get("DB_URL", f"sqlite+aiosqlite:///{BASE_DIR / 'texts_async.db'}")
-    repo = TextRepositoryAsync(db_url=db_url)
-    await repo.init_models()
-
-    ollama_client = OllamaClient(model_name="gpt-oss:120b-cloud")
-    #llm_keyword_svc=LLMKeywordService(client=ollama_client)
-    llm_keyword_svc=LLMKeywordService()
-
-    #llm_text_svc=LLMTextSummaryService(client=ollama_client)
-    llm_text_svc=LLMTextSummaryService()
-
-    summary_service = SummaryGenerationService(
-        llm_text_svc=llm_text_svc,
-        llm_keyword_svc=llm_keyword_svc,
-        extraction_text_svc=ExtractionTextSummaryService(summary_size=10),
-        extraction_keyword_svc=ExtractionKeywordService(LocalTranslator()),
+    services = await build_services()
+    job_service = JobService(
+        repo=services.repo,
+        document_service=services.document_service,
+        uploader=services.uploader,
+        workers=int(os.environ.get("JOB_WORKERS", "2")),
+        retry_interval=float(os.environ.get("STAGE_RETRY_INTERVAL", "300")),
     )
-
-    document_service = DocumentService(repo=repo, summary_service=summary_service)
-    app.state.document_service = document_service
-    app.state.repo = repo
-    app.state.uploader = FileUploader(UPLOADS_DIR)
+    await job_service.start()
+
+    app.state.services = services
+    app.state.document_service = services.document_service
+    app.state.repo = services.repo
+    app.state.uploader = services.uploader
+    app.state.job_service = job_service
+    app.state.compute = services.compute
+    app.state.ollama_client = services.ollama_client
+    app.state.summary_cache = services.summary_cache
+    app.state.model_registry = services.model_registry
 
     yield  
     # Shutdown
-    if repo := getattr(app.state, "repo", None):
-        await repo.engine.dispose()
+    await job_service.stop()
+    await close_services(services)
 
 
 def create_app() -> FastAPI:
@@ -1,11 +1,11 @@
 # project_root/models.py
 
 from __future__ import annotations
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 from pydantic import BaseModel, Field
-from sqlalchemy import Column, Integer, String, JSON, DateTime, func
+from sqlalchemy import Column, Integer, String, JSON, DateTime, Float, Text, LargeBinary, ForeignKey, UniqueConstraint, Index, func
 from sqlalchemy.orm import declarative_base
 
 # ----------------------------
@@ -29,11 +29,30 @@ class KeywordTreeSummary(BaseModel):
     ru: List[KeywordNode] = Field(description="Список корневых узлов для русского языка.")
     en: List[KeywordNode] = Field(description="Список корневых узлов для английского языка.")
 
+# Этапы резюмирования — имена полей SummaryResult
+SUMMARY_STAGES = ("llm_text_summary", "llm_keyword_summary", "extraction_text_summary", "extraction_keyword_summary")
+
+class StageStatus(BaseModel):
+    """Статус этапа резюмирования: ok, failed или timeout (последние два повторяются в фоне)."""
+    status: str = "ok"
+    error: Optional[str] = None
+    attempts: int = 1
+
 class SummaryResult(BaseModel):
     llm_text_summary: TextSummary
     llm_keyword_summary: KeywordTreeSummary
     extraction_text_summary: TextSummary
     extraction_keyword_summary: KeywordTreeSummary
+    # Нет записи об этапе — этап выполнен успешно (документы до появления статусов)
+    stage_status: Dict[str, StageStatus] = Field(default_factory=dict)
+
+    def pending_stages(self, max_attempts: Optional[int] = None) -> List[str]:
+        """Этапы, завершившиеся ошибкой или по таймауту и ещё подлежащие повтору."""
+        return [
+            stage for stage in SUMMARY_STAGES
+            if (st := self.stage_status.get(stage)) is not None and st.status != "ok"
+            and (max_attempts is None or st.attempts < max_attempts)
+        ]
 
 class TextDocumentDTO(BaseModel):
     id: int
@@ -49,6 +68,73 @@ class DocumentInfoDTO(BaseModel):
     name: Optional[str]
     created_at: Optional[datetime]
 
+class DocumentPageDTO(BaseModel):
+    """Страница списка документов; next_cursor передаётся в следующий запрос."""
+    items: List[DocumentInfoDTO]
+    next_cursor: Optional[str] = None
+
+class DocumentValidatorsDTO(BaseModel):
+    """Метаданные для условных GET-запросов (ETag / Last-Modified) без загрузки тела документа."""
+    id: int
+    content_hash: str
+    updated_at: Optional[datetime]
+    pending: bool
+
+class SearchHitDTO(BaseModel):
+    """Результат полнотекстового поиска: метаданные документа, BM25-ранг и фрагмент с подсветкой."""
+    id: int
+    file_name: str
+    name: Optional[str]
+    created_at: Optional[datetime]
+    rank: float
+    snippet: str
+
+class SearchPageDTO(BaseModel):
+    items: List[SearchHitDTO]
+    next_offset: Optional[int] = None
+
+class KeywordFacetDTO(BaseModel):
+    """Ключевое слово и число документов, в которых оно встречается."""
+    keyword: str
+    lang: str
+    documents: int
+
+class KeywordBrowseDTO(BaseModel):
+    """Фасетный просмотр: выбранные ключевые слова, документы с ними всеми и уточняющие фасеты."""
+    selected: List[str]
+    facets: List[KeywordFacetDTO]
+    documents: List[DocumentInfoDTO]
+
+class RelatedDocumentDTO(BaseModel):
+    id: int
+    file_name: str
+    name: Optional[str]
+    created_at: Optional[datetime]
+    score: float
+    shared_keywords: int
+
+class JobDTO(BaseModel):
+    """Состояние фоновой задачи обработки загруженного документа."""
+    id: int
+    name: str
+    file_name: str
+    file_sha256: Optional[str] = None
+    status: str
+    stage: Optional[str]
+    progress: float
+    document_id: Optional[int]
+    error: Optional[str]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+class JobProgressDTO(BaseModel):
+    """Краткий статус задачи для опроса прогресса."""
+    id: int
+    status: str
+    stage: Optional[str]
+    progress: float
+    document_id: Optional[int]
+
 # Resolve forward references in Pydantic models
 KeywordNode.update_forward_refs()
 KeywordTreeSummary.update_forward_refs()
@@ -60,9 +146,98 @@ SummaryResult.update_forward_refs()
 # ----------------------------
 class TextDocument(Base):
     __tablename__ = "text_documents"
+    # Индекс для keyset-пагинации списка документов (created_at DESC, id DESC)
+    __table_args__ = (Index("ix_text_documents_created_at_id", "created_at", "id"),)
     id = Column(Integer, primary_key=True, autoincrement=True)
     file_name = Column(String, nullable=False)
     name = Column(String, nullable=False, unique=True)
-    original_text = Column(String, nullable=False)
-    summary_json = Column(JSON, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Этапы резюмирования, ожидающие фонового повтора (через запятую), NULL — все готовы
+    pending_stages = Column(String, nullable=True, index=True)
+    # Валидаторы HTTP-кэша: SHA-256 текста и резюме, время последнего изменения
+    content_hash = Column(String(64), nullable=True)
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    # Время последней попытки повтора этапов (очередь повторов идёт от давних попыток)
+    stages_retried_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class DocumentBody(Base):
+    """Сжатый исходный текст документа (холодные данные, читаются только при открытии документа)."""
+    __tablename__ = "document_bodies"
+    document_id = Column(Integer, ForeignKey("text_documents.id", ondelete="CASCADE"), primary_key=True)
+    codec = Column(String, nullable=False)
+    original_text = Column(LargeBinary, nullable=False)
+    raw_size = Column(Integer, nullable=False)
+
+
+class DocumentSummary(Base):
+    """Сжатый JSON SummaryResult документа (холодные данные)."""
+    __tablename__ = "document_summaries"
+    document_id = Column(Integer, ForeignKey("text_documents.id", ondelete="CASCADE"), primary_key=True)
+    codec = Column(String, nullable=False)
+    summary = Column(LargeBinary, nullable=False)
+    raw_size = Column(Integer, nullable=False)
+
+class DocumentKeyword(Base):
+    """
+    Постинг ключевое слово → документ из деревьев llm_keyword_summary и
+    extraction_keyword_summary. weight — сумма 1/(1+глубина узла) по всем вхождениям.
+    """
+    __tablename__ = "document_keywords"
+    __table_args__ = (Index("ix_document_keywords_keyword_lang", "keyword", "lang", "document_id"),)
+    document_id = Column(Integer, ForeignKey("text_documents.id", ondelete="CASCADE"), primary_key=True)
+    keyword = Column(String, primary_key=True)
+    lang = Column(String(2), primary_key=True)
+    weight = Column(Float, nullable=False)
+
+class CorpusTerm(Base):
+    """Документная частота термина (число документов языка lang, где он встречается)."""
+    __tablename__ = "corpus_terms"
+    lang = Column(String(2), primary_key=True)
+    term = Column(String, primary_key=True)
+    df = Column(Integer, nullable=False)
+
+class CorpusDocCount(Base):
+    """Число документов корпуса по языкам (N в формуле IDF)."""
+    __tablename__ = "corpus_doc_counts"
+    lang = Column(String(2), primary_key=True)
+    n_docs = Column(Integer, nullable=False)
+
+class DocumentTermSet(Base):
+    """Множество терминов документа, учтённое в corpus_terms (чтобы при удалении вычесть то же самое)."""
+    __tablename__ = "document_term_sets"
+    document_id = Column(Integer, ForeignKey("text_documents.id", ondelete="CASCADE"), primary_key=True)
+    lang = Column(String(2), nullable=False)
+    codec = Column(String, nullable=False)
+    terms = Column(LargeBinary, nullable=False)
+
+class ProcessingJob(Base):
+    """Задача асинхронной обработки загрузки (переживает перезапуск процесса)."""
+    __tablename__ = "processing_jobs"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String, nullable=False)
+    file_name = Column(String, nullable=False)
+    file_path = Column(String, nullable=False)
+    file_sha256 = Column(String(64), nullable=True, index=True)
+    status = Column(String, nullable=False, default="queued", index=True)
+    stage = Column(String, nullable=True)
+    progress = Column(Float, nullable=False, default=0.0)
+    document_id = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class SummaryCacheEntry(Base):
+    """Кэш результатов этапов резюмирования по хэшу нормализованного текста."""
+    __tablename__ = "summary_cache"
+    __table_args__ = (UniqueConstraint("text_hash", "stage", "version", name="uq_summary_cache_key"),)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    text_hash = Column(String(64), nullable=False)
+    stage = Column(String, nullable=False)
+    version = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
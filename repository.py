@@ -1,66 +1,572 @@
 # project_root/repository.py
 
-from typing import List, Optional
-from sqlalchemy import select
+import base64
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select, update, delete, func, inspect, text, and_, or_, String, type_coerce, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.dialects import postgresql, sqlite
+
+from compression import DEFAULT_CODEC, compress_text, decompress_text, compress_json, decompress_json
+from models import Base, TextDocument, DocumentBody, DocumentSummary, SummaryResult, TextDocumentDTO, DocumentInfoDTO, DocumentPageDTO, DocumentValidatorsDTO, SearchHitDTO, SearchPageDTO, ProcessingJob, DocumentKeyword, KeywordFacetDTO, KeywordBrowseDTO, RelatedDocumentDTO, JobDTO, SummaryCacheEntry, CorpusTerm, CorpusDocCount, DocumentTermSet
+
+# PRAGMA, применяемые к каждому новому соединению SQLite:
+# WAL — читатели не блокируются писателем; NORMAL — fsync только на checkpoint
+# (в режиме WAL это безопасно); busy_timeout — ждать блокировку вместо "database is locked".
+SQLITE_PRAGMAS: Dict[str, object] = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,            # мс
+    "mmap_size": 256 * 1024 * 1024,  # байт
+    "cache_size": -64 * 1024,        # отрицательное значение — в КиБ (64 МБ)
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
+
+
+# Полнотекстовый индекс SQLite FTS5; rowid совпадает с text_documents.id
+FTS_TABLE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS document_fts USING fts5("
+    "name, original_text, summaries, keywords, tokenize='unicode61 remove_diacritics 2')"
+)
+# Веса колонок для bm25(): name, original_text, summaries, keywords
+FTS_BM25_WEIGHTS = "10.0, 1.0, 3.0, 5.0"
+SUMMARY_TEXT_FIELDS = ("llm_text_summary", "extraction_text_summary")
+SUMMARY_KEYWORD_FIELDS = ("llm_keyword_summary", "extraction_keyword_summary")
+
+
+def _keyword_names(nodes: list, names: List[str]) -> List[str]:
+    for node in nodes or []:
+        names.append(node.get("name", ""))
+        _keyword_names(node.get("children", []), names)
+    return names
+
+
+def fts_fields(summary_payload: dict) -> Tuple[str, str]:
+    """Текст резюме и имена узлов деревьев ключевых слов для индексации."""
+    summaries = []
+    for field in SUMMARY_TEXT_FIELDS:
+        part = summary_payload.get(field) or {}
+        summaries.extend([part.get("ru", ""), part.get("en", "")])
+    keywords: List[str] = []
+    for field in SUMMARY_KEYWORD_FIELDS:
+        part = summary_payload.get(field) or {}
+        _keyword_names(part.get("ru", []), keywords)
+        _keyword_names(part.get("en", []), keywords)
+    return "\n".join(summaries), "\n".join(keywords)
+
+
+def fts_query(query: str) -> str:
+    """
+    Превращает пользовательский ввод в безопасный запрос FTS5: каждое слово
+    берётся в кавычки (операторы FTS не интерпретируются), слова объединяются
+    через AND; слово с * на конце ищется как префикс.
+    """
+    terms = []
+    for raw in query.split():
+        prefix = raw.endswith("*")
+        term = raw.rstrip("*").replace('"', '""')
+        if term:
+            terms.append(f'"{term}"*' if prefix else f'"{term}"')
+    return " ".join(terms)
+
+
+def content_hash(original_text: str, summary_payload: dict) -> str:
+    """SHA-256 исходного текста и канонического JSON резюме (основа ETag документа)."""
+    hasher = hashlib.sha256((original_text or "").encode("utf-8"))
+    hasher.update(b"\0")
+    hasher.update(json.dumps(summary_payload, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+# Размер пачки терминов в одном INSERT/UPDATE (ограничение числа параметров SQLite)
+TERM_BATCH = 400
+
+
+def normalize_keyword(keyword: str) -> str:
+    return " ".join((keyword or "").casefold().split())
+
+
+def _collect_postings(nodes: list, lang: str, depth: int, weights: Dict[Tuple[str, str], float]) -> None:
+    for node in nodes or []:
+        keyword = normalize_keyword(node.get("name", ""))
+        if keyword:
+            weights[(keyword, lang)] = weights.get((keyword, lang), 0.0) + 1.0 / (1 + depth)
+        _collect_postings(node.get("children", []), lang, depth + 1, weights)
+
+
+def keyword_postings(doc_id: int, summary_payload: dict) -> List[dict]:
+    """Строки document_keywords для документа: по одной на (ключевое слово, язык)."""
+    weights: Dict[Tuple[str, str], float] = {}
+    for field in SUMMARY_KEYWORD_FIELDS:
+        part = summary_payload.get(field) or {}
+        for lang in ("ru", "en"):
+            _collect_postings(part.get(lang, []), lang, 0, weights)
+    return [
+        {"document_id": doc_id, "keyword": keyword, "lang": lang, "weight": weight}
+        for (keyword, lang), weight in weights.items()
+    ]
 
-from models import Base, TextDocument, SummaryResult, TextDocumentDTO, DocumentInfoDTO
 
 class TextRepositoryAsync:
-    def __init__(self, db_url: str):
-        self.engine = create_async_engine(db_url, echo=False, future=True)
+    """
+    Асинхронный репозиторий документов.
+
+    Поддерживает SQLite (aiosqlite) с PRAGMA-настройкой каждого соединения и
+    PostgreSQL (asyncpg, DB_URL=postgresql+asyncpg://...) с настраиваемым пулом.
+    """
+    def __init__(
+        self,
+        db_url: str,
+        pool_size: int = 10,
+        max_overflow: int = 20,
+        pool_timeout: float = 30.0,
+        sqlite_pragmas: Optional[Dict[str, object]] = None,
+    ):
+        url = make_url(db_url)
+        engine_kwargs = {"echo": False, "future": True}
+        if url.get_backend_name() == "sqlite":
+            pragmas = {**SQLITE_PRAGMAS, **(sqlite_pragmas or {})}
+            # timeout драйвера sqlite3 (сек) согласован с busy_timeout
+            engine_kwargs["connect_args"] = {"timeout": float(pragmas["busy_timeout"]) / 1000}
+            if url.database and url.database != ":memory:":
+                # По умолчанию aiosqlite-файл получает NullPool, который не принимает параметры пула
+                engine_kwargs.update(
+                    poolclass=AsyncAdaptedQueuePool,
+                    pool_size=pool_size,
+                    max_overflow=max_overflow,
+                    pool_timeout=pool_timeout,
+                )
+        else:
+            pragmas = None
+            engine_kwargs.update(
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_timeout=pool_timeout,
+                pool_pre_ping=True,
+                pool_recycle=1800,
+            )
+
+        self.engine = create_async_engine(db_url, **engine_kwargs)
+        if pragmas:
+            self._install_sqlite_pragmas(pragmas)
         self.async_session = async_sessionmaker(self.engine, expire_on_commit=False, class_=AsyncSession)
 
+    def _install_sqlite_pragmas(self, pragmas: Dict[str, object]) -> None:
+        @event.listens_for(self.engine.sync_engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, _record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for name, value in pragmas.items():
+                    cursor.execute(f"PRAGMA {name}={value}")
+            finally:
+                cursor.close()
+
+    # Колонки text_documents, которые раньше хранили тексты и summary прямо в строке
+    LEGACY_BODY_COLUMNS = ("original_text", "summary_json")
+    MIGRATION_BATCH = 200
+
     async def init_models(self) -> None:
+        size_before = self._sqlite_file_size()
         async with self.engine.begin() as conn:
+            had_keyword_index = await conn.run_sync(
+                lambda c: inspect(c).has_table(DocumentKeyword.__tablename__)
+            )
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(self._migrate_schema)
+            migrated = await conn.run_sync(self._migrate_inline_bodies)
+            if self.supports_search:
+                await conn.exec_driver_sql(FTS_TABLE_DDL)
+                await conn.run_sync(self._backfill_search_index)
+            if not had_keyword_index:
+                await conn.run_sync(self._backfill_keyword_index)
+            await conn.run_sync(self._backfill_content_hashes)
+        if migrated:
+            if self.is_sqlite:
+                async with self.engine.connect() as conn:
+                    await conn.execution_options(isolation_level="AUTOCOMMIT")
+                    await conn.exec_driver_sql("VACUUM")
+            size_after = self._sqlite_file_size()
+            if size_before is not None and size_after is not None:
+                print(
+                    f"📦 Перенесено документов: {migrated}. Размер БД: "
+                    f"{size_before / 1e6:.2f} МБ → {size_after / 1e6:.2f} МБ"
+                )
+
+    def _sqlite_file_size(self) -> Optional[int]:
+        database = self.engine.url.database
+        if not self.is_sqlite or not database or database == ":memory:" or not os.path.exists(database):
+            return None
+        return os.path.getsize(database)
+
+    @classmethod
+    def _migrate_inline_bodies(cls, sync_conn) -> int:
+        """
+        Миграция старой схемы: переносит original_text и summary_json из
+        text_documents в сжатые document_bodies/document_summaries пачками и
+        удаляет старые колонки. Возвращает число перенесённых документов.
+        """
+        columns = {c["name"] for c in inspect(sync_conn).get_columns("text_documents")}
+        if not all(c in columns for c in cls.LEGACY_BODY_COLUMNS):
+            return 0
+
+        migrated = 0
+        last_id = 0
+        while True:
+            rows = sync_conn.execute(
+                text(
+                    "SELECT id, original_text, summary_json FROM text_documents "
+                    "WHERE id > :last_id ORDER BY id LIMIT :limit"
+                ),
+                {"last_id": last_id, "limit": cls.MIGRATION_BATCH},
+            ).all()
+            if not rows:
+                break
+            bodies, summaries = [], []
+            for doc_id, original_text, summary_json in rows:
+                summary = json.loads(summary_json) if isinstance(summary_json, str) else summary_json
+                summary_raw = json.dumps(summary, ensure_ascii=False).encode("utf-8")
+                bodies.append({
+                    "document_id": doc_id,
+                    "codec": DEFAULT_CODEC,
+                    "original_text": compress_text(original_text or ""),
+                    "raw_size": len((original_text or "").encode("utf-8")),
+                })
+                summaries.append({
+                    "document_id": doc_id,
+                    "codec": DEFAULT_CODEC,
+                    "summary": compress_json(summary),
+                    "raw_size": len(summary_raw),
+                })
+            sync_conn.execute(DocumentBody.__table__.insert(), bodies)
+            sync_conn.execute(DocumentSummary.__table__.insert(), summaries)
+            migrated += len(rows)
+            last_id = rows[-1][0]
+
+        for column in cls.LEGACY_BODY_COLUMNS:
+            sync_conn.execute(text(f"ALTER TABLE text_documents DROP COLUMN {column}"))
+        return migrated
+
+    @staticmethod
+    def _migrate_schema(sync_conn) -> None:
+        """
+        Добавляет в существующие таблицы новые nullable-колонки и индексы моделей
+        (create_all создаёт их только вместе с новой таблицей).
+        """
+        inspector = inspect(sync_conn)
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                ddl_type = column.type.compile(dialect=sync_conn.dialect)
+                sync_conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {ddl_type}"))
+            for index in table.indexes:
+                index.create(sync_conn, checkfirst=True)
+
+    @property
+    def is_sqlite(self) -> bool:
+        return self.engine.dialect.name == "sqlite"
+
+    @property
+    def supports_search(self) -> bool:
+        """Полнотекстовый поиск реализован на SQLite FTS5."""
+        return self.is_sqlite
+
+    @classmethod
+    def _backfill_search_index(cls, sync_conn) -> None:
+        """Индексирует документы, которых нет в document_fts (созданные до появления индекса)."""
+        last_id = 0
+        while True:
+            rows = sync_conn.execute(
+                text(
+                    "SELECT d.id, d.name, b.codec, b.original_text, s.codec, s.summary "
+                    "FROM text_documents d "
+                    "JOIN document_bodies b ON b.document_id = d.id "
+                    "JOIN document_summaries s ON s.document_id = d.id "
+                    "WHERE d.id > :last_id AND d.id NOT IN (SELECT rowid FROM document_fts) "
+                    "ORDER BY d.id LIMIT :limit"
+                ),
+                {"last_id": last_id, "limit": cls.MIGRATION_BATCH},
+            ).all()
+            if not rows:
+                break
+            for doc_id, name, body_codec, body, summary_codec, summary in rows:
+                cls._index_document(
+                    sync_conn, doc_id, name, decompress_text(body, body_codec), decompress_json(summary, summary_codec)
+                )
+            last_id = rows[-1][0]
+
+    @classmethod
+    def _backfill_keyword_index(cls, sync_conn) -> None:
+        """Заполняет document_keywords для документов, созданных до появления индекса."""
+        last_id = 0
+        while True:
+            rows = sync_conn.execute(
+                select(DocumentSummary.document_id, DocumentSummary.codec, DocumentSummary.summary)
+                .where(DocumentSummary.document_id > last_id)
+                .order_by(DocumentSummary.document_id)
+                .limit(cls.MIGRATION_BATCH)
+            ).all()
+            if not rows:
+                break
+            postings = []
+            for doc_id, codec, summary in rows:
+                postings.extend(keyword_postings(doc_id, decompress_json(summary, codec)))
+            if postings:
+                sync_conn.execute(DocumentKeyword.__table__.insert(), postings)
+            last_id = rows[-1][0]
+
+    @classmethod
+    def _backfill_content_hashes(cls, sync_conn) -> None:
+        """Считает content_hash документов, созданных до появления валидаторов кэша."""
+        while True:
+            rows = sync_conn.execute(
+                select(
+                    TextDocument.id, DocumentBody.codec, DocumentBody.original_text,
+                    DocumentSummary.codec, DocumentSummary.summary
+                )
+                .join(DocumentBody, DocumentBody.document_id == TextDocument.id)
+                .join(DocumentSummary, DocumentSummary.document_id == TextDocument.id)
+                .where(TextDocument.content_hash.is_(None))
+                .limit(cls.MIGRATION_BATCH)
+            ).all()
+            if not rows:
+                break
+            now = datetime.now(timezone.utc)
+            for doc_id, body_codec, body, summary_codec, summary in rows:
+                sync_conn.execute(
+                    update(TextDocument)
+                    .where(TextDocument.id == doc_id)
+                    .values(
+                        content_hash=content_hash(
+                            decompress_text(body, body_codec), decompress_json(summary, summary_codec)
+                        ),
+                        updated_at=func.coalesce(TextDocument.created_at, now),
+                    )
+                )
+
+    @staticmethod
+    def _index_document(conn, doc_id: int, name: str, original_text: str, summary_payload: dict):
+        summaries, keywords = fts_fields(summary_payload)
+        return conn.execute(
+            text(
+                "INSERT INTO document_fts (rowid, name, original_text, summaries, keywords) "
+                "VALUES (:id, :name, :original_text, :summaries, :keywords)"
+            ),
+            {"id": doc_id, "name": name, "original_text": original_text, "summaries": summaries, "keywords": keywords},
+        )
 
     async def add_document(
         self,
         original_text: str,
         summary_result: SummaryResult,
         file_name: str,
-        name: str
+        name: str,
+        pending_stages: Optional[List[str]] = None,
+        corpus_terms: Optional[Tuple[str, List[str]]] = None,
     ) -> int:
+        """
+        :param corpus_terms: (язык, термины) документа для корпусной статистики —
+                             учитываются в той же транзакции, что и сам документ
+        """
+        summary_payload = summary_result.dict()
         async with self.async_session() as session:
             async with session.begin():
                 doc = TextDocument(
-                    original_text=original_text,
-                    summary_json=summary_result.dict(),
                     file_name=file_name,
-                    name=name
+                    name=name,
+                    pending_stages=",".join(pending_stages or []) or None,
+                    content_hash=content_hash(original_text, summary_payload),
+                    updated_at=datetime.now(timezone.utc),
                 )
                 session.add(doc)
-            await session.refresh(doc)
+                await session.flush()
+                session.add(DocumentBody(
+                    document_id=doc.id,
+                    codec=DEFAULT_CODEC,
+                    original_text=compress_text(original_text),
+                    raw_size=len(original_text.encode("utf-8"))
+                ))
+                session.add(DocumentSummary(
+                    document_id=doc.id,
+                    codec=DEFAULT_CODEC,
+                    summary=compress_json(summary_payload),
+                    raw_size=len(json.dumps(summary_payload, ensure_ascii=False, default=str).encode("utf-8"))
+                ))
+                if self.supports_search:
+                    await self._index_document(session, doc.id, name, original_text, summary_payload)
+                postings = keyword_postings(doc.id, summary_payload)
+                if postings:
+                    await session.execute(DocumentKeyword.__table__.insert(), postings)
+                if corpus_terms is not None:
+                    await self._add_document_terms(session, doc.id, *corpus_terms)
             return doc.id
 
+    async def update_document_summary(
+        self, doc_id: int, summary_result: SummaryResult, pending_stages: Optional[List[str]] = None
+    ) -> bool:
+        """Перезаписывает резюме документа (после повтора этапов) и обновляет индексы поиска и ключевых слов."""
+        summary_payload = summary_result.dict()
+        async with self.async_session() as session:
+            async with session.begin():
+                doc = await session.get(TextDocument, doc_id)
+                if doc is None:
+                    return False
+                doc.pending_stages = ",".join(pending_stages or []) or None
+                body = await session.get(DocumentBody, doc_id)
+                new_hash = content_hash(decompress_text(body.original_text, body.codec), summary_payload)
+                if new_hash != doc.content_hash:
+                    doc.content_hash = new_hash
+                    doc.updated_at = datetime.now(timezone.utc)
+                await session.execute(
+                    update(DocumentSummary)
+                    .where(DocumentSummary.document_id == doc_id)
+                    .values(
+                        codec=DEFAULT_CODEC,
+                        summary=compress_json(summary_payload),
+                        raw_size=len(json.dumps(summary_payload, ensure_ascii=False, default=str).encode("utf-8")),
+                    )
+                )
+                if self.supports_search:
+                    summaries, keywords = fts_fields(summary_payload)
+                    await session.execute(
+                        text("UPDATE document_fts SET summaries = :summaries, keywords = :keywords WHERE rowid = :id"),
+                        {"id": doc_id, "summaries": summaries, "keywords": keywords},
+                    )
+                await session.execute(delete(DocumentKeyword).where(DocumentKeyword.document_id == doc_id))
+                postings = keyword_postings(doc_id, summary_payload)
+                if postings:
+                    await session.execute(DocumentKeyword.__table__.insert(), postings)
+        return True
+
+    async def list_documents_with_pending_stages(self, limit: int = 10) -> List[int]:
+        """
+        Документы с этапами, ожидающими повтора: сначала ни разу не повторявшиеся,
+        затем по давности последней попытки — постоянно падающие документы не
+        занимают все места в выборке.
+        """
+        async with self.async_session() as session:
+            result = await session.execute(
+                select(TextDocument.id)
+                .where(TextDocument.pending_stages.is_not(None))
+                .order_by(
+                    TextDocument.stages_retried_at.is_not(None),
+                    TextDocument.stages_retried_at,
+                    TextDocument.id,
+                )
+                .limit(limit)
+            )
+            return list(result.scalars())
+
+    async def mark_stages_retried(self, doc_id: int) -> None:
+        """Запоминает время попытки повтора этапов (до самой попытки — на случай её падения)."""
+        async with self.async_session() as session:
+            async with session.begin():
+                await session.execute(
+                    update(TextDocument)
+                    .where(TextDocument.id == doc_id)
+                    .values(stages_retried_at=datetime.now(timezone.utc))
+                )
+
+    async def get_document_validators(self, doc_id: int) -> Optional[DocumentValidatorsDTO]:
+        """ETag/Last-Modified документа одной выборкой метаданных (без тела и резюме)."""
+        async with self.async_session() as session:
+            row = (await session.execute(
+                select(TextDocument.id, TextDocument.content_hash, TextDocument.updated_at, TextDocument.pending_stages)
+                .where(TextDocument.id == doc_id)
+            )).first()
+        if row is None or row.content_hash is None:
+            return None
+        return DocumentValidatorsDTO(
+            id=row.id, content_hash=row.content_hash, updated_at=row.updated_at, pending=row.pending_stages is not None
+        )
+
     async def get_document(self, doc_id: int) -> Optional[TextDocumentDTO]:
         async with self.async_session() as session:
             doc = await session.get(TextDocument, doc_id)
             if doc is None:
                 return None
-            summary_obj = SummaryResult(**doc.summary_json)
+            body = await session.get(DocumentBody, doc_id)
+            summary = await session.get(DocumentSummary, doc_id)
+            if body is None or summary is None:
+                return None
+            summary_obj = SummaryResult(**decompress_json(summary.summary, summary.codec))
             return TextDocumentDTO(
                 id=doc.id,
                 file_name=doc.file_name,
                 name=doc.name,
-                original_text=doc.original_text,
+                original_text=decompress_text(body.original_text, body.codec),
                 summary=summary_obj,
                 created_at=doc.created_at
             )
 
-    async def list_document_info(self) -> List[DocumentInfoDTO]:
-        async with self.async_session() as session:
-            result = await session.execute(select(TextDocument).order_by(TextDocument.created_at.desc()))
-            docs = result.scalars().all()
-            return [
-                DocumentInfoDTO(
-                    id=d.id,
-                    file_name=d.file_name,
-                    name=d.name,
-                    created_at=d.created_at
-                ) for d in docs
-            ]
+    def _created_at_key(self):
+        """
+        Выражение created_at для курсора. В SQLite дата хранится строкой, и
+        server_default (CURRENT_TIMESTAMP) пишет её без микросекунд, поэтому
+        сравниваем сырые строки — иначе равенство в курсоре не срабатывает.
+        Выражение не меняет SQL, так что индекс используется.
+        """
+        if self.is_sqlite:
+            return type_coerce(TextDocument.created_at, String)
+        return TextDocument.created_at
+
+    @staticmethod
+    def encode_cursor(created_at_key, doc_id: int) -> str:
+        if isinstance(created_at_key, datetime):
+            created_at_key = created_at_key.isoformat()
+        raw = json.dumps([created_at_key, doc_id]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    def decode_cursor(self, cursor: str) -> Tuple[object, int]:
+        try:
+            created_at_key, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            if not self.is_sqlite and created_at_key is not None:
+                created_at_key = datetime.fromisoformat(created_at_key)
+            return created_at_key, int(doc_id)
+        except Exception as e:
+            raise ValueError("Некорректный курсор пагинации.") from e
+
+    async def list_document_info(self, limit: int = 50, cursor: Optional[str] = None) -> DocumentPageDTO:
+        """
+        Страница метаданных документов (без текста и summary), от новых к старым.
+        Keyset-пагинация по (created_at, id) опирается на индекс ix_text_documents_created_at_id.
+        """
+        created_key = self._created_at_key()
+        stmt = select(
+            TextDocument.id,
+            TextDocument.file_name,
+            TextDocument.name,
+            TextDocument.created_at,
+            created_key.label("created_key")
+        )
+        if cursor:
+            cursor_created, cursor_id = self.decode_cursor(cursor)
+            stmt = stmt.where(or_(
+                created_key < cursor_created,
+                and_(created_key == cursor_created, TextDocument.id < cursor_id)
+            ))
+        stmt = stmt.order_by(created_key.desc(), TextDocument.id.desc()).limit(limit + 1)
+
+        async with self.async_session() as session:
+            rows = (await session.execute(stmt)).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        items = [
+            DocumentInfoDTO(id=r.id, file_name=r.file_name, name=r.name, created_at=r.created_at)
+            for r in rows
+        ]
+        next_cursor = self.encode_cursor(rows[-1].created_key, rows[-1].id) if has_more else None
+        return DocumentPageDTO(items=items, next_cursor=next_cursor)
 
     async def delete_document(self, doc_id: int) -> bool:
         async with self.async_session() as session:
@@ -68,13 +574,378 @@ class TextRepositoryAsync:
                 doc = await session.get(TextDocument, doc_id)
                 if doc is None:
                     return False
+                await session.execute(delete(DocumentBody).where(DocumentBody.document_id == doc_id))
+                await session.execute(delete(DocumentSummary).where(DocumentSummary.document_id == doc_id))
+                await session.execute(delete(DocumentKeyword).where(DocumentKeyword.document_id == doc_id))
+                await self._remove_document_terms(session, doc_id)
+                if self.supports_search:
+                    await session.execute(text("DELETE FROM document_fts WHERE rowid = :id"), {"id": doc_id})
                 await session.delete(doc)
         return True
 
+    async def search_documents(self, query: str, limit: int = 20, offset: int = 0) -> SearchPageDTO:
+        """Полнотекстовый поиск по FTS5: BM25-ранжирование, фрагменты с <mark>, пагинация limit/offset."""
+        match = fts_query(query)
+        if not match:
+            return SearchPageDTO(items=[])
+        stmt = text(
+            f"SELECT d.id, d.file_name, d.name, d.created_at, "
+            f"bm25(document_fts, {FTS_BM25_WEIGHTS}) AS rank, "
+            f"snippet(document_fts, -1, '<mark>', '</mark>', '…', 16) AS snippet "
+            f"FROM document_fts JOIN text_documents d ON d.id = document_fts.rowid "
+            f"WHERE document_fts MATCH :match "
+            f"ORDER BY rank LIMIT :limit OFFSET :offset"
+        ).columns(created_at=TextDocument.__table__.c.created_at.type)
+        async with self.async_session() as session:
+            rows = (await session.execute(stmt, {"match": match, "limit": limit + 1, "offset": offset})).all()
+
+        items = [
+            SearchHitDTO(
+                id=r.id, file_name=r.file_name, name=r.name, created_at=r.created_at,
+                rank=r.rank, snippet=r.snippet or ""
+            )
+            for r in rows[:limit]
+        ]
+        return SearchPageDTO(items=items, next_offset=offset + limit if len(rows) > limit else None)
+
+    @staticmethod
+    def _documents_with_keywords(keywords: List[str], lang: Optional[str]):
+        """Подзапрос id документов, содержащих все заданные ключевые слова."""
+        stmt = select(DocumentKeyword.document_id).where(DocumentKeyword.keyword.in_(keywords))
+        if lang:
+            stmt = stmt.where(DocumentKeyword.lang == lang)
+        return (
+            stmt.group_by(DocumentKeyword.document_id)
+            .having(func.count(func.distinct(DocumentKeyword.keyword)) == len(keywords))
+        )
+
+    async def browse_keywords(
+        self,
+        selected: Optional[List[str]] = None,
+        lang: Optional[str] = None,
+        prefix: Optional[str] = None,
+        limit: int = 50,
+    ) -> KeywordBrowseDTO:
+        """
+        Фасеты ключевых слов с числом документов. Если выбраны ключевые слова,
+        фасеты и документы ограничиваются документами, содержащими их все.
+        """
+        selected = list(dict.fromkeys(k for k in map(normalize_keyword, selected or []) if k))
+        doc_count = func.count(func.distinct(DocumentKeyword.document_id)).label("documents")
+        facet_stmt = select(DocumentKeyword.keyword, DocumentKeyword.lang, doc_count)
+        if lang:
+            facet_stmt = facet_stmt.where(DocumentKeyword.lang == lang)
+        if prefix:
+            facet_stmt = facet_stmt.where(DocumentKeyword.keyword.startswith(normalize_keyword(prefix), autoescape=True))
+        matching = None
+        if selected:
+            matching = self._documents_with_keywords(selected, lang)
+            facet_stmt = facet_stmt.where(
+                DocumentKeyword.document_id.in_(matching),
+                DocumentKeyword.keyword.not_in(selected),
+            )
+        facet_stmt = (
+            facet_stmt.group_by(DocumentKeyword.keyword, DocumentKeyword.lang)
+            .order_by(doc_count.desc(), DocumentKeyword.keyword)
+            .limit(limit)
+        )
+
+        async with self.async_session() as session:
+            facets = [
+                KeywordFacetDTO(keyword=r.keyword, lang=r.lang, documents=r.documents)
+                for r in (await session.execute(facet_stmt)).all()
+            ]
+            documents: List[DocumentInfoDTO] = []
+            if matching is not None:
+                doc_stmt = (
+                    select(TextDocument.id, TextDocument.file_name, TextDocument.name, TextDocument.created_at)
+                    .where(TextDocument.id.in_(matching))
+                    .order_by(TextDocument.created_at.desc(), TextDocument.id.desc())
+                    .limit(limit)
+                )
+                documents = [
+                    DocumentInfoDTO(id=r.id, file_name=r.file_name, name=r.name, created_at=r.created_at)
+                    for r in (await session.execute(doc_stmt)).all()
+                ]
+        return KeywordBrowseDTO(selected=selected, facets=facets, documents=documents)
+
+    async def related_documents(self, doc_id: int, limit: int = 10) -> Optional[List[RelatedDocumentDTO]]:
+        """
+        Документы, ранжированные по взвешенному пересечению ключевых слов с doc_id:
+        сумма произведений весов общих (ключевое слово, язык). None — документа нет.
+        """
+        mine = DocumentKeyword.__table__.alias("mine")
+        other = DocumentKeyword.__table__.alias("other")
+        score = func.sum(mine.c.weight * other.c.weight).label("score")
+        shared = func.count().label("shared_keywords")
+        ranked = (
+            select(other.c.document_id, score, shared)
+            .join(mine, and_(mine.c.keyword == other.c.keyword, mine.c.lang == other.c.lang))
+            .where(mine.c.document_id == doc_id, other.c.document_id != doc_id)
+            .group_by(other.c.document_id)
+            .subquery()
+        )
+        stmt = (
+            select(
+                TextDocument.id, TextDocument.file_name, TextDocument.name, TextDocument.created_at,
+                ranked.c.score, ranked.c.shared_keywords
+            )
+            .join(ranked, ranked.c.document_id == TextDocument.id)
+            .order_by(ranked.c.score.desc(), TextDocument.id.desc())
+            .limit(limit)
+        )
+        async with self.async_session() as session:
+            exists = await session.scalar(select(TextDocument.id).where(TextDocument.id == doc_id))
+            if exists is None:
+                return None
+            rows = (await session.execute(stmt)).all()
+        return [
+            RelatedDocumentDTO(
+                id=r.id, file_name=r.file_name, name=r.name, created_at=r.created_at,
+                score=r.score, shared_keywords=r.shared_keywords
+            )
+            for r in rows
+        ]
+
     async def find_document_by_name(self, name: str) -> Optional[DocumentInfoDTO]:
         async with self.async_session() as session:
-            result = await session.execute(select(TextDocument).where(TextDocument.name == name))
-            doc = result.scalars().first()
+            result = await session.execute(
+                select(TextDocument.id, TextDocument.file_name, TextDocument.name, TextDocument.created_at)
+                .where(TextDocument.name == name)
+            )
+            doc = result.first()
             if doc:
                 return DocumentInfoDTO(id=doc.id, file_name=doc.file_name, name=doc.name, created_at=doc.created_at)
-            return None
\ No newline at end of file
+            return None
+
+    # ----------------------------
+    # Задачи обработки загрузок
+    # ----------------------------
+    @staticmethod
+    def _job_to_dto(job: ProcessingJob) -> JobDTO:
+        return JobDTO(
+            id=job.id,
+            name=job.name,
+            file_name=job.file_name,
+            file_sha256=job.file_sha256,
+            status=job.status,
+            stage=job.stage,
+            progress=job.progress or 0.0,
+            document_id=job.document_id,
+            error=job.error,
+            created_at=job.created_at,
+            updated_at=job.updated_at
+        )
+
+    async def add_job(self, name: str, file_name: str, file_path: str, file_sha256: Optional[str] = None) -> int:
+        async with self.async_session() as session:
+            async with session.begin():
+                job = ProcessingJob(
+                    name=name,
+                    file_name=file_name,
+                    file_path=file_path,
+                    file_sha256=file_sha256,
+                    status="queued",
+                    progress=0.0
+                )
+                session.add(job)
+            await session.refresh(job)
+            return job.id
+
+    async def get_job(self, job_id: int) -> Optional[JobDTO]:
+        async with self.async_session() as session:
+            job = await session.get(ProcessingJob, job_id)
+            if job is None:
+                return None
+            return self._job_to_dto(job)
+
+    async def get_job_file_path(self, job_id: int) -> Optional[str]:
+        async with self.async_session() as session:
+            result = await session.execute(select(ProcessingJob.file_path).where(ProcessingJob.id == job_id))
+            return result.scalars().first()
+
+    async def update_job(self, job_id: int, **fields) -> None:
+        async with self.async_session() as session:
+            async with session.begin():
+                await session.execute(update(ProcessingJob).where(ProcessingJob.id == job_id).values(**fields))
+
+    async def find_active_job_by_name(self, name: str) -> Optional[JobDTO]:
+        async with self.async_session() as session:
+            result = await session.execute(
+                select(ProcessingJob).where(
+                    ProcessingJob.name == name,
+                    ProcessingJob.status.in_(("queued", "running"))
+                )
+            )
+            job = result.scalars().first()
+            return self._job_to_dto(job) if job else None
+
+    async def requeue_unfinished_jobs(self) -> List[int]:
+        """Возвращает в очередь задачи, прерванные остановкой процесса, и отдаёт их id по порядку."""
+        async with self.async_session() as session:
+            async with session.begin():
+                await session.execute(
+                    update(ProcessingJob)
+                    .where(ProcessingJob.status == "running")
+                    .values(status="queued")
+                )
+                result = await session.execute(
+                    select(ProcessingJob.id)
+                    .where(ProcessingJob.status == "queued")
+                    .order_by(ProcessingJob.id)
+                )
+                return list(result.scalars().all())
+
+    # ----------------------------
+    # Кэш результатов этапов
+    # ----------------------------
+    async def get_cache_entry(self, text_hash: str, stage: str, version: str) -> Optional[dict]:
+        async with self.async_session() as session:
+            async with session.begin():
+                result = await session.execute(
+                    select(SummaryCacheEntry).where(
+                        SummaryCacheEntry.text_hash == text_hash,
+                        SummaryCacheEntry.stage == stage,
+                        SummaryCacheEntry.version == version
+                    )
+                )
+                entry = result.scalars().first()
+                if entry is None:
+                    return None
+                entry.hits = (entry.hits or 0) + 1
+                entry.last_used_at = func.now()
+                return entry.payload
+
+    async def put_cache_entry(self, text_hash: str, stage: str, version: str, payload: dict, size_bytes: int) -> None:
+        async with self.async_session() as session:
+            async with session.begin():
+                result = await session.execute(
+                    select(SummaryCacheEntry).where(
+                        SummaryCacheEntry.text_hash == text_hash,
+                        SummaryCacheEntry.stage == stage,
+                        SummaryCacheEntry.version == version
+                    )
+                )
+                entry = result.scalars().first()
+                if entry is None:
+                    session.add(SummaryCacheEntry(
+                        text_hash=text_hash,
+                        stage=stage,
+                        version=version,
+                        payload=payload,
+                        size_bytes=size_bytes,
+                        hits=0
+                    ))
+                else:
+                    entry.payload = payload
+                    entry.size_bytes = size_bytes
+                    entry.last_used_at = func.now()
+
+    async def evict_cache(self, max_bytes: int) -> int:
+        """Удаляет давно неиспользуемые записи, пока суммарный размер кэша больше max_bytes."""
+        async with self.async_session() as session:
+            async with session.begin():
+                total = (await session.execute(
+                    select(func.coalesce(func.sum(SummaryCacheEntry.size_bytes), 0))
+                )).scalar_one()
+                if total <= max_bytes:
+                    return 0
+                result = await session.execute(
+                    select(SummaryCacheEntry.id, SummaryCacheEntry.size_bytes)
+                    .order_by(SummaryCacheEntry.last_used_at, SummaryCacheEntry.id)
+                )
+                victims = []
+                for entry_id, size in result.all():
+                    if total <= max_bytes:
+                        break
+                    victims.append(entry_id)
+                    total -= size
+                if victims:
+                    await session.execute(delete(SummaryCacheEntry).where(SummaryCacheEntry.id.in_(victims)))
+                return len(victims)
+
+    # ----------------------------
+    # Корпусная статистика (документная частота терминов)
+    # ----------------------------
+    def _insert(self, table):
+        """INSERT с поддержкой ON CONFLICT для текущего диалекта."""
+        dialect = postgresql if self.engine.dialect.name == "postgresql" else sqlite
+        return dialect.insert(table)
+
+    async def add_document_terms(self, doc_id: int, lang: str, terms: List[str]) -> None:
+        """Учитывает термины уже сохранённого документа (досчёт статистики для старых документов)."""
+        async with self.async_session() as session:
+            async with session.begin():
+                await self._add_document_terms(session, doc_id, lang, terms)
+
+    async def _add_document_terms(self, session: AsyncSession, doc_id: int, lang: str, terms: List[str]) -> None:
+        """
+        Учитывает множество терминов документа в corpus_terms: df += 1 для каждого
+        термина и N += 1 для языка. Стоимость — O(число терминов документа).
+        """
+        terms = sorted(set(terms))
+        session.add(DocumentTermSet(
+            document_id=doc_id, lang=lang, codec=DEFAULT_CODEC, terms=compress_text("\n".join(terms))
+        ))
+        for i in range(0, len(terms), TERM_BATCH):
+            stmt = self._insert(CorpusTerm.__table__).values(
+                [{"lang": lang, "term": term, "df": 1} for term in terms[i:i + TERM_BATCH]]
+            )
+            await session.execute(stmt.on_conflict_do_update(
+                index_elements=["lang", "term"], set_={"df": CorpusTerm.__table__.c.df + 1}
+            ))
+        stmt = self._insert(CorpusDocCount.__table__).values(lang=lang, n_docs=1)
+        await session.execute(stmt.on_conflict_do_update(
+            index_elements=["lang"], set_={"n_docs": CorpusDocCount.__table__.c.n_docs + 1}
+        ))
+
+    async def get_document_terms(self, doc_id: int) -> Optional[Tuple[str, List[str]]]:
+        async with self.async_session() as session:
+            term_set = await session.get(DocumentTermSet, doc_id)
+            if term_set is None:
+                return None
+            terms = decompress_text(term_set.terms, term_set.codec)
+            return term_set.lang, terms.split("\n") if terms else []
+
+    async def _remove_document_terms(self, session: AsyncSession, doc_id: int) -> None:
+        """Вычитает термины документа из corpus_terms (в транзакции удаления документа)."""
+        term_set = await session.get(DocumentTermSet, doc_id)
+        if term_set is None:
+            return
+        raw = decompress_text(term_set.terms, term_set.codec)
+        terms = raw.split("\n") if raw else []
+        for i in range(0, len(terms), TERM_BATCH):
+            batch = terms[i:i + TERM_BATCH]
+            in_batch = and_(CorpusTerm.lang == term_set.lang, CorpusTerm.term.in_(batch))
+            await session.execute(update(CorpusTerm).where(in_batch).values(df=CorpusTerm.df - 1))
+            await session.execute(delete(CorpusTerm).where(in_batch, CorpusTerm.df <= 0))
+        await session.execute(
+            update(CorpusDocCount).where(CorpusDocCount.lang == term_set.lang).values(n_docs=CorpusDocCount.n_docs - 1)
+        )
+        await session.delete(term_set)
+
+    async def load_corpus_stats(self) -> Dict[str, Tuple[int, List[str], List[int]]]:
+        """{язык: (N, термины, df)} для загрузки в память."""
+        async with self.async_session() as session:
+            counts = dict((await session.execute(select(CorpusDocCount.lang, CorpusDocCount.n_docs))).all())
+            stats: Dict[str, Tuple[int, List[str], List[int]]] = {
+                lang: (n_docs, [], []) for lang, n_docs in counts.items()
+            }
+            result = await session.stream(select(CorpusTerm.lang, CorpusTerm.term, CorpusTerm.df))
+            async for lang, term, df in result:
+                _, terms, dfs = stats.setdefault(lang, (0, [], []))
+                terms.append(term)
+                dfs.append(df)
+        return stats
+
+    async def list_documents_without_terms(self, limit: int = 100) -> List[int]:
+        async with self.async_session() as session:
+            result = await session.execute(
+                select(TextDocument.id)
+                .outerjoin(DocumentTermSet, DocumentTermSet.document_id == TextDocument.id)
+                .where(DocumentTermSet.document_id.is_(None))
+                .order_by(TextDocument.id)
+                .limit(limit)
+            )
+            return list(result.scalars())
+
@@ -0,0 +1,95 @@
+# project_root/services/chunking.py
+import asyncio
+import re
+from typing import Awaitable, Callable, List, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+SENTENCE_END_RE = re.compile(r"(?<=[.!?…])\s+")
+
+
+def _split_long_sentence(sentence: str, max_chars: int) -> List[str]:
+    """Режет слишком длинное предложение по пробелам (и слишком длинные слова — по символам)."""
+    pieces: List[str] = []
+    piece = ""
+    for word in sentence.split():
+        while len(word) > max_chars:
+            if piece:
+                pieces.append(piece)
+                piece = ""
+            pieces.append(word[:max_chars])
+            word = word[max_chars:]
+        if piece and len(piece) + 1 + len(word) > max_chars:
+            pieces.append(piece)
+            piece = word
+        else:
+            piece = f"{piece} {word}" if piece else word
+    if piece:
+        pieces.append(piece)
+    return pieces
+
+
+def split_into_chunks(text: str, max_chars: int) -> List[str]:
+    """
+    Делит текст на фрагменты не длиннее max_chars символов по границам предложений.
+    Предложение длиннее бюджета режется по пробелам.
+    """
+    text = (text or "").strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_len = 0
+    for sentence in SENTENCE_END_RE.split(text):
+        pieces = _split_long_sentence(sentence, max_chars) if len(sentence) > max_chars else [sentence]
+        for piece in pieces:
+            if current and current_len + 1 + len(piece) > max_chars:
+                chunks.append(" ".join(current))
+                current, current_len = [], 0
+            current_len += len(piece) + (1 if current else 0)
+            current.append(piece)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def group_by_budget(parts: Sequence[str], max_chars: int) -> List[List[int]]:
+    """Группирует части (по индексам) так, чтобы суммарная длина группы не превышала бюджет."""
+    groups: List[List[int]] = []
+    current: List[int] = []
+    current_len = 0
+    for i, part in enumerate(parts):
+        if current and current_len + len(part) > max_chars:
+            groups.append(current)
+            current, current_len = [], 0
+        current.append(i)
+        current_len += len(part)
+    if current:
+        groups.append(current)
+    return groups
+
+
+async def bounded_gather(items: Sequence[T], fn: Callable[[T], Awaitable[R]], limit: int) -> List[R]:
+    """
+    Выполняет fn для всех элементов конкурентно, но не более limit одновременно.
+
+    При первой ошибке (или отмене) остальные задачи отменяются и дожидаются
+    завершения: незавершённые запросы к LLM не должны занимать слоты
+    OllamaClient после того, как результат уже никому не нужен.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(item: T) -> R:
+        async with semaphore:
+            return await fn(item)
+
+    tasks = [asyncio.create_task(run(item)) for item in items]
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
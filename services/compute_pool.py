@@ -0,0 +1,77 @@
+# project_root/services/compute_pool.py
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+
+def _warm_worker(models_dir: Optional[str]) -> None:
+    """
+    Инициализатор процесса пула: заранее загружает YAKE, данные NLTK и стоп-слова
+    (из того же локального каталога моделей, что и ModelRegistry), чтобы первая
+    задача в воркере не платила за импорт и чтение словарей.
+    """
+    from nltk.corpus import stopwords
+    from nltk.tokenize import sent_tokenize
+    from services.model_registry import configure_nltk_path
+    from services.extraction_keyword.clustering import get_keyword_extractor
+    from services.extraction_keyword.config import YAKE_TOP_K, load_stop_words
+
+    if models_dir:
+        configure_nltk_path(Path(models_dir))
+    load_stop_words()
+    for lang in ("ru", "en"):
+        get_keyword_extractor(lang, YAKE_TOP_K)
+    for language in ("russian", "english"):
+        try:
+            stopwords.words(language)
+            sent_tokenize("Warm up. Прогрев.", language=language)
+        except LookupError:
+            pass
+
+
+def _noop() -> None:
+    return None
+
+
+class ComputePool:
+    """
+    Пул процессов для CPU-нагруженных этапов (YAKE, кластеризация, классическое резюме).
+
+    Воркеры создаются один раз при старте и прогреваются. Если workers=0, задачи
+    выполняются в потоке через asyncio.to_thread (удобно для отладки).
+    """
+    def __init__(self, workers: Optional[int] = None, models_dir: Optional[Path] = None):
+        self.workers = (os.cpu_count() or 1) if workers is None else max(0, workers)
+        self.models_dir = models_dir
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        if self.workers == 0 or self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker,
+            initargs=(str(self.models_dir) if self.models_dir else None,),
+        )
+        # ProcessPoolExecutor поднимает процессы лениво — запускаем все сразу,
+        # чтобы прогрев произошёл при старте приложения, а не на первой загрузке.
+        for future in [self._executor.submit(_noop) for _ in range(self.workers)]:
+            future.result()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Выполняет fn(*args, **kwargs) в пуле процессов (fn и аргументы должны сериализоваться)."""
+        call = partial(fn, *args, **kwargs)
+        if self._executor is None:
+            return await asyncio.to_thread(call)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, call)
@@ -0,0 +1,123 @@
+# project_root/services/corpus_stats.py
+"""
+Корпусная статистика для IDF-взвешивания.
+
+Документная частота (df) терминов хранится в БД (corpus_terms) и обновляется
+инкрементально при создании и удалении документа — O(число терминов документа),
+без повторного прохода по корпусу. В памяти статистика языка — словарь
+термин → индекс и компактный массив df (int32).
+"""
+import asyncio
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from repository import TextRepositoryAsync
+from services.extraction_text.scoring import IdfTable, document_terms
+from services.language import detect_language
+
+
+class _LanguageStats:
+    """df терминов одного языка: индекс термина и массив частот с удвоением ёмкости."""
+    def __init__(self, n_docs: int = 0, terms: Iterable[str] = (), dfs: Iterable[int] = ()):
+        self.index: Dict[str, int] = {term: i for i, term in enumerate(terms)}
+        self.df = np.fromiter(dfs, dtype=np.int32, count=len(self.index))
+        self.size = len(self.index)
+        self.n_docs = n_docs
+
+    def _ensure_capacity(self, extra: int) -> None:
+        needed = self.size + extra
+        if needed > len(self.df):
+            grown = np.zeros(max(needed, 2 * len(self.df), 1024), dtype=np.int32)
+            grown[:self.size] = self.df[:self.size]
+            self.df = grown
+
+    def apply(self, terms: Iterable[str], delta: int) -> None:
+        terms = list(terms)
+        if delta > 0:
+            new_terms = [t for t in terms if t not in self.index]
+            self._ensure_capacity(len(new_terms))
+            for term in new_terms:
+                self.index[term] = self.size
+                self.size += 1
+        ids = np.fromiter((self.index[t] for t in terms if t in self.index), dtype=np.int64)
+        # Освободившиеся индексы не переиспользуются: df = 0 равносильно отсутствию термина
+        self.df[ids] = np.maximum(self.df[ids] + delta, 0)
+        self.n_docs = max(self.n_docs + delta, 0)
+
+    def idf_table(self, terms: Iterable[str]) -> IdfTable:
+        terms = list(terms)
+        ids = np.fromiter((self.index.get(t, -1) for t in terms), dtype=np.int64, count=len(terms))
+        df = np.zeros(len(terms), dtype=np.int32)
+        known = ids >= 0
+        df[known] = self.df[ids[known]]
+        idf = np.log((1.0 + self.n_docs) / (1.0 + df)) + 1.0
+        return IdfTable(
+            weights=dict(zip(terms, idf.tolist())),
+            default=math.log(1.0 + self.n_docs) + 1.0,
+        )
+
+
+class CorpusStats:
+    """
+    Документные частоты терминов корпуса по языкам.
+
+    load() читает таблицу из БД один раз при старте и досчитывает документы,
+    загруженные до появления статистики. Новый документ учитывается в БД в
+    транзакции repo.add_document(corpus_terms=...), после неё — register();
+    discard() вызывается после delete_document.
+    """
+    def __init__(self, repo: TextRepositoryAsync):
+        self.repo = repo
+        self._langs: Dict[str, _LanguageStats] = {}
+
+    def _stats(self, lang: str) -> _LanguageStats:
+        return self._langs.setdefault(lang, _LanguageStats())
+
+    async def load(self, backfill_batch: int = 100) -> "CorpusStats":
+        stats = await self.repo.load_corpus_stats()
+        self._langs = {
+            lang: _LanguageStats(n_docs, terms, dfs) for lang, (n_docs, terms, dfs) in stats.items()
+        }
+        backfilled = 0
+        while doc_ids := await self.repo.list_documents_without_terms(limit=backfill_batch):
+            for doc_id in doc_ids:
+                doc = await self.repo.get_document(doc_id)
+                await self.add_document(doc_id, doc.original_text if doc else "")
+                backfilled += 1
+        if backfilled:
+            print(f"📚 Корпусная статистика досчитана для {backfilled} документов")
+        return self
+
+    @staticmethod
+    async def terms_for(text: str) -> List[str]:
+        """Термины текста для repo.add_document(corpus_terms=...) — вне event loop."""
+        return sorted(await asyncio.to_thread(document_terms, text))
+
+    async def add_document(self, doc_id: int, text: str, lang: Optional[str] = None) -> None:
+        """Учитывает уже сохранённый документ (досчёт в load())."""
+        terms = await self.terms_for(text)
+        lang = lang or detect_language(text)
+        await self.repo.add_document_terms(doc_id, lang, terms)
+        self.register(lang, terms)
+
+    def register(self, lang: str, terms: List[str]) -> None:
+        """Добавляет термины документа в копию в памяти (после фиксации транзакции в БД)."""
+        self._stats(lang).apply(terms, +1)
+
+    async def terms_of(self, doc_id: int) -> Optional[Tuple[str, List[str]]]:
+        """Учтённые термины документа (читать до удаления документа)."""
+        return await self.repo.get_document_terms(doc_id)
+
+    def discard(self, lang: str, terms: List[str]) -> None:
+        """Вычитает термины удалённого документа из копии в памяти (БД обновляет delete_document)."""
+        if lang in self._langs:
+            self._langs[lang].apply(terms, -1)
+
+    def n_docs(self, lang: str) -> int:
+        stats = self._langs.get(lang)
+        return stats.n_docs if stats else 0
+
+    def idf_table(self, lang: str, terms: Iterable[str]) -> IdfTable:
+        return self._stats(lang).idf_table(terms)
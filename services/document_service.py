@@ -1,17 +1,83 @@
 # project_root/services/document_service.py
-from typing import List, Optional
+import asyncio
+from pathlib import Path
+from typing import List, Optional, Set
 from repository import TextRepositoryAsync
-from .summary_generation_service import SummaryGenerationService
-from models import TextDocumentDTO, DocumentInfoDTO
-from .report_service import ReportService
+from .summary_generation_service import SummaryGenerationService, StageCallback
+from models import TextDocumentDTO, DocumentInfoDTO, DocumentValidatorsDTO, DocumentPageDTO, SearchPageDTO, KeywordBrowseDTO, RelatedDocumentDTO
+from .report_cache import ReportCache
+from .corpus_stats import CorpusStats
+from .language import detect_language
+
+
+class SearchUnavailableError(RuntimeError):
+    """Полнотекстовый поиск не поддерживается текущей БД (есть только для SQLite FTS5)."""
+
+
 class DocumentService:
-    def __init__(self, repo: TextRepositoryAsync, summary_service: SummaryGenerationService):
+    def __init__(
+        self,
+        repo: TextRepositoryAsync,
+        summary_service: SummaryGenerationService,
+        report_cache: ReportCache,
+        corpus: Optional[CorpusStats] = None,
+        max_stage_attempts: int = 5,
+        eager_reports: bool = False,
+    ):
         self.repo = repo
         self.summary_service = summary_service
+        self.report_cache = report_cache
+        self.corpus = corpus
+        self.max_stage_attempts = max_stage_attempts
+        self.eager_reports = eager_reports
+        self._background: Set[asyncio.Task] = set()
 
-    async def create_document(self, file_name: str, text: str, name: str) -> int:
-        summary = await self.summary_service.generate_full_summary(text)
-        return await self.repo.add_document(text, summary, file_name, name)
+    async def create_document(
+        self,
+        file_name: str,
+        text: str,
+        name: str,
+        on_stage: Optional[StageCallback] = None,
+        lang: Optional[str] = None,
+    ) -> int:
+        # Язык определяется один раз: для этапов резюме и для корпусной статистики
+        lang = lang or detect_language(text)
+        summary, terms = await self.summary_service.summarize_document(text, on_stage=on_stage, lang=lang)
+        corpus_terms = None
+        if self.corpus is not None:
+            # Термины приходят из общей предобработки этапов извлечения; текст
+            # токенизируется заново, только если она не выполнялась (этапы из кэша)
+            corpus_terms = (lang, terms if terms is not None else await self.corpus.terms_for(text))
+        doc_id = await self.repo.add_document(
+            text, summary, file_name, name,
+            pending_stages=summary.pending_stages(self.max_stage_attempts),
+            corpus_terms=corpus_terms,
+        )
+        if corpus_terms is not None:
+            self.corpus.register(*corpus_terms)
+        if self.eager_reports:
+            self._prerender_report(doc_id)
+        return doc_id
+
+    async def retry_pending_stages(self, doc_id: int) -> List[str]:
+        """
+        Повторяет этапы резюмирования документа, завершившиеся ошибкой или по
+        таймауту. Возвращает этапы, которые по-прежнему ждут повтора.
+        """
+        await self.repo.mark_stages_retried(doc_id)
+        doc = await self.get_document(doc_id)
+        pending = doc.summary.pending_stages(self.max_stage_attempts)
+        if pending:
+            summary = await self.summary_service.retry_pending_stages(
+                doc.original_text, doc.summary, max_attempts=self.max_stage_attempts
+            )
+            pending = summary.pending_stages(self.max_stage_attempts)
+            await self.repo.update_document_summary(doc_id, summary, pending_stages=pending)
+            if self.eager_reports:
+                self._prerender_report(doc_id)
+        else:
+            await self.repo.update_document_summary(doc_id, doc.summary, pending_stages=[])
+        return pending
 
     async def get_document(self, doc_id: int) -> TextDocumentDTO:
         doc = await self.repo.get_document(doc_id)
@@ -19,16 +85,61 @@ class DocumentService:
             raise ValueError(f"Документ с id={doc_id} не найден.")
         return doc
 
-    async def list_documents_info(self) -> List[DocumentInfoDTO]:
-        return await self.repo.list_document_info()
+    async def get_validators(self, doc_id: int) -> DocumentValidatorsDTO:
+        validators = await self.repo.get_document_validators(doc_id)
+        if validators is None:
+            raise ValueError(f"Документ с id={doc_id} не найден.")
+        return validators
+
+    async def list_documents_info(self, limit: int = 50, cursor: Optional[str] = None) -> DocumentPageDTO:
+        return await self.repo.list_document_info(limit=limit, cursor=cursor)
         
+    async def search(self, query: str, limit: int = 20, offset: int = 0) -> SearchPageDTO:
+        if not self.repo.supports_search:
+            raise SearchUnavailableError("Полнотекстовый поиск доступен только для SQLite (FTS5).")
+        return await self.repo.search_documents(query, limit=limit, offset=offset)
+
+    async def browse_keywords(
+        self,
+        selected: Optional[List[str]] = None,
+        lang: Optional[str] = None,
+        prefix: Optional[str] = None,
+        limit: int = 50,
+    ) -> KeywordBrowseDTO:
+        return await self.repo.browse_keywords(selected=selected, lang=lang, prefix=prefix, limit=limit)
+
+    async def related_documents(self, doc_id: int, limit: int = 10) -> List[RelatedDocumentDTO]:
+        related = await self.repo.related_documents(doc_id, limit=limit)
+        if related is None:
+            raise ValueError(f"Документ с id={doc_id} не найден.")
+        return related
+
     async def find_by_name(self, name: str) -> Optional[DocumentInfoDTO]:
         return await self.repo.find_document_by_name(name)
 
     async def delete_document(self, doc_id: int) -> bool:
-        return await self.repo.delete_document(doc_id)
-    
-    async def generate_report(self, doc_id: int) -> bytes:
-        doc = await self.get_document(doc_id)
-        report_service = ReportService()
-        return await report_service.generate_pdf(doc)
\ No newline at end of file
+        counted = await self.corpus.terms_of(doc_id) if self.corpus is not None else None
+        deleted = await self.repo.delete_document(doc_id)
+        if deleted and counted is not None:
+            self.corpus.discard(*counted)
+        self.report_cache.evict(doc_id)
+        return deleted
+
+    async def get_report_path(self, doc_id: int) -> Path:
+        """Путь к PDF-отчёту из дискового кэша; рендерится при первом запросе."""
+        validators = await self.get_validators(doc_id)
+        return await self.report_cache.get_or_render(
+            doc_id, validators.content_hash, lambda: self.get_document(doc_id)
+        )
+
+    def _prerender_report(self, doc_id: int) -> None:
+        """Рендерит отчёт в фоне сразу после резюмирования, не задерживая задачу."""
+        async def render() -> None:
+            try:
+                await self.get_report_path(doc_id)
+            except Exception as e:
+                print(f"⚠️ Не удалось заранее отрендерить отчёт документа {doc_id}: {e}")
+
+        task = asyncio.create_task(render())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
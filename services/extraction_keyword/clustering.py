@@ -1,6 +1,12 @@
 # clustering.py
+import heapq
+import numpy as np
 import yake
-from typing import List, Dict
+from collections import defaultdict
+from functools import lru_cache
+from typing import FrozenSet, List, Dict, Optional, Set, Tuple
+from services.extraction_text.analysis import DocumentAnalysis
+from services.extraction_text.scoring import WORD_RUN_RE, IdfTable, token_joins
 from .tokenization import core_tokens_with_pos, normalize_text
 from .metrics import jaccard
 from .config import YAKE_TOP_K, MERGE_THRESH, STOP_WORDS_RU, STOP_WORDS_EN
@@ -10,7 +16,12 @@ from .config import YAKE_TOP_K, MERGE_THRESH, STOP_WORDS_RU, STOP_WORDS_EN
 Принцип работы:
 
 Извлечение ключевых фраз
-Функция extract_key_phrases использует YAKE, чтобы из текста выделить важные слова и словосочетания (ключевые фразы).
+Функция analysis_key_phrases берёт кандидатов из общей предобработки документа
+(DocumentAnalysis): n-граммы до 4 значимых слов подряд внутри предложения, без
+стоп-слов и знаков препинания между ними. Балл фразы — число её вхождений ×
+сумма частотных весов её слов (как у предложений в ClassicalSummarizer).
+YAKE используется, только если предложения не удалось сопоставить с текстом.
+rank_key_phrases переранжирует кандидатов по корпусному IDF (в основном процессе).
 
 Подготовка к кластеризации
 Каждая фраза превращается в «кластер из одного элемента».
@@ -43,49 +54,123 @@ from .config import YAKE_TOP_K, MERGE_THRESH, STOP_WORDS_RU, STOP_WORDS_EN
 Кластер сохраняется с фразами, ядром и именем
 
 '''
-def extract_key_phrases(text: str, lang: str, top_k: int=YAKE_TOP_K) -> List[str]:
+@lru_cache(maxsize=None)
+def get_keyword_extractor(lang: str, top_k: int=YAKE_TOP_K) -> yake.KeywordExtractor:
     """
-    Извлекает ключевые фразы из текста с помощью YAKE.
-    
-    Args:
-        text: исходный текст
-        lang: язык текста ("ru" или "en")
-        top_k: сколько ключевых фраз возвращать (по умолчанию YAKE_TOP_K)
-    
-    Returns:
-        Список ключевых фраз
+    Возвращает экземпляр YAKE для языка, созданный один раз на процесс
+    (при создании YAKE читает стоп-лист с диска).
     """
-    # Инициализация YAKE для выбранного языка, с n-граммами до 4 слов
-    # dedupLim=0.9 означает, что похожие ключевые фразы считаются дубликатами
-    kw_extractor = yake.KeywordExtractor(lan=lang, n=4, top=top_k, dedupLim=0.9)
-    kws = kw_extractor.extract_keywords(text)
-    # Возвращаем только сами ключевые слова (без оценки)
-    return [kw[0] for kw in kws]
+    # n-граммы до 4 слов; dedupLim=0.9 означает, что похожие ключевые фразы считаются дубликатами
+    return yake.KeywordExtractor(lan=lang, n=4, top=top_k, dedupLim=0.9)
+
 
+# (фраза, её значимые слова в нижнем регистре, балл — больше лучше)
+KeyPhrase = Tuple[str, Tuple[str, ...], float]
 
-def cluster_phrases(phrases: List[str], merge_thresh: float=MERGE_THRESH, lang: str="ru") -> List[Dict]:
+MAX_PHRASE_WORDS = 4  # как n у YAKE
+
+
+def yake_key_phrases(text: str, lang: str, top_k: int=YAKE_TOP_K) -> List[KeyPhrase]:
+    """Ключевые фразы YAKE (у YAKE меньшая оценка лучше, балл — 1 / (1 + оценка))."""
+    if not text:
+        return []
+    stop_words = STOP_WORDS_RU if lang == "ru" else STOP_WORDS_EN
+    phrases = []
+    for phrase, score in get_keyword_extractor(lang, top_k).extract_keywords(text):
+        words = dict.fromkeys(w for w in WORD_RUN_RE.findall(phrase.lower()) if w not in stop_words)
+        phrases.append((phrase, tuple(words), 1.0 / (1.0 + score)))
+    return phrases
+
+
+def analysis_key_phrases(analysis: DocumentAnalysis, top_k: int=YAKE_TOP_K) -> List[KeyPhrase]:
     """
-    Кластеризация фраз на основе схожести их "ядра" (core tokens) с использованием метрики Жаккарда.
-    
+    Ключевые фразы по матрице токенов DocumentAnalysis: текст повторно не
+    токенизируется, стоп-слова берутся из analysis.stop_mask.
+
     Args:
-        phrases: список фраз для кластеризации
-        merge_thresh: порог схожести для объединения кластеров
-        lang: язык текста ("ru" или "en")
-    
+        analysis: предобработка документа
+        top_k: сколько фраз возвращать
+
     Returns:
-        Список кластеров, где каждый кластер содержит:
-            - name: имя кластера
-            - members: индексы фраз, входящих в кластер
-            - core_set: множество ключевых токенов кластера
-            - core_list: упорядоченный список токенов кластера
-            - core_pos: части речи токенов
-            - phrases: фразы кластера
+        Фразы по убыванию балла (при равенстве — по первому вхождению)
     """
-    
-    # Инициализация каждого элемента как отдельного кластера
+    matrix = analysis.matrix
+    if matrix is None or matrix.token_starts is None:
+        return yake_key_phrases(analysis.text, analysis.lang, top_k)
+
+    vocab, ids = matrix.vocab, matrix.term_ids
+    # Слово фразы: не стоп-слово, не число и не одна буква
+    usable = ~analysis.stop_mask & np.fromiter(
+        (len(w) > 1 and not w.isdigit() for w in vocab), dtype=bool, count=len(vocab)
+    )
+    ok = usable[ids] & (matrix.sentence_ids >= 0)
+    if not ok.any():
+        return []
+    counts = np.bincount(ids[ok], minlength=len(vocab))
+    tf = counts / counts.max()
+    joins = token_joins(analysis.text, matrix)
+
+    # Лучшие n-граммы каждой длины; повторы набора слов («data science» / «science data») отбрасываются
+    best: Dict[FrozenSet[int], Tuple[float, int, int]] = {}
+    valid = ok
+    for n in range(1, MAX_PHRASE_WORDS + 1):
+        if n > 1:
+            valid = valid[:-1] & joins[n - 2:] & ok[n - 1:]
+        starts = np.flatnonzero(valid)
+        if not len(starts):
+            break
+        grams = np.stack([ids[starts + j] for j in range(n)], axis=1)
+        grams, first, freq = np.unique(grams, axis=0, return_index=True, return_counts=True)
+        scores = freq * tf[grams].sum(axis=1)
+        top = np.argsort(-scores, kind="stable")[:2 * top_k]
+        for gram, start, score in zip(grams[top].tolist(), starts[first[top]].tolist(), scores[top].tolist()):
+            key = frozenset(gram)
+            if len(key) < n:
+                continue  # слово повторяется внутри фразы
+            if key not in best or (-score, start) < (-best[key][0], best[key][1]):
+                best[key] = (score, start, n)
+
+    ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[1][1]))[:top_k]
+    phrases = []
+    for _, (score, start, n) in ranked:
+        phrase = analysis.text[matrix.token_starts[start]:matrix.token_ends[start + n - 1]]
+        phrases.append((phrase, tuple(vocab[t] for t in ids[start:start + n].tolist()), score))
+    return phrases
+
+
+def _idf_boost(terms: Tuple[str, ...], idf: IdfTable) -> float:
+    """Средний IDF слов фразы, нормированный на максимум (idf термина, которого нет в корпусе)."""
+    if not terms:
+        return 1.0
+    return sum(idf.get(t) for t in terms) / (len(terms) * idf.default)
+
+
+def rank_key_phrases(phrases: List[KeyPhrase], top_k: int=YAKE_TOP_K, idf: Optional[IdfTable]=None) -> List[KeyPhrase]:
+    """
+    top_k лучших фраз. С корпусными IDF балл умножается на средний IDF фразы:
+    частые в корпусе фразы (низкий IDF) опускаются ниже.
+    """
+    if idf is not None:
+        phrases = sorted(phrases, key=lambda p: -p[2] * _idf_boost(p[1], idf))
+    return phrases[:top_k]
+
+
+# Готовые ядра фраз: фраза -> (токены, POS-метки)
+CoreTokens = Dict[str, Tuple[List[str], List[str]]]
+
+
+def phrase_core(phrase: str, lang: str, cores: Optional[CoreTokens]=None) -> Tuple[List[str], List[str]]:
+    """Ядро фразы из cores, если оно уже известно, иначе core_tokens_with_pos."""
+    if cores is not None and phrase in cores:
+        return cores[phrase]
+    return core_tokens_with_pos(phrase, lang)
+
+
+def _init_items(phrases: List[str], lang: str, cores: Optional[CoreTokens]=None) -> List[Dict]:
+    """Инициализация каждого элемента как отдельного кластера."""
     items = []
     for i, p in enumerate(phrases):
-        lemmas, poses = core_tokens_with_pos(p, lang)  # лемматизация и POS-теги
+        lemmas, poses = phrase_core(p, lang, cores)  # лемматизация и POS-теги
         core_set = set(lemmas)  # множество уникальных токенов
         items.append({
             "members": {i},          # индекс исходной фразы
@@ -94,7 +179,60 @@ def cluster_phrases(phrases: List[str], merge_thresh: float=MERGE_THRESH, lang:
             "core_pos": poses,       # части речи
             "core_set": core_set     # множество токенов
         })
+    return items
+
 
+def _merge_items(A: Dict, B: Dict) -> Dict:
+    """Объединяет два кластера (A — более ранний) в новый."""
+    # Объединяем члены и фразы двух кластеров
+    new_members = A["members"] | B["members"]
+    new_phrases = A["phrases"] + B["phrases"]
+    
+    inter = list(A["core_set"].intersection(B["core_set"]))
+    
+    if inter:
+        # Если есть общие токены — формируем новое ядро из них в порядке появления
+        combined = []
+        for token in A["core_list"] + B["core_list"]:
+            if token in inter and token not in combined:
+                combined.append(token)
+        new_core_list = combined
+        new_core_set = set(new_core_list)
+    else:
+        # Если общих токенов нет — берем 3 наиболее частых токена из объединения
+        union_tokens = list(A["core_list"] + B["core_list"])
+        freq = {}
+        for t in union_tokens:
+            freq[t] = freq.get(t, 0) + 1
+        # сортировка по убыванию частоты и оригинальному порядку
+        sorted_by_freq = sorted(freq.keys(), key=lambda x: (-freq[x], union_tokens.index(x)))
+        new_core_list = sorted_by_freq[:3] 
+        new_core_set = set(new_core_list)
+
+    # Пересчет POS-тегов для нового ядра
+    new_core_pos = []
+    for t in new_core_list:
+        pos = None
+        if t in A["core_list"]:
+            pos = A["core_pos"][A["core_list"].index(t)]
+        elif t in B["core_list"]:
+            pos = B["core_pos"][B["core_list"].index(t)]
+        new_core_pos.append(pos or "X")  # X — неизвестная часть речи
+
+    # Формируем новый кластер
+    return {
+        "members": new_members, "phrases": new_phrases,
+        "core_list": new_core_list, "core_pos": new_core_pos, "core_set": new_core_set
+    }
+
+
+def _greedy_merge_naive(items: List[Dict], merge_thresh: float) -> List[Dict]:
+    """
+    Эталонная жадная кластеризация: после каждого слияния заново ищет лучшую пару
+    среди всех кластеров (O(n³) вычислений Жаккарда). Используется при
+    merge_thresh <= 0, когда сливаться могут и пары без общих токенов, и как
+    эталон в бенчмарке.
+    """
     def best_pair(items_list):
         """
         Находит пару кластеров с наибольшей схожестью по Жаккарду.
@@ -115,52 +253,93 @@ def cluster_phrases(phrases: List[str], merge_thresh: float=MERGE_THRESH, lang:
         if score < merge_thresh or i is None:
             break  # если схожесть ниже порога, завершить
 
-        A, B = items_list[i], items_list[j]
-        
-        # Объединяем члены и фразы двух кластеров
-        new_members = A["members"] | B["members"]
-        new_phrases = A["phrases"] + B["phrases"]
-        
-        inter = list(A["core_set"].intersection(B["core_set"]))
-        
-        if inter:
-            # Если есть общие токены — формируем новое ядро из них в порядке появления
-            combined = []
-            for token in A["core_list"] + B["core_list"]:
-                if token in inter and token not in combined:
-                    combined.append(token)
-            new_core_list = combined
-            new_core_set = set(new_core_list)
-        else:
-            # Если общих токенов нет — берем 3 наиболее частых токена из объединения
-            union_tokens = list(A["core_list"] + B["core_list"])
-            freq = {}
-            for t in union_tokens:
-                freq[t] = freq.get(t, 0) + 1
-            # сортировка по убыванию частоты и оригинальному порядку
-            sorted_by_freq = sorted(freq.keys(), key=lambda x: (-freq[x], union_tokens.index(x)))
-            new_core_list = sorted_by_freq[:3] 
-            new_core_set = set(new_core_list)
-
-        # Пересчет POS-тегов для нового ядра
-        new_core_pos = []
-        for t in new_core_list:
-            pos = None
-            if t in A["core_list"]:
-                pos = A["core_pos"][A["core_list"].index(t)]
-            elif t in B["core_list"]:
-                pos = B["core_pos"][B["core_list"].index(t)]
-            new_core_pos.append(pos or "X")  # X — неизвестная часть речи
-
-        # Формируем новый кластер
-        new_item = {
-            "members": new_members, "phrases": new_phrases,
-            "core_list": new_core_list, "core_pos": new_core_pos, "core_set": new_core_set
-        }
+        new_item = _merge_items(items_list[i], items_list[j])
 
         # Удаляем старые кластеры и добавляем новый
         items_list = [it for k, it in enumerate(items_list) if k not in (i, j)]
         items_list.append(new_item)
+    return items_list
+
+
+def _greedy_merge_indexed(items: List[Dict], merge_thresh: float) -> List[Dict]:
+    """
+    Та же жадная кластеризация, что и _greedy_merge_naive (при merge_thresh > 0),
+    но без полного перебора пар:
+    - кандидаты ищутся через инвертированный индекс токен -> кластеры, поэтому пары
+      без общих токенов (Жаккард = 0) никогда не оцениваются;
+    - пары со схожестью не ниже порога лежат в куче (-score, id_a, id_b);
+    - после слияния оцениваются только пары нового кластера, записи с удалёнными
+      кластерами отбрасываются при извлечении.
+
+    Кластеры нумеруются в порядке создания; в эталоне это порядок в списке, поэтому
+    при равной схожести куча выбирает ту же пару (минимальные id_a, затем id_b).
+    """
+    clusters: Dict[int, Dict] = dict(enumerate(items))
+    index: Dict[str, Set[int]] = defaultdict(set)
+    heap: List[Tuple[float, int, int]] = []
+
+    def push_candidates(cid: int) -> None:
+        core_set = clusters[cid]["core_set"]
+        candidates = set()
+        for token in core_set:
+            candidates |= index[token]
+        for other in candidates:
+            score = jaccard(clusters[other]["core_set"], core_set)
+            if score >= merge_thresh:
+                heapq.heappush(heap, (-score, other, cid) if other < cid else (-score, cid, other))
+
+    # Начальные пары: каждый кластер сравнивается только с предыдущими, делящими с ним токен
+    for cid in range(len(items)):
+        push_candidates(cid)
+        for token in clusters[cid]["core_set"]:
+            index[token].add(cid)
+
+    next_id = len(items)
+    while heap:
+        _, a, b = heapq.heappop(heap)
+        if a not in clusters or b not in clusters:
+            continue  # устаревшая запись
+
+        A, B = clusters.pop(a), clusters.pop(b)
+        for cid, item in ((a, A), (b, B)):
+            for token in item["core_set"]:
+                index[token].discard(cid)
+
+        clusters[next_id] = _merge_items(A, B)
+        push_candidates(next_id)
+        for token in clusters[next_id]["core_set"]:
+            index[token].add(next_id)
+        next_id += 1
+
+    return [clusters[cid] for cid in sorted(clusters)]
+
+
+def cluster_phrases(
+    phrases: List[str], merge_thresh: float=MERGE_THRESH, lang: str="ru", cores: Optional[CoreTokens]=None
+) -> List[Dict]:
+    """
+    Кластеризация фраз на основе схожести их "ядра" (core tokens) с использованием метрики Жаккарда.
+    
+    Args:
+        phrases: список фраз для кластеризации
+        merge_thresh: порог схожести для объединения кластеров
+        lang: язык текста ("ru" или "en")
+        cores: готовые ядра фраз (например, слова из DocumentAnalysis)
+    
+    Returns:
+        Список кластеров, где каждый кластер содержит:
+            - name: имя кластера
+            - members: индексы фраз, входящих в кластер
+            - core_set: множество ключевых токенов кластера
+            - core_list: упорядоченный список токенов кластера
+            - core_pos: части речи токенов
+            - phrases: фразы кластера
+    """
+    items = _init_items(phrases, lang, cores)
+    if merge_thresh > 0:
+        items_list = _greedy_merge_indexed(items, merge_thresh)
+    else:
+        items_list = _greedy_merge_naive(items, merge_thresh)
 
     # Финализация кластеров: определяем имя и ядро
     clusters = []
@@ -1,6 +1,5 @@
 # config.py
 
-import nltk
 from nltk.corpus import stopwords
 import logging
 
@@ -21,12 +20,18 @@ morph = None
 # Настройка логирования для argostranslate
 logger = logging.getLogger(__name__)
 
-# Стоп-слова (используем NLTK, нужно скачать)
-try:
-    nltk.download('stopwords', quiet=True)
-    STOP_WORDS_RU = set(stopwords.words('russian'))
-    STOP_WORDS_EN = set(stopwords.words('english'))
-except LookupError:
-    print("NLTK 'stopwords' not downloaded. Please run: nltk.download('stopwords')")
-    STOP_WORDS_RU = set()
-    STOP_WORDS_EN = set()
\ No newline at end of file
+# Стоп-слова NLTK. Множества заполняются на месте функцией load_stop_words()
+# (её вызывает ModelRegistry при старте и воркеры пула), поэтому импорт модуля
+# не обращается ни к сети, ни к диску.
+STOP_WORDS_RU = set()
+STOP_WORDS_EN = set()
+
+def load_stop_words() -> None:
+    """Загружает стоп-слова NLTK из локальных данных (повторные вызовы ничего не делают)."""
+    if STOP_WORDS_RU and STOP_WORDS_EN:
+        return
+    try:
+        STOP_WORDS_RU.update(stopwords.words('russian'))
+        STOP_WORDS_EN.update(stopwords.words('english'))
+    except LookupError:
+        print("NLTK 'stopwords' not found. Put it into MODELS_DIR/nltk_data or set ALLOW_MODEL_DOWNLOAD=1")
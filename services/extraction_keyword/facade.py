@@ -1,7 +1,8 @@
 # project_root/services/extraction_keyword/facade.py
 import asyncio
+from functools import partial
+from typing import Any, Optional
 from models import KeywordNode, KeywordTreeSummary
-from langdetect import detect
 
 class ExtractionKeywordService1:
     async def generate(self, text: str) -> KeywordTreeSummary:
@@ -9,10 +10,15 @@ class ExtractionKeywordService1:
         node = KeywordNode(name="extr_root", children=[KeywordNode(llm_child="extr_child")])
         return KeywordTreeSummary(ru=node, en=node)
 from services.translator import LocalTranslator
-from .clustering import extract_key_phrases, cluster_phrases
-from .tree_builder import build_tree_from_clusters
+from services.compute_pool import ComputePool
+from services.corpus_stats import CorpusStats
+from services.extraction_text.analysis import AnalysisJob, run_analysis_jobs
+from services.language import detect_language
+from .clustering import rank_key_phrases
+from .pipeline import key_phrases_from_analysis, keyword_tree_from_phrases
+from .config import YAKE_TOP_K, MERGE_THRESH
 
-from typing import List
+from typing import Dict, List
 
 
 class ExtractionKeywordService:
@@ -20,52 +26,90 @@ class ExtractionKeywordService:
     Асинхронный сервис для извлечения ключевых слов и построения двуязычного дерева.
     Всегда возвращает KeywordTreeSummary (RU и EN) независимо от исходного языка.
     """
-    def __init__(self, translator: LocalTranslator):
+    def __init__(
+        self,
+        translator: LocalTranslator,
+        compute: Optional[ComputePool] = None,
+        corpus: Optional[CorpusStats] = None,
+        idf_mode: bool = False,
+    ):
         self.translator = translator
+        # Без пула CPU-этапы выполняются в отдельном потоке
+        self.compute = compute or ComputePool(workers=0)
+        # Переранжирование ключевых фраз по корпусному IDF (только при наличии статистики)
+        self.corpus = corpus
+        self.idf_mode = idf_mode and corpus is not None
 
-    def _detect_language(self,text: str) -> str:
-        try:
-            lang = detect(text)
-            if lang.startswith("ru"):
-                return "ru"
-            return "en"
-        except Exception:
-            return "en"
+    @property
+    def cache_version(self) -> str:
+        """Версия этапа для кэша: меняется вместе с отбором фраз и настройками кластеризации."""
+        return f"extraction_keyword:v3:top_k={YAKE_TOP_K}:merge={MERGE_THRESH}:idf={int(self.idf_mode)}"
 
+    @staticmethod
+    def _collect_names(nodes: List[KeywordNode], names: List[str]) -> List[str]:
+        """Собирает имена всех узлов дерева (в порядке обхода в глубину)."""
+        for node in nodes:
+            names.append(node.name)
+            ExtractionKeywordService._collect_names(node.children, names)
+        return names
+
+    @staticmethod
+    def _rebuild_tree(nodes: List[KeywordNode], translations: Dict[str, str]) -> List[KeywordNode]:
+        """Строит копию дерева с переведёнными именами узлов."""
+        return [
+            KeywordNode(
+                name=translations.get(node.name, node.name),
+                children=ExtractionKeywordService._rebuild_tree(node.children, translations)
+            )
+            for node in nodes
+        ]
 
     async def _translate_tree(self, nodes: List[KeywordNode], src: str, tgt: str) -> List[KeywordNode]:
         """
-        Асинхронно рекурсивно переводит имена узлов в дереве. 
+        Переводит имена всех узлов дерева одним пакетным вызовом переводчика
+        (вне event loop) и пересобирает дерево из результатов.
         """
-        translated_nodes = []
-        for node in nodes:
-         
-            name_translated = self.translator.translate(node.name, src=src, tgt=tgt)
-            
-            translated_children = await self._translate_tree(node.children, src=src, tgt=tgt)
+        names = list(dict.fromkeys(self._collect_names(nodes, [])))
+        translated = await asyncio.to_thread(self.translator.translate_batch, names, src, tgt)
+        return self._rebuild_tree(nodes, dict(zip(names, translated)))
 
-            translated_nodes.append(KeywordNode(name=name_translated, children=translated_children))
-            
-        return translated_nodes
+    def analysis_job(self, lang: str) -> AnalysisJob:
+        """
+        CPU-часть этапа (шаг 1, отбор фраз) над DocumentAnalysis — выполняется в пуле.
+        Для переранжирования по IDF задание отдаёт вдвое больше кандидатов.
+        """
+        return partial(key_phrases_from_analysis, top_k=YAKE_TOP_K * 2 if self.idf_mode else YAKE_TOP_K)
 
-    async def generate(self, text: str) -> KeywordTreeSummary:
+    async def generate(self, text: str, lang: Optional[str] = None) -> KeywordTreeSummary:
         """
         Основной асинхронный метод для построения двуязычного дерева.
         
         :param text: Исходный текст.
+        :param lang: Язык текста, если уже определён.
         :return: Объект KeywordTreeSummary с деревьями на RU и EN.
         """
-        
-        # ШАГ 0: АВТОМАТИЧЕСКОЕ ОПРЕДЕЛЕНИЕ ЯЗЫКА
-        source_lang = self._detect_language(text)
-        
-        # Шаг 1: Извлечение и кластеризация
-        phrases = extract_key_phrases(text, lang=source_lang)
-        
-        clusters = cluster_phrases(phrases, lang=source_lang)
-        
-        roots_original = build_tree_from_clusters(clusters, lang=source_lang)
-        
+        lang = lang or detect_language(text)
+        _, outputs = await self.compute.run(run_analysis_jobs, text, lang, {"keywords": self.analysis_job(lang)})
+        if isinstance(outputs["keywords"], Exception):
+            raise outputs["keywords"]
+        return await self.finish(text, lang, outputs["keywords"])
+
+    async def finish(self, text: str, lang: str, output: Any) -> KeywordTreeSummary:
+        """
+        Достраивает результат по выходу analysis_job в основном процессе.
+
+        :param output: (язык исходного текста, кандидаты в ключевые фразы)
+        """
+        # Шаг 1 (отбор фраз) выполнен в пуле процессов; IDF — только для слов кандидатов
+        source_lang, candidates = output
+        idf = None
+        if self.idf_mode:
+            idf = self.corpus.idf_table(source_lang, {term for _, terms, _ in candidates for term in terms})
+        phrases = rank_key_phrases(candidates, YAKE_TOP_K, idf)
+
+        # Шаг 2: Кластеризация и сборка дерева
+        roots_original = await self.compute.run(keyword_tree_from_phrases, phrases, source_lang)
+
         # Шаг 3: Перевод дерева
         target_lang = "en" if source_lang == "ru" else "ru"
         roots_translated = await self._translate_tree(roots_original, src=source_lang, tgt=target_lang)
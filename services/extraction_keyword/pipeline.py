@@ -0,0 +1,38 @@
+# pipeline.py
+from typing import List, Tuple
+from models import KeywordNode
+from .clustering import KeyPhrase, analysis_key_phrases, cluster_phrases
+from .tree_builder import build_tree_from_clusters
+from .tokenization import uses_lemmas
+from .config import YAKE_TOP_K, load_stop_words
+from services.extraction_text.analysis import DocumentAnalysis
+
+
+def key_phrases_from_analysis(analysis: DocumentAnalysis, top_k: int = YAKE_TOP_K) -> Tuple[str, List[KeyPhrase]]:
+    """
+    Задание этапа для run_analysis_jobs: кандидаты в ключевые фразы по готовой
+    предобработке. Корпусные IDF применяются к ним уже в основном процессе
+    (clustering.rank_key_phrases).
+
+    :return: (язык исходного текста, фразы по убыванию балла)
+    """
+    load_stop_words()
+    if not analysis.text:
+        return analysis.lang, []
+    return analysis.lang, analysis_key_phrases(analysis, top_k)
+
+
+def keyword_tree_from_phrases(phrases: List[KeyPhrase], lang: str) -> List[KeywordNode]:
+    """
+    Кластеризация отобранных фраз и сборка дерева. Функция модульного уровня,
+    чтобы её можно было выполнять в пуле процессов.
+
+    Без лемматизатора ядро фразы — её значимые слова из DocumentAnalysis:
+    фразы не токенизируются повторно.
+    """
+    load_stop_words()
+    cores = None
+    if not uses_lemmas(lang):
+        cores = {phrase: (list(terms), ["X"] * len(terms)) for phrase, terms, _ in phrases}
+    clusters = cluster_phrases([phrase for phrase, _, _ in phrases], lang=lang, cores=cores)
+    return build_tree_from_clusters(clusters, lang=lang, cores=cores)
@@ -66,4 +66,8 @@ def core_tokens_with_pos(phrase: str, lang: str) -> Tuple[List[str], List[str]]:
         return spacy_core_tokens(phrase, lang)
     if USE_PYMORPHY and lang == "ru":
         return pymorphy_core_tokens(phrase)
-    return simple_core_tokens(phrase, lang)
\ No newline at end of file
+    return simple_core_tokens(phrase, lang)
+
+def uses_lemmas(lang: str) -> bool:
+    """True — core_tokens_with_pos лемматизирует (spaCy/pymorphy), и слова текста не годятся как ядро фразы."""
+    return USE_SPACY or (USE_PYMORPHY and lang == "ru")
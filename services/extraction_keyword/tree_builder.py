@@ -1,6 +1,6 @@
 # tree_builder.py
-from typing import List, Dict, Set
-from .tokenization import core_tokens_with_pos, normalize_text
+from typing import List, Dict, Optional, Set
+from .clustering import CoreTokens, phrase_core
 from .metrics import jaccard
 from .config import SOFT_JACCARD_ATTACH
 from models import KeywordNode
@@ -8,9 +8,11 @@ from models import KeywordNode
 MAX_CHILDREN_PER_NODE = 5  # Максимальное количество детей у одного узла
 MIN_TOKENS_IN_NODE = 1     # Минимальное количество токенов, чтобы узел считался значимым
 
-def build_tree_from_clusters(clusters: List[Dict], lang: str = "ru") -> List[KeywordNode]:
+def build_tree_from_clusters(
+    clusters: List[Dict], lang: str = "ru", cores: Optional[CoreTokens] = None
+) -> List[KeywordNode]:
     """
-    Построение логичного дерева ключевых слов.
+    Построение логичного дерева ключевых слов (cores — готовые ядра фраз, как у cluster_phrases).
     Улучшения:
     - Оставляем только значимые «сильные» узлы (с существительными)
     - Убираем однословные узлы, которые полностью входят в более длинные фразы
@@ -62,8 +64,8 @@ def build_tree_from_clusters(clusters: List[Dict], lang: str = "ru") -> List[Key
     for nd in node_data:
         existing_tokens = set(nd["core_set"])
         for phrase in nd["phrases"]:
-            phrase_core, _ = core_tokens_with_pos(phrase, lang)
-            phrase_core_set = set(phrase_core)
+            phrase_core_list, _ = phrase_core(phrase, lang, cores)
+            phrase_core_set = set(phrase_core_list)
             new_tokens = phrase_core_set - existing_tokens
             if new_tokens and len(phrase_core_set) >= MIN_TOKENS_IN_NODE:
                 nd["node"].children.append(KeywordNode(name=phrase))
@@ -74,8 +76,8 @@ def build_tree_from_clusters(clusters: List[Dict], lang: str = "ru") -> List[Key
         filtered_children = []
         for child in node.children:
             # Сравниваем токены родителя и ребёнка
-            parent_tokens = set(core_tokens_with_pos(node.name, lang)[0])
-            child_tokens = set(core_tokens_with_pos(child.name, lang)[0])
+            parent_tokens = set(phrase_core(node.name, lang, cores)[0])
+            child_tokens = set(phrase_core(child.name, lang, cores)[0])
             if child_tokens <= parent_tokens and len(child_tokens) < MIN_TOKENS_IN_NODE:
                 continue  # удаляем однословный подмножество
             clean_tree(child)  # рекурсивно чистим детей
@@ -0,0 +1,104 @@
+# project_root/services/extraction_text/analysis.py
+"""
+Предобработка документа, общая для этапов извлечения.
+
+analyze() один раз чистит текст, делит его на предложения, строит матрицу
+предложение×термин (scoring.build_matrix) и маску стоп-слов. Результат —
+неизменяемый DocumentAnalysis. run_analysis_jobs строит его один раз на
+документ и в том же процессе пула выполняет CPU-часть этапов extraction_text
+и extraction_keyword: анализ не сериализуется между процессами, в основной
+процесс возвращаются только результаты этапов и термины документа (для
+корпусной статистики и IDF без повторной токенизации).
+"""
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from nltk.tokenize import sent_tokenize
+
+from .scoring import SentenceTermMatrix, build_matrix, document_terms, find_spans, stopword_mask
+from .utils import fix_glued_words, get_stopwords
+
+
+def split_sentences(text: str, lang: str) -> List[str]:
+    try:
+        # Используем nltk для токенизации предложений
+        return sent_tokenize(text, language="russian" if lang=="ru" else "english")
+    except Exception:
+        # Если токенизация не сработала, делим вручную по точкам, восклицательным и вопросительным знакам
+        return [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()]
+
+
+@dataclass(frozen=True)
+class DocumentAnalysis:
+    """
+    Результат предобработки документа (массивы только для чтения).
+
+    text — текст после fix_glued_words; sentence_spans — (начало, конец) каждого
+    предложения в text, None, если предложения не удалось сопоставить с текстом;
+    matrix — токены (id словаря, номер предложения), stop_mask — маска
+    стоп-слов по словарю matrix.vocab. Пустой text означает пустой документ.
+    """
+    text: str
+    lang: str
+    sentences: Tuple[str, ...]
+    sentence_spans: Optional[np.ndarray]
+    matrix: Optional[SentenceTermMatrix]
+    stop_mask: Optional[np.ndarray]
+
+    @property
+    def terms(self) -> List[str]:
+        """Термины документа (слова в нижнем регистре) — для корпусного IDF."""
+        if self.matrix is not None:
+            return self.matrix.vocab
+        return sorted(document_terms(self.text))
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+def analyze(text: str, lang: str) -> DocumentAnalysis:
+    """Строит DocumentAnalysis; функция модульного уровня для выполнения в пуле процессов."""
+    if not text or not text.strip():
+        return DocumentAnalysis(text="", lang=lang, sentences=(), sentence_spans=None, matrix=None, stop_mask=None)
+    text = fix_glued_words(text)
+    sentences = split_sentences(text, lang)
+    spans = find_spans(text, sentences)
+    matrix = build_matrix(text, sentences, spans) if sentences else None
+    if matrix is not None:
+        for array in (matrix.term_ids, matrix.sentence_ids, matrix.token_starts, matrix.token_ends):
+            _read_only(array)
+    return DocumentAnalysis(
+        text=text,
+        lang=lang,
+        sentences=tuple(sentences),
+        sentence_spans=_read_only(np.stack(spans, axis=1)) if spans is not None else None,
+        matrix=matrix,
+        stop_mask=_read_only(stopword_mask(matrix, get_stopwords(lang))) if matrix is not None else None,
+    )
+
+
+# Задание этапа над готовой предобработкой (должно сериализоваться для пула процессов)
+AnalysisJob = Callable[[DocumentAnalysis], Any]
+
+
+def run_analysis_jobs(
+    text: str, lang: str, jobs: Dict[str, AnalysisJob]
+) -> Tuple[List[str], Dict[str, Any]]:
+    """
+    Строит DocumentAnalysis и выполняет над ним задания этапов в одном процессе.
+    Ошибка задания возвращается как значение (исключение), чтобы не ронять остальные этапы.
+
+    :return: (термины документа — DocumentAnalysis.terms, результаты заданий)
+    """
+    analysis = analyze(text, lang)
+    results: Dict[str, Any] = {}
+    for name, job in jobs.items():
+        try:
+            results[name] = job(analysis)
+        except Exception as e:
+            results[name] = e
+    return analysis.terms, results
@@ -1,33 +1,137 @@
 import asyncio
-from .summarizer import ClassicalSummarizer
+from functools import partial
+from typing import Any, List, Optional, Union
+from .summarizer import ClassicalSummarizer, NO_SIGNIFICANT_WORDS
 from services.translator import LocalTranslator
+from services.compute_pool import ComputePool
+from services.corpus_stats import CorpusStats
 from models import TextSummary
-from .utils import fix_glued_words, detect_language
+from services.language import detect_language
+from .analysis import AnalysisJob, DocumentAnalysis, run_analysis_jobs
+from .scoring import SentenceCandidates
+
+# Режимы этапа: "summarize_first" — резюме по исходному тексту, переводятся только
+# выбранные предложения; "translate_first" — перевод всего текста и два резюме
+TEXT_MODES = ("summarize_first", "translate_first")
 
 class ExtractionTextSummaryService:
-    def __init__(self, summary_size: int = 6, prefer_sentence_len: int = 15):
-        self.summarizer = ClassicalSummarizer(prefer_sentence_len)
-        self.translator = LocalTranslator()
+    def __init__(
+        self,
+        translator: LocalTranslator,
+        summary_size: int = 6,
+        prefer_sentence_len: int = 15,
+        scoring: str = "frequency",
+        compute: Optional[ComputePool] = None,
+        corpus: Optional[CorpusStats] = None,
+        mode: str = "summarize_first",
+    ):
+        if mode not in TEXT_MODES:
+            raise ValueError(f"Неизвестный режим этапа extraction_text: {mode}")
+        self.mode = mode
+        self.summarizer = ClassicalSummarizer(prefer_sentence_len, scoring)
+        # Переводчик из ModelRegistry: модели загружены при старте, без обращений к сети
+        self.translator = translator
         self.summary_size = summary_size
+        # Без пула суммаризация выполняется в отдельном потоке
+        self.compute = compute or ComputePool(workers=0)
+        # Корпусная статистика для режима "idf"; без неё веса считаются по частоте
+        self.corpus = corpus
+
+    @property
+    def cache_version(self) -> str:
+        """Версия этапа для кэша: меняется вместе с параметрами суммаризатора."""
+        return (
+            f"extraction_text:v1:size={self.summary_size}:len={self.summarizer.prefer_sentence_len}"
+            f":scoring={self.summarizer.scoring}:mode={self.mode}"
+        )
+
+    @property
+    def uses_idf(self) -> bool:
+        return self.summarizer.scoring == "idf" and self.corpus is not None
 
-    async def _summarize_in_thread(self, text: str, lang: str) -> str:
-        return await asyncio.to_thread(self.summarizer.summarize, text, lang, self.summary_size)
+    def analysis_job(self, lang: str, mode: Optional[str] = None) -> AnalysisJob:
+        """
+        CPU-часть этапа над DocumentAnalysis — выполняется в пуле. Корпусные IDF
+        в задание не передаются: в режиме "idf" оно возвращает кандидатов,
+        а IDF их терминов применяются в finish.
+        """
+        max_idf = self.corpus.idf_table(lang, ()).default if self.uses_idf else None
+        return partial(
+            _summary_job, summarizer=self.summarizer, summary_size=self.summary_size,
+            max_idf=max_idf, mode=mode or self.mode,
+        )
 
-    async def generate(self, text: str) -> TextSummary:
+    def _sentences(self, lang: str, selection: Union[List[str], SentenceCandidates]) -> List[str]:
+        """Выбранные предложения; для кандидатов — по корпусным IDF их терминов."""
+        if isinstance(selection, SentenceCandidates):
+            return self.summarizer.select_idf_candidates(selection, self.corpus.idf_table(lang, selection.terms))
+        return selection
+
+    async def generate(self, text: str, lang: Optional[str] = None) -> TextSummary:
         if not text or not text.strip():
             return TextSummary(ru="Текст пуст.", en="Empty text.")
-        text = fix_glued_words(text)
-        detected = detect_language(text)
-        if detected=="ru":
-            ru_text = text
-            en_text = self.translator.translate(ru_text,"ru","en")
-        else:
-            en_text = text
-            ru_text = self.translator.translate(en_text,"en","ru")
-        ru_text = ru_text or text
-        en_text = en_text or text
-        ru_summary_task = asyncio.create_task(self._summarize_in_thread(ru_text,"ru"))
-        en_summary_task = asyncio.create_task(self._summarize_in_thread(en_text,"en"))
-        ru_summary = await ru_summary_task
-        en_summary = await en_summary_task
-        return TextSummary(ru=ru_summary, en=en_summary)
+        lang = lang or detect_language(text)
+        _, outputs = await self.compute.run(run_analysis_jobs, text, lang, {"summary": self.analysis_job(lang)})
+        if isinstance(outputs["summary"], Exception):
+            raise outputs["summary"]
+        return await self.finish(text, lang, outputs["summary"])
+
+    async def finish(self, text: str, lang: str, output: Any) -> TextSummary:
+        """
+        Достраивает результат по выходу analysis_job в основном процессе (выбор
+        по корпусным IDF и перевод).
+
+        :param output: None — текст пуст; иначе выбранные предложения (или
+                       SentenceCandidates) для "summarize_first" и пара
+                       (они же, очищенный текст) для "translate_first"
+        """
+        if output is None:
+            return TextSummary(ru="Текст пуст.", en="Empty text.")
+        if self.mode == "summarize_first":
+            return await self._translate_sentences(lang, self._sentences(lang, output))
+        selection, cleaned = output
+        return await self._translate_then_summarize(lang, self._sentences(lang, selection), cleaned)
+
+    async def _translate_sentences(self, lang: str, sentences: List[str]) -> TextSummary:
+        """
+        Резюме строится один раз по исходному тексту; переводятся только выбранные
+        предложения одним пакетным вызовом, поэтому RU и EN выровнены построчно.
+        """
+        if not sentences:
+            return TextSummary(ru=NO_SIGNIFICANT_WORDS, en="No significant words found.")
+        target = "en" if lang == "ru" else "ru"
+        translated = await asyncio.to_thread(self.translator.translate_batch, sentences, lang, target)
+        summaries = {lang: "\n".join(sentences), target: "\n".join(translated)}
+        return TextSummary(ru=summaries["ru"], en=summaries["en"])
+
+    async def _translate_then_summarize(self, lang: str, sentences: List[str], text: str) -> TextSummary:
+        """
+        Перевод всего (очищенного) текста вне event loop и независимое резюме
+        перевода; резюме исходного языка уже построено в общей задаче пула.
+        """
+        summary = "\n".join(sentences) or NO_SIGNIFICANT_WORDS
+        target = "en" if lang == "ru" else "ru"
+        translated = await asyncio.to_thread(self.translator.translate, text, lang, target)
+        translated = translated or text
+        job = self.analysis_job(target, mode="summarize_first")
+        _, outputs = await self.compute.run(run_analysis_jobs, translated, target, {"summary": job})
+        if isinstance(outputs["summary"], Exception):
+            raise outputs["summary"]
+        target_sentences = self._sentences(target, outputs["summary"] or [])
+        summaries = {lang: summary, target: "\n".join(target_sentences) or summary}
+        return TextSummary(ru=summaries["ru"], en=summaries["en"])
+
+
+def _summary_job(
+    analysis: DocumentAnalysis, summarizer: ClassicalSummarizer, summary_size: int, max_idf: Optional[float], mode: str
+) -> Any:
+    """Задание этапа для run_analysis_jobs (функция модульного уровня — сериализуется в пул)."""
+    if not analysis.text:
+        return None
+    if max_idf is None:
+        selection = summarizer.select_sentences(analysis, summary_size)
+    else:
+        selection = summarizer.idf_candidates(analysis, summary_size, max_idf)
+    if mode == "summarize_first":
+        return selection
+    return selection, analysis.text
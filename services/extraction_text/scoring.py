@@ -0,0 +1,294 @@
+# project_root/services/extraction_text/scoring.py
+"""
+Векторизованная оценка предложений для ClassicalSummarizer.
+
+Текст токенизируется один раз; токены получают целочисленные id словаря и
+номер предложения, что задаёт разреженную матрицу предложение×термин в
+формате COO (sentence_ids, term_ids). Частоты, веса, бонус за позицию и штраф
+за длину считаются операциями NumPy.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+WORD_RUN_RE = re.compile(r"\w+", flags=re.UNICODE)
+
+SCORING_MODES = ("frequency", "tfidf", "idf")
+
+
+@dataclass(frozen=True)
+class SentenceTermMatrix:
+    """
+    Токены текста в порядке появления.
+
+    term_ids[i] — id слова (в нижнем регистре) в vocab, sentence_ids[i] — номер
+    предложения или -1 для токенов вне предложений; token_starts/token_ends —
+    смещения слова в тексте.
+    """
+    vocab: List[str]
+    term_ids: np.ndarray
+    sentence_ids: np.ndarray
+    n_sentences: int
+    token_starts: Optional[np.ndarray] = None
+    token_ends: Optional[np.ndarray] = None
+
+
+@lru_cache(maxsize=1)
+def _word_char_table() -> np.ndarray:
+    """Таблица «символ входит в \\w» для всех кодовых точек (как в re: isalnum() или '_')."""
+    table = np.fromiter((chr(c).isalnum() for c in range(0x110000)), dtype=bool, count=0x110000)
+    table[ord("_")] = True
+    return table
+
+
+@lru_cache(maxsize=1)
+def _space_codes() -> np.ndarray:
+    """Кодовые точки пробельных символов (str.isspace)."""
+    return np.array([c for c in range(0x110000) if chr(c).isspace()], dtype=np.uint32)
+
+
+def token_joins(text: str, matrix: SentenceTermMatrix) -> np.ndarray:
+    """
+    joins[i] — токены i и i + 1 стоят в одном предложении и между ними только
+    пробелы или дефис (могут входить в одну фразу). Нужны token_starts/token_ends.
+    """
+    codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    separator = ~_word_char_table()[codes] & ~np.isin(codes, _space_codes()) & (codes != ord("-"))
+    seen = np.concatenate(([0], np.cumsum(separator)))
+    gaps = seen[matrix.token_starts[1:]] - seen[matrix.token_ends[:-1]]
+    same_sentence = (matrix.sentence_ids[1:] == matrix.sentence_ids[:-1]) & (matrix.sentence_ids[1:] >= 0)
+    return (gaps == 0) & same_sentence
+
+
+def document_terms(text: str) -> Set[str]:
+    """Множество терминов текста: слова \\w+ в нижнем регистре (те же, что в словаре build_matrix)."""
+    words = WORD_RUN_RE.findall(text or "")
+    if not words:
+        return set()
+    terms = set("\n".join(words).lower().split("\n"))
+    terms.discard("")
+    return terms
+
+
+def find_spans(text: str, sentences: Sequence[str]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Начала и концы предложений в тексте (поиск по порядку); None — предложение не найдено."""
+    starts = np.empty(len(sentences), dtype=np.int64)
+    ends = np.empty(len(sentences), dtype=np.int64)
+    cursor = 0
+    for i, sentence in enumerate(sentences):
+        pos = text.find(sentence, cursor)
+        if pos < 0:
+            return None
+        starts[i], ends[i] = pos, pos + len(sentence)
+        cursor = pos + len(sentence)
+    return starts, ends
+
+
+def build_matrix(
+    text: str, sentences: Sequence[str], spans: Optional[Tuple[np.ndarray, np.ndarray]] = None
+) -> Optional[SentenceTermMatrix]:
+    """
+    Токенизирует текст одним проходом и относит токены к предложениям по смещениям.
+
+    Предложения ищутся в тексте по порядку (или берутся готовые spans из
+    find_spans), начала слов находятся по маске символов \\w, и каждый токен
+    получает номер предложения через searchsorted. Если предложение не найдено
+    или граница предложения проходит внутри слова, возвращает None: токены
+    разошлись бы с поточечной токенизацией предложений.
+    """
+    spans = spans if spans is not None else find_spans(text, sentences)
+    if spans is None:
+        return None
+    starts, ends = spans
+
+    codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    is_word = _word_char_table()[codes]
+    boundaries = np.concatenate([starts, ends])
+    boundaries = boundaries[(boundaries > 0) & (boundaries < len(codes))]
+    if np.any(is_word[boundaries - 1] & is_word[boundaries]):
+        return None
+
+    # Слово — максимальная серия символов \w, как у \b\w+\b эталона
+    word_starts = np.flatnonzero(is_word & ~np.concatenate(([False], is_word[:-1])))
+    word_ends = np.flatnonzero(is_word & ~np.concatenate((is_word[1:], [False]))) + 1
+    words = WORD_RUN_RE.findall(text)
+    if len(words) != len(word_starts):
+        return None
+    candidate = np.searchsorted(starts, word_starts, side="right") - 1
+    safe = np.maximum(candidate, 0)
+    sentence_ids = np.where((candidate >= 0) & (word_starts < ends[safe]), candidate, -1)
+
+    # Нижний регистр одним вызовом; "\n" не входит в \w и не влияет на регистр соседей
+    lowered = "\n".join(words).lower().split("\n") if words else []
+    vocab_index: Dict[str, int] = dict.fromkeys(lowered)
+    for term_id, word in enumerate(vocab_index):
+        vocab_index[word] = term_id
+    return SentenceTermMatrix(
+        vocab=list(vocab_index),
+        term_ids=np.fromiter(map(vocab_index.__getitem__, lowered), dtype=np.int64, count=len(lowered)),
+        sentence_ids=sentence_ids.astype(np.int64),
+        n_sentences=len(sentences),
+        token_starts=word_starts.astype(np.int64),
+        token_ends=word_ends.astype(np.int64),
+    )
+
+
+@dataclass(frozen=True)
+class IdfTable:
+    """
+    IDF терминов одного документа: idf = ln((1 + N) / (1 + df)) + 1.
+    Термины, которых нет в корпусе, получают default (idf при df = 0).
+    Строится services.corpus_stats.CorpusStats в основном процессе по терминам из выхода заданий пула.
+    """
+    weights: Dict[str, float]
+    default: float
+
+    def get(self, term: str) -> float:
+        return self.weights.get(term, self.default)
+
+
+def stopword_mask(matrix: SentenceTermMatrix, stopwords: set) -> np.ndarray:
+    return np.fromiter((word in stopwords for word in matrix.vocab), dtype=bool, count=len(matrix.vocab))
+
+
+def term_weights(
+    matrix: SentenceTermMatrix, stop_mask: np.ndarray, mode: str = "frequency", idf: Optional[np.ndarray] = None
+) -> Optional[np.ndarray]:
+    """
+    Вес каждого термина словаря; None — в тексте нет значимых слов.
+
+    frequency: частота слова (без стоп-слов) во всём тексте, делённая на максимальную;
+    tfidf: та же частота, умноженная на log(1 + N / df), где df — число предложений
+    со словом, N — число предложений;
+    idf: частота, умноженная на корпусный IDF (idf[i] — для matrix.vocab[i]).
+    """
+    significant = ~stop_mask[matrix.term_ids]
+    if not significant.any():
+        return None
+    counts = np.bincount(matrix.term_ids[significant], minlength=len(matrix.vocab))
+    weights = counts / counts.max()
+    if mode == "tfidf":
+        in_sentence = matrix.sentence_ids >= 0
+        pairs = np.unique(matrix.sentence_ids[in_sentence] * len(matrix.vocab) + matrix.term_ids[in_sentence])
+        df = np.bincount(pairs % len(matrix.vocab), minlength=len(matrix.vocab))
+        weights = weights * np.log1p(matrix.n_sentences / np.maximum(df, 1))
+    elif mode == "idf":
+        if idf is None:
+            raise ValueError("Для режима idf нужны корпусные веса")
+        weights = weights * idf
+    elif mode != "frequency":
+        raise ValueError(f"Неизвестный режим оценки: {mode}")
+    return weights
+
+
+def sentence_bonuses(matrix: SentenceTermMatrix, prefer_sentence_len: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Бонус за позицию и штраф за длину каждого предложения."""
+    n = matrix.n_sentences
+    lengths = np.bincount(matrix.sentence_ids[matrix.sentence_ids >= 0], minlength=n)
+    pos_bonus = (n - np.arange(n)) / n
+    length_penalty = np.clip(1.0 - np.abs(lengths - prefer_sentence_len) / 50.0, 0.7, 1.3)
+    return pos_bonus, length_penalty
+
+
+def score_sentences(matrix: SentenceTermMatrix, weights: np.ndarray, prefer_sentence_len: int) -> np.ndarray:
+    """
+    Итоговые баллы предложений: сумма весов слов × бонус за позицию × штраф за длину.
+
+    np.bincount с весами суммирует токены предложения последовательно в порядке
+    текста, поэтому суммы совпадают побитно с поточечным sum() эталона.
+    """
+    in_sentence = matrix.sentence_ids >= 0
+    score = np.bincount(
+        matrix.sentence_ids[in_sentence], weights=weights[matrix.term_ids[in_sentence]], minlength=matrix.n_sentences
+    )
+    pos_bonus, length_penalty = sentence_bonuses(matrix, prefer_sentence_len)
+    return score * pos_bonus * length_penalty
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Индексы k лучших предложений в порядке текста.
+
+    Порядок выбора — (-балл, индекс), как у устойчивой сортировки по убыванию:
+    из равных по баллу берутся более ранние предложения.
+    """
+    n = len(scores)
+    if k >= n:
+        return np.arange(n)
+    if k <= 0:
+        return np.arange(0)
+    threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+    return np.sort(np.concatenate([above, ties]))
+
+
+@dataclass(frozen=True)
+class SentenceCandidates:
+    """
+    Предложения, которые могут войти в резюме при любых корпусных IDF, и данные
+    для их оценки в основном процессе (режим "idf").
+
+    IDF термина лежит в [1, max_idf], поэтому балл предложения с IDF не меньше
+    частотного и не больше частотного × max_idf. Предложение, у которого
+    частотный балл × max_idf меньше k-го по величине частотного балла, в k лучших
+    не попадёт. Для остальных хранятся пары (кандидат, термин) с числом
+    вхождений: балл пересчитывается по IDF только терминов кандидатов.
+    """
+    sentences: List[str]
+    factors: np.ndarray
+    rows: np.ndarray
+    cols: np.ndarray
+    counts: np.ndarray
+    terms: List[str]
+    tf: np.ndarray
+    summary_size: int
+
+
+def sentence_candidates(
+    matrix: SentenceTermMatrix,
+    stop_mask: np.ndarray,
+    sentences: Sequence[str],
+    summary_size: int,
+    prefer_sentence_len: int,
+    max_idf: float,
+) -> Optional[SentenceCandidates]:
+    """SentenceCandidates по матрице; None — в тексте нет значимых слов."""
+    tf = term_weights(matrix, stop_mask)
+    if tf is None:
+        return None
+    pos_bonus, length_penalty = sentence_bonuses(matrix, prefer_sentence_len)
+    scores = score_sentences(matrix, tf, prefer_sentence_len)
+    n, k = len(scores), min(summary_size, len(scores))
+    kth = np.partition(scores, n - k)[n - k] if k > 0 else np.inf
+    keep = np.flatnonzero(scores * max_idf >= kth)
+
+    local = np.full(n, -1, dtype=np.int64)
+    local[keep] = np.arange(len(keep))
+    in_sentence = matrix.sentence_ids >= 0
+    rows = np.where(in_sentence, local[np.maximum(matrix.sentence_ids, 0)], -1)
+    selected = (rows >= 0) & ~stop_mask[matrix.term_ids]
+    vocab_size = len(matrix.vocab)
+    pairs, counts = np.unique(rows[selected] * vocab_size + matrix.term_ids[selected], return_counts=True)
+    term_ids, cols = np.unique(pairs % vocab_size, return_inverse=True)
+    return SentenceCandidates(
+        sentences=[sentences[i] for i in keep],
+        factors=(pos_bonus * length_penalty)[keep],
+        rows=pairs // vocab_size,
+        cols=cols.reshape(-1),
+        counts=counts,
+        terms=[matrix.vocab[i] for i in term_ids],
+        tf=tf[term_ids],
+        summary_size=summary_size,
+    )
+
+
+def select_candidates(candidates: SentenceCandidates, idf: IdfTable) -> List[str]:
+    """k лучших кандидатов по баллу с корпусным IDF, в порядке текста."""
+    idf_vector = np.fromiter(map(idf.get, candidates.terms), dtype=np.float64, count=len(candidates.terms))
+    weights = (candidates.tf * idf_vector)[candidates.cols] * candidates.counts
+    scores = np.bincount(candidates.rows, weights=weights, minlength=len(candidates.sentences))
+    return [candidates.sentences[i] for i in top_k(scores * candidates.factors, candidates.summary_size)]
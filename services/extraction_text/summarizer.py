@@ -1,22 +1,123 @@
 import re
 from collections import Counter
-from nltk.tokenize import sent_tokenize
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
 from .utils import fix_glued_words, get_stopwords
+from .scoring import (
+    SCORING_MODES, IdfTable, SentenceCandidates, select_candidates, sentence_candidates, term_weights,
+    score_sentences, top_k,
+)
+from .analysis import DocumentAnalysis, analyze, split_sentences
+
+EMPTY_TEXT = "Текст пуст."
+NO_SENTENCES = "Не удалось разделить текст на предложения."
+NO_SIGNIFICANT_WORDS = "В тексте не найдено значимых слов."
 
 class ClassicalSummarizer:
     """
     Классический суммаризатор текста на основе частотного анализа слов.
     """
-    def __init__(self, prefer_sentence_len: int = 15):
+    def __init__(self, prefer_sentence_len: int = 15, scoring: str = "frequency"):
         """
         Инициализация суммаризатора.
         :param prefer_sentence_len: предпочитаемая длина предложения (для учета при оценке предложений)
+        :param scoring: режим весов слов — "frequency" (частота), "tfidf" (по предложениям текста)
+                        или "idf" (корпусный IDF, без него — как "frequency")
         """
+        if scoring not in SCORING_MODES:
+            raise ValueError(f"Неизвестный режим оценки: {scoring}")
         self.prefer_sentence_len = prefer_sentence_len
+        self.scoring = scoring
+
+    def _split_sentences(self, text: str, lang: str) -> list:
+        return split_sentences(text, lang)
 
-    def summarize(self, text: str, lang: str = "en", summary_size: int = 6) -> str:
+    def summarize(self, text: str, lang: str = "en", summary_size: int = 6, idf: Optional[IdfTable] = None) -> str:
         """
         Создает краткое содержание текста.
+
+        Текст токенизируется один раз в матрицу предложение×термин, баллы считаются
+        векторно (scoring.py). В режиме "frequency" результат совпадает с эталонным
+        _summarize_naive.
+        :param text: исходный текст
+        :param lang: язык текста ("en" или "ru")
+        :param summary_size: количество предложений в итоговом резюме
+        :param idf: корпусные IDF терминов текста (для режима "idf")
+        :return: строка с кратким содержанием текста
+        """
+        return self.summarize_analysis(analyze(text, lang), summary_size, idf)
+
+    def summarize_analysis(
+        self, analysis: DocumentAnalysis, summary_size: int = 6, idf: Optional[IdfTable] = None
+    ) -> str:
+        """Как summarize, но по готовому DocumentAnalysis (без повторной предобработки)."""
+        sentences, message = self._select(analysis, summary_size, idf)
+        return "\n".join(sentences) if sentences else message
+
+    def select_sentences(
+        self, analysis: DocumentAnalysis, summary_size: int = 6, idf: Optional[IdfTable] = None
+    ) -> List[str]:
+        """
+        Выбранные предложения резюме в порядке текста (те же, что в summarize).
+        Пустой список — текст пуст или в нём нет значимых слов.
+        """
+        return self._select(analysis, summary_size, idf)[0]
+
+    def idf_candidates(
+        self, analysis: DocumentAnalysis, summary_size: int, max_idf: float
+    ) -> Union[List[str], SentenceCandidates]:
+        """
+        Часть режима "idf", которой не нужны корпусные IDF (выполняется в пуле):
+        готовые предложения, если выбор от IDF не зависит, иначе кандидаты для
+        select_idf_candidates.
+        """
+        matrix = analysis.matrix
+        if matrix is None or len(analysis.sentences) <= summary_size:
+            return self._select(analysis, summary_size, None)[0]
+        candidates = sentence_candidates(
+            matrix, analysis.stop_mask, analysis.sentences, summary_size, self.prefer_sentence_len, max_idf
+        )
+        return candidates if candidates is not None else []
+
+    @staticmethod
+    def select_idf_candidates(candidates: SentenceCandidates, idf: IdfTable) -> List[str]:
+        """Выбор предложений среди кандидатов по корпусным IDF их терминов."""
+        return select_candidates(candidates, idf)
+
+    def _select(
+        self, analysis: DocumentAnalysis, summary_size: int, idf: Optional[IdfTable]
+    ) -> Tuple[List[str], str]:
+        """(выбранные предложения, сообщение для пустого результата)."""
+        if not analysis.text:
+            return [], EMPTY_TEXT
+        if not analysis.sentences:
+            return [], NO_SENTENCES
+
+        matrix = analysis.matrix
+        if matrix is None:
+            # Разбиение на предложения не согласовано с текстом — считаем поточечно
+            summary = self._summarize_naive(analysis.text, analysis.lang, summary_size)
+            return ([], summary) if summary == NO_SIGNIFICANT_WORDS else (summary.split("\n"), "")
+
+        mode, idf_vector = self.scoring, None
+        if mode == "idf":
+            if idf is None:
+                mode = "frequency"
+            else:
+                idf_vector = np.fromiter(map(idf.get, matrix.vocab), dtype=np.float64, count=len(matrix.vocab))
+        weights = term_weights(matrix, analysis.stop_mask, mode, idf_vector)
+        if weights is None:
+            return [], NO_SIGNIFICANT_WORDS
+
+        scores = score_sentences(matrix, weights, self.prefer_sentence_len)
+        return [analysis.sentences[i] for i in top_k(scores, summary_size)], ""
+
+    def _summarize_naive(self, text: str, lang: str = "en", summary_size: int = 6) -> str:
+        """
+        Эталонная поточечная реализация (режим "frequency"): каждое предложение
+        токенизируется отдельно, баллы считаются в цикле. Используется, когда
+        предложения не удаётся сопоставить с текстом, и как эталон в бенчмарке.
         :param text: исходный текст
         :param lang: язык текста ("en" или "ru")
         :param summary_size: количество предложений в итоговом резюме
@@ -24,21 +125,16 @@ class ClassicalSummarizer:
         """
         # Проверяем, что текст не пустой
         if not text or not text.strip():
-            return "Текст пуст."
+            return EMPTY_TEXT
         
         # Исправляем "слитные" слова, если такие есть
         text = fix_glued_words(text)
         
         # Разделяем текст на предложения
-        try:
-            # Используем nltk для токенизации предложений
-            sentences = sent_tokenize(text, language="russian" if lang=="ru" else "english")
-        except Exception:
-            # Если токенизация не сработала, делим вручную по точкам, восклицательным и вопросительным знакам
-            sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if s.strip()]
+        sentences = self._split_sentences(text, lang)
         
         if not sentences:
-            return "Не удалось разделить текст на предложения."
+            return NO_SENTENCES
         
         # Получаем стоп-слова для выбранного языка
         sw = get_stopwords(lang)
@@ -47,7 +143,7 @@ class ClassicalSummarizer:
         words = [w.lower() for w in re.findall(r"\b\w+\b", text, flags=re.UNICODE) if w.lower() not in sw]
         
         if not words:
-            return "В тексте не найдено значимых слов."
+            return NO_SIGNIFICANT_WORDS
         
         # Подсчитываем частоты слов
         freq = Counter(words)
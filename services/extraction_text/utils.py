@@ -1,5 +1,7 @@
 import re
+from typing import Dict, FrozenSet
 from nltk.corpus import stopwords
+from services.language import detect_language  # noqa: F401 — прежнее место импорта
 
 MULTIPLE_SPACES_RE = re.compile(r"\s+")
 
@@ -18,17 +20,17 @@ def fix_glued_words(text: str) -> str:
     t = MULTIPLE_SPACES_RE.sub(" ", t)
     return t.strip()
 
-def detect_language(text: str) -> str:
-    if not text or not any(ch.isalpha() for ch in text):
-        return "en"
-    letters = [ch for ch in text if re.match(r"[A-Za-zА-Яа-яЁё]", ch)]
-    if not letters:
-        return "en"
-    cyr = sum(1 for ch in letters if re.match(r"[А-Яа-яЁё]", ch))
-    return "ru" if (cyr / len(letters)) > 0.30 else "en"
+# Стоп-слова по языкам; набор строится один раз на процесс
+_STOPWORDS: Dict[str, FrozenSet[str]] = {}
 
-def get_stopwords(lang: str):
+def get_stopwords(lang: str) -> FrozenSet[str]:
+    cached = _STOPWORDS.get(lang)
+    if cached is not None:
+        return cached
     try:
-        return set(stopwords.words("russian" if lang == "ru" else "english"))
+        cached = frozenset(stopwords.words("russian" if lang == "ru" else "english"))
     except Exception:
-        return set()
+        # Данные NLTK ещё не загружены — не кэшируем пустой набор
+        return frozenset()
+    _STOPWORDS[lang] = cached
+    return cached
@@ -0,0 +1,68 @@
+# project_root/services/job_events.py
+import asyncio
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+# События, после которых поток задачи закрывается
+TERMINAL_EVENTS = {"done", "failed"}
+
+JobEvent = Tuple[str, dict]
+
+
+class JobEventBroker:
+    """
+    Рассылка событий задач подписчикам в памяти процесса (для SSE).
+
+    Каждая задача хранит историю своих событий, поэтому подписчик, пришедший
+    позже, сначала получает уже завершённые этапы. История держится для
+    последних retain задач.
+    """
+    def __init__(self, retain: int = 256):
+        self.retain = retain
+        self._history: "OrderedDict[int, List[JobEvent]]" = OrderedDict()
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+
+    def has_history(self, job_id: int) -> bool:
+        return job_id in self._history
+
+    def publish(self, job_id: int, event: str, data: dict) -> None:
+        history = self._history.setdefault(job_id, [])
+        self._history.move_to_end(job_id)
+        history.append((event, data))
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait((event, data))
+        while len(self._history) > self.retain:
+            self._history.popitem(last=False)
+
+    def reset(self, job_id: int) -> None:
+        """Сбрасывает историю при повторном запуске задачи."""
+        self._history.pop(job_id, None)
+
+    async def subscribe(self, job_id: int, keepalive: float = 15.0) -> AsyncIterator[Optional[JobEvent]]:
+        """
+        Отдаёт историю и новые события задачи до терминального события.
+        Если событий нет keepalive секунд, отдаёт None (для комментария-пинга SSE).
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        replay = list(self._history.get(job_id, ()))
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        try:
+            for event in replay:
+                yield event
+                if event[0] in TERMINAL_EVENTS:
+                    return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+                if event[0] in TERMINAL_EVENTS:
+                    return
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[job_id]
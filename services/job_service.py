@@ -0,0 +1,167 @@
+# project_root/services/job_service.py
+import asyncio
+from pathlib import Path
+from typing import Any, AsyncIterator, List, Optional
+
+from repository import TextRepositoryAsync
+from file_handler import FileUploader, SavedUpload
+from models import JobDTO, SUMMARY_STAGES
+from .document_service import DocumentService
+from .job_events import JobEventBroker, JobEvent
+
+# Доля прогресса, которую даёт каждый этап конвейера
+EXTRACTION_PROGRESS = 0.1
+STAGE_PROGRESS = 0.2  # четыре этапа резюмирования -> 0.8
+
+
+class JobService:
+    """
+    Очередь фоновой обработки загрузок.
+
+    Загрузка только сохраняет файл и создаёт запись задачи; извлечение текста и
+    резюмирование выполняет ограниченный пул воркеров. Состояние задач хранится в БД,
+    поэтому поставленные в очередь и прерванные задачи продолжаются после перезапуска.
+    """
+    def __init__(
+        self,
+        repo: TextRepositoryAsync,
+        document_service: DocumentService,
+        uploader: FileUploader,
+        workers: int = 2,
+        retry_interval: float = 300.0,
+    ):
+        self.repo = repo
+        self.document_service = document_service
+        self.uploader = uploader
+        self.workers = max(1, workers)
+        self._queue: "asyncio.Queue[int]" = asyncio.Queue()
+        self.retry_interval = retry_interval
+        self._tasks: List[asyncio.Task] = []
+        self.events = JobEventBroker()
+
+    async def start(self) -> None:
+        """Поднимает воркеры и возвращает в очередь незавершённые задачи."""
+        for job_id in await self.repo.requeue_unfinished_jobs():
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self.retry_interval > 0:
+            self._tasks.append(asyncio.create_task(self._retry_loop()))
+
+    async def stop(self) -> None:
+        """Останавливает воркеры; задачи в работе будут перезапущены при следующем старте."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def is_name_taken(self, name: str) -> bool:
+        if await self.document_service.find_by_name(name):
+            return True
+        return await self.repo.find_active_job_by_name(name) is not None
+
+    async def submit(self, name: str, upload: SavedUpload) -> int:
+        job_id = await self.repo.add_job(
+            name=name,
+            file_name=upload.original_name,
+            file_path=str(upload.path),
+            file_sha256=upload.sha256
+        )
+        self._queue.put_nowait(job_id)
+        return job_id
+
+    async def get_job(self, job_id: int) -> JobDTO:
+        job = await self.repo.get_job(job_id)
+        if job is None:
+            raise ValueError(f"Задача с id={job_id} не найдена.")
+        return job
+
+    async def stream_events(self, job_id: int) -> AsyncIterator[Optional[JobEvent]]:
+        """
+        События задачи для SSE. Если задача завершилась до подписки (или до
+        перезапуска процесса), результаты этапов восстанавливаются из БД.
+        """
+        job = await self.get_job(job_id)
+        if not self.events.has_history(job_id) and job.status in ("done", "failed"):
+            if job.status == "failed":
+                yield "failed", {"error": job.error}
+                return
+            try:
+                doc = await self.document_service.get_document(job.document_id)
+            except ValueError as e:
+                # Документ удалён после завершения задачи — поток закрывается терминальным событием
+                yield "failed", {"error": str(e)}
+                return
+            for stage in SUMMARY_STAGES:
+                result = getattr(doc.summary, stage)
+                yield "stage", {"stage": stage, "progress": 1.0, "result": result.model_dump()}
+            yield "done", {"document_id": job.document_id}
+            return
+        async for event in self.events.subscribe(job_id):
+            yield event
+
+    async def _retry_loop(self) -> None:
+        """Периодически повторяет этапы резюмирования, завершившиеся ошибкой или по таймауту."""
+        while True:
+            await asyncio.sleep(self.retry_interval)
+            for doc_id in await self.repo.list_documents_with_pending_stages():
+                try:
+                    pending = await self.document_service.retry_pending_stages(doc_id)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"❌ Повтор этапов документа {doc_id} не удался: {e}")
+                    continue
+                print(f"🔁 Документ {doc_id}: повтор этапов, ожидают ещё: {pending or 'нет'}")
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._process(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Задача {job_id} завершилась с ошибкой: {e}")
+                await self.repo.update_job(job_id, status="failed", error=str(e))
+                self.events.publish(job_id, "failed", {"error": str(e)})
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, job_id: int) -> None:
+        job = await self.repo.get_job(job_id)
+        if job is None or job.status != "queued":
+            return
+        file_path = await self.repo.get_job_file_path(job_id)
+
+        self.events.reset(job_id)
+        # Процесс мог упасть после create_document, но до отметки задачи: документ
+        # уже сохранён, повторный запуск упал бы на уникальном имени
+        existing = await self.document_service.find_by_name(job.name)
+        if existing is not None and existing.file_name == job.file_name:
+            print(f"♻️ Задача {job_id}: документ {existing.id} уже создан, задача отмечается выполненной")
+            await self.repo.update_job(job_id, status="done", stage="done", progress=1.0, document_id=existing.id, error=None)
+            self.events.publish(job_id, "done", {"document_id": existing.id})
+            return
+
+        await self.repo.update_job(job_id, status="running", stage="extracting", progress=0.0, error=None)
+        self.events.publish(job_id, "progress", {"stage": "extracting", "progress": 0.0})
+        text = await self.uploader.extract_text(Path(file_path))
+
+        progress = EXTRACTION_PROGRESS
+        await self.repo.update_job(job_id, stage="summarizing", progress=progress)
+        self.events.publish(job_id, "progress", {"stage": "summarizing", "progress": progress})
+
+        async def on_stage(stage: str, result: Any) -> None:
+            nonlocal progress
+            progress += STAGE_PROGRESS
+            # Результат этапа уходит подписчикам сразу, не дожидаясь остальных этапов
+            self.events.publish(job_id, "stage", {
+                "stage": stage, "progress": round(progress, 3), "result": result.model_dump()
+            })
+            await self.repo.update_job(job_id, stage=stage, progress=round(progress, 3))
+
+        doc_id = await self.document_service.create_document(
+            file_name=job.file_name, text=text or "", name=job.name, on_stage=on_stage
+        )
+        await self.repo.update_job(job_id, status="done", stage="done", progress=1.0, document_id=doc_id)
+        self.events.publish(job_id, "done", {"document_id": doc_id})
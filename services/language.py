@@ -0,0 +1,46 @@
+# project_root/services/language.py
+"""
+Определение языка документа (ru/en) по доле кириллицы среди букв.
+
+Вместо прохода по всему тексту считаются символы в нескольких окнах,
+равномерно расположенных по тексту: результат детерминирован, а время не
+зависит от размера документа. Язык определяется один раз в
+SummaryGenerationService и передаётся всем этапам.
+"""
+import numpy as np
+
+# Порог доли кириллицы среди латиницы и кириллицы, выше которого текст русский
+CYRILLIC_THRESHOLD = 0.30
+# Окна выборки: SAMPLE_WINDOWS окон по SAMPLE_WINDOW символов
+SAMPLE_WINDOWS = 16
+SAMPLE_WINDOW = 4096
+
+
+def sample_text(text: str, windows: int = SAMPLE_WINDOWS, window: int = SAMPLE_WINDOW) -> str:
+    """Текст целиком, если он короче выборки, иначе windows равномерно расставленных окон."""
+    if len(text) <= windows * window:
+        return text
+    step = (len(text) - window) / (windows - 1)
+    return "".join(text[int(i * step):int(i * step) + window] for i in range(windows))
+
+
+def letter_counts(text: str) -> tuple:
+    """(число латинских букв A-Z/a-z, число кириллических букв А-Я/а-я/Ёё)."""
+    codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    folded = codes | 0x20  # A-Z → a-z
+    latin = np.count_nonzero((folded >= 0x61) & (folded <= 0x7A))
+    cyrillic = np.count_nonzero(((codes >= 0x0410) & (codes <= 0x044F)) | (codes == 0x0401) | (codes == 0x0451))
+    return int(latin), int(cyrillic)
+
+
+def detect_language(text: str) -> str:
+    """
+    Язык текста: "ru", если доля кириллицы среди букв больше CYRILLIC_THRESHOLD,
+    иначе "en" (в том числе для пустого текста и текста без латиницы и кириллицы).
+    """
+    if not text:
+        return "en"
+    latin, cyrillic = letter_counts(sample_text(text))
+    if latin + cyrillic == 0:
+        return "en"
+    return "ru" if cyrillic / (latin + cyrillic) > CYRILLIC_THRESHOLD else "en"
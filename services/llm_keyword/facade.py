@@ -3,10 +3,12 @@ import asyncio
 from models import KeywordNode, KeywordTreeSummary
 
 import asyncio
-from typing import List
+from typing import List, Optional
 
 class LLMKeywordService:
-    async def generate(self, text: str) -> KeywordTreeSummary:
+    cache_version = "llm_keyword:stub:v1"
+
+    async def generate(self, text: str, lang: Optional[str] = None) -> KeywordTreeSummary:
         # создаём узлы
         root_node = KeywordNode(name="llm_root", children=[KeywordNode(name="llm_child")])
         
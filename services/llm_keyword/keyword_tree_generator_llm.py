@@ -1,22 +1,38 @@
 import asyncio
+from typing import List, Optional
 from services.ollama_client import OllamaClient 
+from services.chunking import split_into_chunks, group_by_budget, bounded_gather
 from models import KeywordNode, KeywordTreeSummary
 from services.llm_keyword.prompt_builder import PromptBuilder 
 # =============================
 # Keyword Tree Generator
 # =============================
 class LLMKeywordService:
-    """Генератор двуязычного дерева ключевых слов, использующий OllamaClient."""
-    def __init__(self, client: OllamaClient):
+    """
+    Генератор двуязычного дерева ключевых слов, использующий OllamaClient.
+
+    Текст длиннее chunk_chars обрабатывается по схеме map-reduce: деревья фрагментов
+    строятся параллельно (не более max_parallel запросов), затем объединяются.
+    """
+    def __init__(self, client: OllamaClient, chunk_chars: int = 12000, max_parallel: int = 4):
         self.client = client
+        self.chunk_chars = chunk_chars
+        self.max_parallel = max_parallel
 
-    async def generate(self, text: str, min_depth: int = 4, min_roots: int = 2, max_attempts: int = 3) -> KeywordTreeSummary: 
-        """Запускает асинхронную генерацию с несколькими попытками."""
-        prompt = PromptBuilder.build_dual_lang_prompt(text, min_roots=min_roots, min_depth=min_depth)
+    @property
+    def cache_version(self) -> str:
+        """Версия этапа для кэша: меняется вместе с моделью."""
+        return f"llm_keyword:v1:{self.client.model_name}:chunk={self.chunk_chars}"
 
+    async def _ask_tree(self, prompt: str, max_attempts: int) -> KeywordTreeSummary:
         for attempt in range(1, max_attempts + 1):
             print(f'\n🔁 Попытка {attempt} (Dual-Lang)...')
-            resp = await self.client.async_ask(prompt, schema=KeywordTreeSummary) 
+            try:
+                resp = await self.client.async_ask(prompt, schema=KeywordTreeSummary)
+            except OllamaError as e:
+                print(f'\n❌ Ошибка запроса к Ollama: {e}')
+                await asyncio.sleep(1.0)
+                continue
 
             if isinstance(resp, KeywordTreeSummary):
                 print('\n💡 Получен валидный JSON-объект KeywordTreeSummary.')
@@ -27,6 +43,52 @@ class LLMKeywordService:
 
         raise ValueError('❌ Не удалось получить валидный список после всех попыток.')
 
+    async def _reduce(
+        self, parts: List[KeywordTreeSummary], min_depth: int, min_roots: int, max_attempts: int
+    ) -> KeywordTreeSummary:
+        """Объединяет деревья фрагментов; если они не помещаются в один промпт — по группам."""
+        while len(parts) > 1:
+            serialized = [p.model_dump_json() for p in parts]
+            groups = group_by_budget(serialized, self.chunk_chars)
+            if len(groups) == len(parts):
+                groups = [list(range(i, min(i + 2, len(parts)))) for i in range(0, len(parts), 2)]
+
+            async def reduce_group(group: List[int]) -> KeywordTreeSummary:
+                if len(group) == 1:
+                    return parts[group[0]]
+                prompt = PromptBuilder.build_reduce_prompt(
+                    [serialized[i] for i in group], min_roots=min_roots, min_depth=min_depth
+                )
+                return await self._ask_tree(prompt, max_attempts)
+
+            parts = await bounded_gather(groups, reduce_group, self.max_parallel)
+        return parts[0]
+
+    async def generate(
+        self, text: str, lang: Optional[str] = None, min_depth: int = 4, min_roots: int = 2, max_attempts: int = 3
+    ) -> KeywordTreeSummary:
+        """
+        Запускает асинхронную генерацию с несколькими попытками.
+        lang — язык исходного текста (промпт двуязычный, поэтому не используется).
+        """
+        chunks = split_into_chunks(text, self.chunk_chars)
+        if len(chunks) <= 1:
+            prompt = PromptBuilder.build_dual_lang_prompt(text, min_roots=min_roots, min_depth=min_depth)
+            return await self._ask_tree(prompt, max_attempts)
+
+        # map: деревья фрагментов с ограниченным параллелизмом
+        total = len(chunks)
+
+        async def chunk_tree(item) -> KeywordTreeSummary:
+            index, chunk = item
+            prompt = PromptBuilder.build_chunk_prompt(chunk, index, total, min_roots=max(min_roots, 3))
+            return await self._ask_tree(prompt, max_attempts)
+
+        partials = await bounded_gather(list(enumerate(chunks, start=1)), chunk_tree, self.max_parallel)
+
+        # reduce: итоговое дерево из деревьев фрагментов
+        return await self._reduce(partials, min_depth, min_roots, max_attempts)
+
     @staticmethod
     def tree_depth(node: KeywordNode) -> int:
         """Рекурсивно вычисляет глубину дерева (в настоящее время не используется, но сохранена)."""
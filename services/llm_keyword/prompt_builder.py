@@ -45,7 +45,35 @@ Text to analyze:
 - В поле "en" все названия должны быть переведены на английский.
 
 Текст для анализа:
-{text}"""
+{text}""",
+        # Промпт для фрагмента длинного документа (этап map)
+        'chunk': """Ниже приведён фрагмент {index} из {total} длинного документа. Составь по нему **единый JSON-объект** с двумя полями:
+1.  **"ru"**: Список корневых узлов (JSON array) на **русском** языке.
+2.  **"en"**: Список корневых узлов (JSON array) на **английском** языке.
+
+Каждый список должен содержать узлы формата: {{ "name": "...", "children": [...] }}.
+
+Требования:
+- Верни **только корректный JSON-объект** (без текста и комментариев).
+- Отрази только ключевые понятия этого фрагмента, не более {min_roots} корневых узлов в каждом языке.
+- Используй только поля 'name' и 'children'.
+
+Фрагмент:
+{text}""",
+        # Промпт для объединения деревьев фрагментов (этап reduce)
+        'reduce': """Ниже приведены деревья ключевых слов, построенные по последовательным частям одного документа. Объедини их в **единый JSON-объект** с двумя полями "ru" и "en" — деревьями ключевых слов всего документа.
+
+Каждый список должен содержать узлы формата: {{ "name": "...", "children": [...] }}.
+
+Требования:
+- Верни **только корректный JSON-объект** (без текста и комментариев).
+- Объедини одинаковые и близкие понятия, убери дубликаты.
+- Оба списка ("ru" и "en") должны иметь не менее {min_roots} корневых узлов.
+- В каждой языковой версии должна быть хотя бы одна ветка глубиной не менее {min_depth} уровней.
+- В поле "en" все названия должны быть на английском.
+
+Деревья частей:
+{trees}"""
     }
 
     @classmethod
@@ -57,4 +85,15 @@ Text to analyze:
     @classmethod
     def build_dual_lang_prompt(cls, text: str, min_roots: int = 2, min_depth: int = 4) -> str:
         """Строит промпт для двуязычной генерации (KeywordTreeSummary)."""
-        return cls.PROMPTS['dual_lang'].format(text=text, min_roots=min_roots, min_depth=min_depth)
\ No newline at end of file
+        return cls.PROMPTS['dual_lang'].format(text=text, min_roots=min_roots, min_depth=min_depth)
+
+    @classmethod
+    def build_chunk_prompt(cls, text: str, index: int, total: int, min_roots: int = 3) -> str:
+        """Строит промпт для дерева одного фрагмента длинного документа (этап map)."""
+        return cls.PROMPTS['chunk'].format(text=text, index=index, total=total, min_roots=min_roots)
+
+    @classmethod
+    def build_reduce_prompt(cls, trees_json: list, min_roots: int = 2, min_depth: int = 4) -> str:
+        """Строит промпт для объединения деревьев фрагментов (этап reduce)."""
+        trees = "\n".join(f"Часть {i}: {tree}" for i, tree in enumerate(trees_json, start=1))
+        return cls.PROMPTS['reduce'].format(trees=trees, min_roots=min_roots, min_depth=min_depth)
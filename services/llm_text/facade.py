@@ -1,8 +1,11 @@
 # project_root/services/llm_text/facade.py
 import asyncio
+from typing import Optional
 from models import TextSummary
 
 class LLMTextSummaryService:
-    async def generate(self, text: str) -> TextSummary:
+    cache_version = "llm_text:stub:v1"
+
+    async def generate(self, text: str, lang: Optional[str] = None) -> TextSummary:
         await asyncio.sleep(0.1) # Simulate async work
         return TextSummary(ru="LLM: краткое резюме (RU)", en="LLM: short summary (EN)")
\ No newline at end of file
@@ -1,27 +1,39 @@
 import asyncio
-from services.ollama_client import OllamaClient
+from typing import List, Optional
+from services.ollama_client import OllamaClient, OllamaError
+from services.chunking import split_into_chunks, group_by_budget, bounded_gather
 from models import TextSummary
 from services.llm_text.prompt_builder import SummaryPromptBuilder
 
 
 class LLMTextSummaryService:
-    """Генератор двуязычного резюме текста (RU + EN) с использованием Ollama."""
+    """
+    Генератор двуязычного резюме текста (RU + EN) с использованием Ollama.
 
-    def __init__(self, client: OllamaClient):
+    Текст длиннее chunk_chars обрабатывается по схеме map-reduce: фрагменты по
+    границам предложений резюмируются параллельно (не более max_parallel запросов),
+    затем частичные резюме объединяются, при необходимости — в несколько уровней.
+    """
+
+    def __init__(self, client: OllamaClient, chunk_chars: int = 12000, max_parallel: int = 4):
         self.client = client
+        self.chunk_chars = chunk_chars
+        self.max_parallel = max_parallel
 
-    async def generate(
-        self,
-        text: str,
-        sentences: int = 8,
-        max_attempts: int = 3
-    ) -> TextSummary:
-        """Генерирует краткое резюме текста на русском и английском языках."""
-        prompt = SummaryPromptBuilder.build_dual_lang_prompt(text, sentences=sentences)
+    @property
+    def cache_version(self) -> str:
+        """Версия этапа для кэша: меняется вместе с моделью."""
+        return f"llm_text:v1:{self.client.model_name}:chunk={self.chunk_chars}"
 
+    async def _ask_summary(self, prompt: str, max_attempts: int) -> TextSummary:
         for attempt in range(1, max_attempts + 1):
             print(f"\n🔁 Попытка {attempt} (summary)...")
-            resp = await self.client.async_ask(prompt, schema=TextSummary)
+            try:
+                resp = await self.client.async_ask(prompt, schema=TextSummary)
+            except OllamaError as e:
+                print(f"❌ Ошибка запроса к Ollama: {e}")
+                await asyncio.sleep(1.0)
+                continue
 
             if isinstance(resp, TextSummary):
                 print("✅ Получен валидный объект TextSummary.")
@@ -31,3 +43,52 @@ class LLMTextSummaryService:
             await asyncio.sleep(1.0)
 
         raise ValueError("❌ Все попытки исчерпаны — не удалось сгенерировать резюме.")
+
+    async def _reduce(self, parts: List[TextSummary], sentences: int, max_attempts: int) -> TextSummary:
+        """Объединяет частичные резюме; если они не помещаются в один промпт — по группам."""
+        while len(parts) > 1:
+            groups = group_by_budget([p.ru + p.en for p in parts], self.chunk_chars)
+            if len(groups) == len(parts):
+                # Каждая часть заполняет бюджет сама — объединяем попарно, чтобы уровни сходились
+                groups = [list(range(i, min(i + 2, len(parts)))) for i in range(0, len(parts), 2)]
+
+            async def reduce_group(group: List[int]) -> TextSummary:
+                if len(group) == 1:
+                    return parts[group[0]]
+                prompt = SummaryPromptBuilder.build_reduce_prompt(
+                    [parts[i].ru for i in group], [parts[i].en for i in group], sentences=sentences
+                )
+                return await self._ask_summary(prompt, max_attempts)
+
+            parts = await bounded_gather(groups, reduce_group, self.max_parallel)
+        return parts[0]
+
+    async def generate(
+        self,
+        text: str,
+        lang: Optional[str] = None,
+        sentences: int = 8,
+        max_attempts: int = 3
+    ) -> TextSummary:
+        """
+        Генерирует краткое резюме текста на русском и английском языках.
+        lang — язык исходного текста (промпт двуязычный, поэтому не используется).
+        """
+        chunks = split_into_chunks(text, self.chunk_chars)
+        if len(chunks) <= 1:
+            prompt = SummaryPromptBuilder.build_dual_lang_prompt(text, sentences=sentences)
+            return await self._ask_summary(prompt, max_attempts)
+
+        # map: резюме фрагментов с ограниченным параллелизмом
+        chunk_sentences = max(2, sentences // 2)
+        total = len(chunks)
+
+        async def summarize_chunk(item) -> TextSummary:
+            index, chunk = item
+            prompt = SummaryPromptBuilder.build_chunk_prompt(chunk, index, total, sentences=chunk_sentences)
+            return await self._ask_summary(prompt, max_attempts)
+
+        partials = await bounded_gather(list(enumerate(chunks, start=1)), summarize_chunk, self.max_parallel)
+
+        # reduce: итоговое резюме из частичных
+        return await self._reduce(partials, sentences, max_attempts)
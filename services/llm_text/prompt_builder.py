@@ -18,6 +18,56 @@ class SummaryPromptBuilder:
 {text}
 """
 
+    CHUNK_TEMPLATE = """Ниже приведён фрагмент {index} из {total} длинного документа. Создай краткое резюме этого фрагмента на двух языках в формате JSON:
+
+{{
+  "ru": "резюме на русском языке",
+  "en": "summary in English"
+}}
+
+Требования:
+- Верни **только JSON-объект** (никаких комментариев или текста).
+- Резюме должно состоять примерно из {sentences} предложений и сохранять ключевые факты фрагмента.
+- В "en" — корректный английский перевод.
+
+Фрагмент:
+{text}
+"""
+
+    REDUCE_TEMPLATE = """Ниже приведены резюме последовательных частей одного документа. Объедини их в единое связное резюме всего документа на двух языках в формате JSON:
+
+{{
+  "ru": "резюме на русском языке",
+  "en": "summary in English"
+}}
+
+Требования:
+- Верни **только JSON-объект** (никаких комментариев или текста).
+- Итоговое резюме должно состоять примерно из {sentences} предложений.
+- Не повторяй одни и те же факты; сохрани порядок изложения документа.
+- В "en" — корректный английский перевод.
+
+Резюме частей (RU):
+{ru_parts}
+
+Резюме частей (EN):
+{en_parts}
+"""
+
+    @classmethod
+    def build_chunk_prompt(cls, text: str, index: int, total: int, sentences: int = 3) -> str:
+        """Создаёт промпт для резюме одного фрагмента (этап map)."""
+        return cls.CHUNK_TEMPLATE.format(text=text.strip(), index=index, total=total, sentences=sentences)
+
+    @classmethod
+    def build_reduce_prompt(cls, ru_parts: list, en_parts: list, sentences: int = 5) -> str:
+        """Создаёт промпт для объединения резюме фрагментов (этап reduce)."""
+        return cls.REDUCE_TEMPLATE.format(
+            ru_parts="\n".join(f"{i}. {part}" for i, part in enumerate(ru_parts, start=1)),
+            en_parts="\n".join(f"{i}. {part}" for i, part in enumerate(en_parts, start=1)),
+            sentences=sentences,
+        )
+
     @classmethod
     def build_dual_lang_prompt(cls, text: str, sentences: int = 5) -> str:
         """Создаёт промпт для генерации двуязычного резюме."""
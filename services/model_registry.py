@@ -0,0 +1,119 @@
+# project_root/services/model_registry.py
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import nltk
+
+from .translator import LocalTranslator, ensure_argos_pair, load_argos_batch_model, load_argos_translation
+from .phrase_cache import PhraseCache
+
+# Данные NLTK, нужные конвейеру: стоп-слова и модели Punkt для sent_tokenize
+NLTK_RESOURCES = {
+    "stopwords": "corpora/stopwords",
+    "punkt_tab": "tokenizers/punkt_tab",
+}
+ARGOS_PAIRS = (("ru", "en"), ("en", "ru"))
+
+
+def configure_nltk_path(models_dir: Path) -> Path:
+    """Добавляет MODELS_DIR/nltk_data в начало путей поиска NLTK."""
+    nltk_dir = models_dir / "nltk_data"
+    if str(nltk_dir) not in nltk.data.path:
+        nltk.data.path.insert(0, str(nltk_dir))
+    return nltk_dir
+
+
+class ModelRegistry:
+    """
+    Реестр моделей и языковых ресурсов приложения.
+
+    Загружает пары argos-translate, данные NLTK (стоп-слова, punkt) и стоп-листы
+    YAKE ровно один раз при старте, по умолчанию только из локального каталога
+    моделей, и отдаёт всем сервисам одни и те же экземпляры. Время каждой загрузки
+    сохраняется в load_timings.
+
+    Структура каталога моделей:
+        models_dir/argos/*.argosmodel
+        models_dir/nltk_data/{corpora,tokenizers}/...
+    """
+    def __init__(
+        self,
+        models_dir: Path,
+        allow_download: bool = False,
+        translation_cache: Optional[PhraseCache] = None,
+    ):
+        self.models_dir = models_dir
+        self.allow_download = allow_download
+        self.translation_cache = translation_cache
+        self.load_timings: Dict[str, float] = {}
+        self._translator: Optional[LocalTranslator] = None
+        self._loaded = False
+
+    @property
+    def translator(self) -> LocalTranslator:
+        if self._translator is None:
+            raise RuntimeError("ModelRegistry.load() ещё не вызывался")
+        return self._translator
+
+    def _timed(self, name: str, fn) -> None:
+        started = time.perf_counter()
+        fn()
+        self.load_timings[name] = round(time.perf_counter() - started, 4)
+
+    def _load_nltk(self) -> None:
+        nltk_dir = configure_nltk_path(self.models_dir)
+        for package, resource in NLTK_RESOURCES.items():
+            try:
+                nltk.data.find(resource)
+            except LookupError:
+                if not self.allow_download:
+                    print(f"⚠️ Ресурс NLTK '{package}' не найден в {nltk_dir}")
+                    continue
+                nltk_dir.mkdir(parents=True, exist_ok=True)
+                nltk.download(package, download_dir=str(nltk_dir), quiet=True)
+
+    def _load_stopwords(self) -> None:
+        from .extraction_keyword.config import load_stop_words
+        from .extraction_text.utils import get_stopwords
+        load_stop_words()
+        for lang in ("ru", "en"):
+            get_stopwords(lang)
+
+    def _load_yake(self) -> None:
+        from .extraction_keyword.clustering import get_keyword_extractor
+        from .extraction_keyword.config import YAKE_TOP_K
+        for lang in ("ru", "en"):
+            get_keyword_extractor(lang, YAKE_TOP_K)
+
+    def _load_argos(self) -> None:
+        argos_dir = self.models_dir / "argos"
+        translations = {}
+        batch_models = {}
+        for src, tgt in ARGOS_PAIRS:
+            translation = None
+            if ensure_argos_pair(src, tgt, local_dir=argos_dir, allow_download=self.allow_download):
+                # Объект перевода загружается один раз и переиспользуется всеми вызовами
+                translation = load_argos_translation(src, tgt)
+            if translation is None:
+                print(f"⚠️ Модель перевода {src}→{tgt} недоступна, перевод будет пропущен")
+            else:
+                translations[(src, tgt)] = translation
+                batch_model = load_argos_batch_model(translation)
+                if batch_model is None:
+                    print(f"⚠️ Пакетный перевод {src}→{tgt} недоступен, фразы переводятся по одной")
+                else:
+                    batch_models[(src, tgt)] = batch_model
+        self._translator = LocalTranslator(translations, cache=self.translation_cache, batch_models=batch_models)
+
+    def load(self) -> "ModelRegistry":
+        """Загружает все ресурсы (повторные вызовы ничего не делают)."""
+        if self._loaded:
+            return self
+        self._timed("nltk", self._load_nltk)
+        self._timed("stopwords", self._load_stopwords)
+        self._timed("yake", self._load_yake)
+        self._timed("argos", self._load_argos)
+        self._loaded = True
+        print(f"📦 Модели загружены: {self.load_timings}")
+        return self
@@ -1,9 +1,11 @@
 import os
 import json
+import time
 import asyncio
+from dataclasses import dataclass
 from typing import Optional, Union, Type, AsyncGenerator
+import httpx
 from pydantic import BaseModel, RootModel
-from ollama import Client
 from dotenv import load_dotenv
 from .json_validator import JsonValidator
 import re
@@ -16,18 +18,125 @@ OLLAMA_API_KEY = os.environ.get("OLLAMA_API_KEY")
 if not OLLAMA_API_KEY:
     print("⚠️ Предупреждение: переменная окружения OLLAMA_API_KEY не установлена.")
 
+DEFAULT_HOST = "https://ollama.com"
+
+
+class OllamaError(RuntimeError):
+    """Ошибка запроса к Ollama (соединение, таймаут, HTTP-статус, ошибка в потоке)."""
+
+# =============================
+# Метрики
+# =============================
+@dataclass
+class OllamaMetrics:
+    """Счётчики запросов: ожидание слота семафора и время до первого токена."""
+    requests: int = 0
+    failures: int = 0
+    in_flight: int = 0
+    queue_wait_total: float = 0.0
+    queue_wait_max: float = 0.0
+    ttft_count: int = 0
+    ttft_total: float = 0.0
+    ttft_max: float = 0.0
+
+    def observe_queue_wait(self, seconds: float) -> None:
+        self.queue_wait_total += seconds
+        self.queue_wait_max = max(self.queue_wait_max, seconds)
+
+    def observe_ttft(self, seconds: float) -> None:
+        self.ttft_count += 1
+        self.ttft_total += seconds
+        self.ttft_max = max(self.ttft_max, seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "queue_wait_avg": self.queue_wait_total / self.requests if self.requests else 0.0,
+            "queue_wait_max": self.queue_wait_max,
+            "ttft_avg": self.ttft_total / self.ttft_count if self.ttft_count else 0.0,
+            "ttft_max": self.ttft_max,
+        }
+
 # =============================
 # Ollama Async Client
 # =============================
 class OllamaClient:
-    """Асинхронный клиент для взаимодействия с Ollama API."""
-    def __init__(self, model_name: str = "gpt-oss:120b-cloud", host: str = "https://ollama.com"):
-        if not OLLAMA_API_KEY:
+    """
+    Асинхронный клиент для взаимодействия с Ollama API (/api/chat).
+
+    Использует общий httpx.AsyncClient с пулом keep-alive соединений,
+    таймаутами на подключение и чтение и глобальным семафором на число
+    одновременных запросов к модели.
+    """
+    def __init__(
+        self,
+        model_name: str = "gpt-oss:120b-cloud",
+        host: str = DEFAULT_HOST,
+        api_key: Optional[str] = None,
+        max_concurrency: int = 4,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 120.0,
+        max_keepalive: int = 8,
+        keepalive_expiry: float = 60.0,
+    ):
+        self.api_key = api_key or OLLAMA_API_KEY
+        if not self.api_key and host == DEFAULT_HOST:
             raise ValueError("❌ Не найден OLLAMA_API_KEY в переменных окружения")
 
-        self.api_key = OLLAMA_API_KEY
-        self.client = Client(host=host, headers={"Authorization": f"Bearer {self.api_key}"})
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        self.client = httpx.AsyncClient(
+            base_url=host.rstrip("/"),
+            headers=headers,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max(max_concurrency, max_keepalive),
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
         self.model_name = model_name
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.metrics = OllamaMetrics()
+
+    async def aclose(self) -> None:
+        """Закрывает пул соединений."""
+        await self.client.aclose()
+
+    def _timeout(self, connect_timeout: Optional[float], read_timeout: Optional[float]) -> httpx.Timeout:
+        return httpx.Timeout(
+            read_timeout if read_timeout is not None else self.read_timeout,
+            connect=connect_timeout if connect_timeout is not None else self.connect_timeout,
+        )
+
+    def _build_payload(self, prompt: str, schema_dict: Optional[dict], stream: bool) -> dict:
+        payload = {
+            "model": self.model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": stream,
+        }
+        if schema_dict:
+            payload["format"] = "json"
+            payload["options"] = {
+                "temperature": 0.0,
+                "stop": ["</tool_call>"],
+                "response_format": "json",
+            } if stream else {"response_format": "json"}
+        return payload
+
+    async def _acquire_slot(self) -> None:
+        queued_at = time.perf_counter()
+        await self.semaphore.acquire()
+        self.metrics.observe_queue_wait(time.perf_counter() - queued_at)
+        self.metrics.requests += 1
+        self.metrics.in_flight += 1
+
+    def _release_slot(self) -> None:
+        self.metrics.in_flight -= 1
+        self.semaphore.release()
 
     def _get_schema(self, schema: Optional[Union[dict, Type[BaseModel]]]) -> Optional[dict]:
         """Возвращает JSON-схему из Pydantic-модели или словаря."""
@@ -40,59 +149,96 @@ class OllamaClient:
         raise TypeError("Schema должен быть dict или Pydantic BaseModel/RootModel")
 
     async def async_stream_ask(
-        self, prompt: str, schema: Optional[Union[dict, Type[BaseModel]]] = None
+        self,
+        prompt: str,
+        schema: Optional[Union[dict, Type[BaseModel]]] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
     ) -> AsyncGenerator[str, None]:
-        """Асинхронный потоковый запрос к Ollama."""
+        """Асинхронный потоковый запрос к Ollama (NDJSON-поток /api/chat)."""
+        payload = self._build_payload(prompt, self._get_schema(schema), stream=True)
+        await self._acquire_slot()
+        try:
+            started = time.perf_counter()
+            first_token = True
+            async with self.client.stream(
+                "POST", "/api/chat", json=payload, timeout=self._timeout(connect_timeout, read_timeout)
+            ) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if not line.strip():
+                        continue
+                    part = json.loads(line)
+                    if "error" in part:
+                        raise RuntimeError(part["error"])
+                    content = part.get("message", {}).get("content", "")
+                    if content:
+                        if first_token:
+                            self.metrics.observe_ttft(time.perf_counter() - started)
+                            first_token = False
+                        yield content
+                    if part.get("done"):
+                        break
+        except (httpx.HTTPError, RuntimeError, json.JSONDecodeError) as e:
+            self.metrics.failures += 1
+            print(f"❌ Ошибка соединения с Ollama: {e}")
+            raise OllamaError(str(e) or type(e).__name__) from e
+        finally:
+            self._release_slot()
+
+    async def _ask_once(
+        self,
+        prompt: str,
+        schema_dict: Optional[dict],
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+    ) -> str:
+        """Непотоковый запрос (используется, если поток завершился без содержимого)."""
+        payload = self._build_payload(prompt, schema_dict, stream=False)
+        await self._acquire_slot()
         try:
-            messages = [{"role": "user", "content": prompt}]
-            kwargs = {"stream": True}
-
-            schema_dict = self._get_schema(schema)
-            if schema_dict:
-                kwargs["format"] = "json"
-                kwargs["options"] = {
-                    "temperature": 0.0,
-                    "stop": ["</tool_call>"],
-                    "response_format": "json",
-                }
-
-            # ✅ Правильный вызов (без _client)
-            for part in self.client.chat(self.model_name, messages=messages, **kwargs):
-                yield part["message"]["content"]
-
-        except Exception as e:
+            resp = await self.client.post(
+                "/api/chat", json=payload, timeout=self._timeout(connect_timeout, read_timeout)
+            )
+            resp.raise_for_status()
+            data = resp.json()
+        except (httpx.HTTPError, json.JSONDecodeError) as e:
+            self.metrics.failures += 1
             print(f"❌ Ошибка соединения с Ollama: {e}")
-            return
+            raise OllamaError(str(e) or type(e).__name__) from e
+        finally:
+            self._release_slot()
+
+        if isinstance(data, dict) and "message" in data and "content" in data["message"]:
+            return data["message"]["content"]
+        return json.dumps(data)
 
     async def async_ask(
-        self, prompt: str, schema: Optional[Union[dict, Type[BaseModel]]] = None
+        self,
+        prompt: str,
+        schema: Optional[Union[dict, Type[BaseModel]]] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
     ) -> Union[str, BaseModel, None]:
-        """Асинхронный запрос к LLM с валидацией Pydantic."""
+        """
+        Асинхронный запрос к LLM с валидацией Pydantic.
+
+        Ошибки соединения и таймауты не повторяются здесь, а поднимаются как
+        OllamaError — повторы делают вызывающие сервисы.
+        """
         response_text = ""
 
         # --- потоковый ответ ---
-        async for chunk in self.async_stream_ask(prompt, schema=schema):
-            print(chunk, end="", flush=True)
+        async for chunk in self.async_stream_ask(
+            prompt, schema=schema, connect_timeout=connect_timeout, read_timeout=read_timeout
+        ):
             response_text += chunk
 
-        # --- если стриминг ничего не вернул ---
+        # --- поток завершился успешно, но без содержимого ---
         if response_text == "":
-            messages = [{"role": "user", "content": prompt}]
-            kwargs = {}
-            schema_dict = self._get_schema(schema)
-            if schema_dict:
-                kwargs["format"] = "json"
-                kwargs["options"] = {"response_format": "json"}
-
-            # ✅ Синхронный вызов через отдельный поток
-            resp = await asyncio.to_thread(self.client.chat, self.model_name, messages=messages, **kwargs)
-
-            if isinstance(resp, dict) and "message" in resp and "content" in resp["message"]:
-                response_text = resp["message"]["content"]
-            else:
-                response_text = json.dumps(resp)
-
-        print()  # новая строка после вывода
+            response_text = await self._ask_once(
+                prompt, self._get_schema(schema), connect_timeout=connect_timeout, read_timeout=read_timeout
+            )
 
         # --- валидация ---
         if schema and isinstance(schema, type) and (issubclass(schema, BaseModel) or issubclass(schema, RootModel)):
@@ -0,0 +1,100 @@
+# project_root/services/phrase_cache.py
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+# SQLite ограничивает число параметров в запросе
+SQL_CHUNK = 500
+
+
+class PhraseCache:
+    """
+    Персистентный LRU-кэш переводов фраз с ключом (src, tgt, phrase).
+
+    Горячие записи держатся в памяти (OrderedDict), все записи — в отдельном
+    SQLite-файле, который переживает перезапуск. Кэш потокобезопасен: перевод
+    выполняется вне event loop.
+    """
+    def __init__(self, path: Optional[Path] = None, capacity: int = 100_000, memory_capacity: int = 10_000):
+        self.capacity = capacity
+        self.memory_capacity = memory_capacity
+        self._memory: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path) if path else ":memory:", check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS phrase_translations ("
+            " src TEXT NOT NULL, tgt TEXT NOT NULL, phrase TEXT NOT NULL,"
+            " translation TEXT NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (src, tgt, phrase))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_phrase_translations_last_used ON phrase_translations (last_used)"
+        )
+        self._conn.commit()
+
+    def _remember(self, key: Tuple[str, str, str], value: str) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_capacity:
+            self._memory.popitem(last=False)
+
+    def get_many(self, src: str, tgt: str, phrases: Iterable[str]) -> Dict[str, str]:
+        """Возвращает найденные переводы {фраза: перевод}."""
+        found: Dict[str, str] = {}
+        misses = []
+        with self._lock:
+            for phrase in phrases:
+                key = (src, tgt, phrase)
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[phrase] = self._memory[key]
+                else:
+                    misses.append(phrase)
+
+            now = time.time()
+            for i in range(0, len(misses), SQL_CHUNK):
+                chunk = misses[i:i + SQL_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT phrase, translation FROM phrase_translations "
+                    f"WHERE src = ? AND tgt = ? AND phrase IN ({placeholders})",
+                    (src, tgt, *chunk),
+                ).fetchall()
+                for phrase, translation in rows:
+                    found[phrase] = translation
+                    self._remember((src, tgt, phrase), translation)
+                if rows:
+                    self._conn.executemany(
+                        "UPDATE phrase_translations SET last_used = ? WHERE src = ? AND tgt = ? AND phrase = ?",
+                        [(now, src, tgt, phrase) for phrase, _ in rows],
+                    )
+            self._conn.commit()
+        return found
+
+    def put_many(self, src: str, tgt: str, translations: Dict[str, str]) -> None:
+        if not translations:
+            return
+        now = time.time()
+        with self._lock:
+            for phrase, translation in translations.items():
+                self._remember((src, tgt, phrase), translation)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO phrase_translations (src, tgt, phrase, translation, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(src, tgt, phrase, translation, now) for phrase, translation in translations.items()],
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM phrase_translations").fetchone()
+            if count > self.capacity:
+                self._conn.execute(
+                    "DELETE FROM phrase_translations WHERE rowid IN ("
+                    " SELECT rowid FROM phrase_translations ORDER BY last_used LIMIT ?)",
+                    (count - self.capacity,),
+                )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
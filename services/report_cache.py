@@ -0,0 +1,59 @@
+# project_root/services/report_cache.py
+import asyncio
+from pathlib import Path
+from typing import Awaitable, Callable, Dict
+
+from models import TextDocumentDTO
+from .report_service import ReportService
+
+
+class ReportCache:
+    """
+    Дисковый кэш PDF-отчётов с ключом (id документа, content_hash).
+
+    Отчёт рендерится один раз в воркере пула и далее отдаётся готовым файлом.
+    Смена content_hash (повтор этапов резюмирования) даёт новый ключ, старые
+    версии отчёта документа удаляются после рендера новой.
+    """
+    def __init__(self, reports_dir: Path, report_service: ReportService):
+        self.reports_dir = reports_dir
+        self.reports_dir.mkdir(parents=True, exist_ok=True)
+        self.report_service = report_service
+        self._locks: Dict[int, asyncio.Lock] = {}
+        # Число корутин, держащих или ждущих блокировку документа: блокировка
+        # удаляется только при нуле, иначе новый запрос создал бы вторую
+        self._waiters: Dict[int, int] = {}
+
+    def path_for(self, doc_id: int, content_hash: str) -> Path:
+        return self.reports_dir / f"{doc_id}-{content_hash[:32]}.pdf"
+
+    def _stale_versions(self, doc_id: int, keep: Path):
+        return [p for p in self.reports_dir.glob(f"{doc_id}-*.pdf") if p != keep]
+
+    async def get_or_render(
+        self, doc_id: int, content_hash: str, load_document: Callable[[], Awaitable[TextDocumentDTO]]
+    ) -> Path:
+        """Путь к готовому отчёту; при промахе загружает документ и рендерит отчёт (один рендер на документ)."""
+        path = self.path_for(doc_id, content_hash)
+        if path.exists():
+            return path
+        lock = self._locks.setdefault(doc_id, asyncio.Lock())
+        self._waiters[doc_id] = self._waiters.get(doc_id, 0) + 1
+        try:
+            async with lock:
+                if not path.exists():
+                    doc = await load_document()
+                    size = await self.report_service.render_to_file(doc, path)
+                    print(f"📄 Отчёт документа {doc_id} отрендерен ({size / 1024:.0f} КБ)")
+                    for stale in self._stale_versions(doc_id, path):
+                        stale.unlink(missing_ok=True)
+        finally:
+            self._waiters[doc_id] -= 1
+            if self._waiters[doc_id] == 0:
+                del self._waiters[doc_id]
+                self._locks.pop(doc_id, None)
+        return path
+
+    def evict(self, doc_id: int) -> None:
+        for path in self.reports_dir.glob(f"{doc_id}-*.pdf"):
+            path.unlink(missing_ok=True)
@@ -0,0 +1,55 @@
+# project_root/services/summary_cache.py
+import hashlib
+import json
+import re
+import unicodedata
+from collections import Counter
+from typing import Optional, Type
+
+from pydantic import BaseModel
+from repository import TextRepositoryAsync
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+class SummaryCache:
+    """
+    Персистентный кэш результатов этапов резюмирования.
+
+    Ключ — (хэш нормализованного текста, этап, версия конфигурации этапа), поэтому
+    повторная загрузка того же отчёта под другим именем не запускает этапы заново,
+    а смена настроек этапа автоматически инвалидирует его записи.
+    """
+    def __init__(self, repo: TextRepositoryAsync, max_bytes: int = 64 * 1024 * 1024):
+        self.repo = repo
+        self.max_bytes = max_bytes
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """SHA-256 текста после NFC-нормализации и схлопывания пробелов."""
+        normalized = WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text or "")).strip()
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    async def get(self, text_hash: str, stage: str, version: str, model: Type[BaseModel]) -> Optional[BaseModel]:
+        payload = await self.repo.get_cache_entry(text_hash, stage, version)
+        if payload is None:
+            self.misses[stage] += 1
+            return None
+        self.hits[stage] += 1
+        return model.model_validate(payload)
+
+    async def put(self, text_hash: str, stage: str, version: str, value: BaseModel) -> None:
+        payload = value.model_dump()
+        size = len(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+        await self.repo.put_cache_entry(text_hash, stage, version, payload, size)
+        await self.repo.evict_cache(self.max_bytes)
+
+    def stats(self) -> dict:
+        stages = sorted(set(self.hits) | set(self.misses))
+        return {
+            "hits": sum(self.hits.values()),
+            "misses": sum(self.misses.values()),
+            "stages": {stage: {"hits": self.hits[stage], "misses": self.misses[stage]} for stage in stages},
+        }
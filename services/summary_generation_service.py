@@ -1,10 +1,44 @@
 # project_root/services/summary_generation_service.py
 import asyncio
-from models import SummaryResult
-from .llm_text.facade import LLMTextSummaryService
-from .llm_keyword.facade import LLMKeywordService
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Type
+from pydantic import BaseModel
+from models import SummaryResult, TextSummary, KeywordTreeSummary, StageStatus, SUMMARY_STAGES
+from .llm_text.llm_text_summary_service import LLMTextSummaryService
+from .llm_keyword.keyword_tree_generator_llm import LLMKeywordService
 from .extraction_text.facade import ExtractionTextSummaryService
 from .extraction_keyword.facade import ExtractionKeywordService
+from .summary_cache import SummaryCache
+from .language import detect_language
+from .compute_pool import ComputePool
+from .extraction_text.analysis import run_analysis_jobs
+
+# Колбэк, вызываемый по завершении каждого этапа: (имя поля SummaryResult, результат)
+StageCallback = Callable[[str, Any], Awaitable[None]]
+# Этапы, CPU-часть которых выполняется над общим DocumentAnalysis (analysis_job + finish)
+ANALYSIS_STAGES = ("extraction_text_summary", "extraction_keyword_summary")
+
+# Таймауты этапов по умолчанию, секунды
+DEFAULT_STAGE_TIMEOUTS: Dict[str, float] = {
+    "llm_text_summary": 600.0,
+    "llm_keyword_summary": 600.0,
+    "extraction_text_summary": 120.0,
+    "extraction_keyword_summary": 120.0,
+}
+
+STAGE_MODELS: Dict[str, Type[BaseModel]] = {
+    "llm_text_summary": TextSummary,
+    "llm_keyword_summary": KeywordTreeSummary,
+    "extraction_text_summary": TextSummary,
+    "extraction_keyword_summary": KeywordTreeSummary,
+}
+
+
+def placeholder(stage: str) -> BaseModel:
+    """Пустой результат этапа, который не удалось выполнить."""
+    if STAGE_MODELS[stage] is TextSummary:
+        return TextSummary(ru="", en="")
+    return KeywordTreeSummary(ru=[], en=[])
+
 
 class SummaryGenerationService:
     def __init__(
@@ -13,22 +47,189 @@ class SummaryGenerationService:
         llm_keyword_svc: LLMKeywordService,
         extraction_text_svc: ExtractionTextSummaryService,
         extraction_keyword_svc: ExtractionKeywordService,
+        cache: Optional[SummaryCache] = None,
+        stage_timeouts: Optional[Dict[str, float]] = None,
+        compute: Optional[ComputePool] = None,
     ):
         self.llm_text_svc = llm_text_svc
         self.llm_keyword_svc = llm_keyword_svc
         self.extraction_text_svc = extraction_text_svc
         self.extraction_keyword_svc = extraction_keyword_svc
+        self.cache = cache
+        self.stage_timeouts = {**DEFAULT_STAGE_TIMEOUTS, **(stage_timeouts or {})}
+        # Без пула предобработка выполняется в отдельном потоке
+        self.compute = compute or ComputePool(workers=0)
+
+    def _stage_service(self, stage: str) -> Any:
+        return {
+            "llm_text_summary": self.llm_text_svc,
+            "llm_keyword_summary": self.llm_keyword_svc,
+            "extraction_text_summary": self.extraction_text_svc,
+            "extraction_keyword_summary": self.extraction_keyword_svc,
+        }[stage]
+
+    async def _generate(self, stage: str, text: str, lang: str, batch: "_AnalysisBatch") -> BaseModel:
+        svc = self._stage_service(stage)
+        if stage in ANALYSIS_STAGES:
+            return await svc.finish(text, lang, await batch.result(stage))
+        return await svc.generate(text, lang=lang)
+
+    async def _run_stage(
+        self,
+        stage: str,
+        text: str,
+        lang: str,
+        batch: "_AnalysisBatch",
+        text_hash: Optional[str],
+        on_stage: Optional[StageCallback],
+        attempts: int = 1,
+    ) -> tuple:
+        """
+        Выполняет этап с таймаутом. По таймауту корутина этапа отменяется (вместе с
+        HTTP-запросами к LLM и ожиданием задач пула); ошибка или таймаут дают пустой
+        результат и статус failed/timeout вместо падения всего резюме.
+        """
+        svc = self._stage_service(stage)
+        version = getattr(svc, "cache_version", "v1")
+        result = None
+        cached = False
+        status = StageStatus(attempts=attempts)
+
+        async def lookup_or_generate() -> tuple:
+            # Чтение кэша — часть этапа: его ошибка или ожидание заблокированной БД
+            # ограничены тем же таймаутом и не роняют остальные этапы
+            if self.cache is not None:
+                hit = await self.cache.get(text_hash, stage, version, STAGE_MODELS[stage])
+                if hit is not None:
+                    return hit, True
+            return await self._generate(stage, text, lang, batch), False
+
+        try:
+            result, cached = await asyncio.wait_for(lookup_or_generate(), timeout=self.stage_timeouts.get(stage))
+        except asyncio.TimeoutError:
+            print(f"⏱️ Этап {stage} превысил таймаут {self.stage_timeouts.get(stage)} с")
+            result = placeholder(stage)
+            status = StageStatus(status="timeout", error="Превышен таймаут этапа", attempts=attempts)
+        except Exception as e:
+            print(f"❌ Этап {stage} завершился с ошибкой: {e}")
+            result = placeholder(stage)
+            status = StageStatus(status="failed", error=str(e), attempts=attempts)
+        else:
+            if self.cache is not None and not cached:
+                try:
+                    await self.cache.put(text_hash, stage, version, result)
+                except Exception as e:
+                    # Результат получен — не сохранился только кэш
+                    print(f"⚠️ Не удалось сохранить этап {stage} в кэш: {e}")
+        # Этап взят из кэша или упал до запроса — общая задача пула его не ждёт
+        batch.release(stage)
+        if on_stage is not None:
+            await on_stage(stage, result)
+        return result, status
 
-    async def generate_full_summary(self, text: str) -> SummaryResult:
-        llm_text, llm_kw, extr_text, extr_kw = await asyncio.gather(
-            self.llm_text_svc.generate(text),
-            self.llm_keyword_svc.generate(text),
-            self.extraction_text_svc.generate(text),
-            self.extraction_keyword_svc.generate(text),
+    async def _run_stages(
+        self,
+        text: str,
+        stages: Iterable[str],
+        on_stage: Optional[StageCallback],
+        attempts: Dict[str, int],
+        lang: Optional[str] = None,
+    ) -> Tuple[Dict[str, tuple], Optional[List[str]]]:
+        """:return: (результат и статус каждого этапа, термины документа из общей задачи пула или None)."""
+        stages = list(stages)
+        text_hash = SummaryCache.text_hash(text) if self.cache is not None else None
+        # Язык и предобработка определяются один раз и общие для всех этапов
+        lang = lang or detect_language(text)
+        batch = _AnalysisBatch(self, text, lang, [stage for stage in stages if stage in ANALYSIS_STAGES])
+        results = await asyncio.gather(*(
+            self._run_stage(stage, text, lang, batch, text_hash, on_stage, attempts.get(stage, 1))
+            for stage in stages
+        ))
+        return dict(zip(stages, results)), batch.terms
+
+    async def generate_full_summary(
+        self, text: str, on_stage: Optional[StageCallback] = None, lang: Optional[str] = None
+    ) -> SummaryResult:
+        """:param lang: язык текста, если уже определён (иначе определяется здесь)."""
+        summary, _ = await self.summarize_document(text, on_stage, lang)
+        return summary
+
+    async def summarize_document(
+        self, text: str, on_stage: Optional[StageCallback] = None, lang: Optional[str] = None
+    ) -> Tuple[SummaryResult, Optional[List[str]]]:
+        """
+        generate_full_summary и термины документа для корпусной статистики.
+        Термины — None, если общая задача пула не выполнялась (этапы извлечения
+        взяты из кэша) или упала.
+        """
+        results, terms = await self._run_stages(text, SUMMARY_STAGES, on_stage, {}, lang)
+        summary = SummaryResult(
+            **{stage: result for stage, (result, _) in results.items()},
+            stage_status={stage: status for stage, (_, status) in results.items() if status.status != "ok"},
         )
-        return SummaryResult(
-            llm_text_summary=llm_text,
-            llm_keyword_summary=llm_kw,
-            extraction_text_summary=extr_text,
-            extraction_keyword_summary=extr_kw,
-        )
\ No newline at end of file
+        return summary, terms
+
+    async def retry_pending_stages(
+        self,
+        text: str,
+        summary: SummaryResult,
+        on_stage: Optional[StageCallback] = None,
+        max_attempts: Optional[int] = None,
+    ) -> SummaryResult:
+        """Повторяет только неуспешные этапы; успешные берутся из summary без пересчёта."""
+        pending = summary.pending_stages(max_attempts)
+        attempts = {stage: summary.stage_status[stage].attempts + 1 for stage in pending}
+        results, _ = await self._run_stages(text, pending, on_stage, attempts)
+        stage_status = {k: v for k, v in summary.stage_status.items() if k not in results}
+        update = {}
+        for stage, (result, status) in results.items():
+            update[stage] = result
+            if status.status != "ok":
+                stage_status[stage] = status
+        return summary.model_copy(update={**update, "stage_status": stage_status})
+
+
+class _AnalysisBatch:
+    """
+    Общая задача пула для этапов извлечения одного документа: DocumentAnalysis
+    строится и используется в одном процессе (run_analysis_jobs), в основной
+    процесс возвращаются только результаты заданий этапов и термины документа
+    (terms). Корпусные IDF задачей пула не нужны: этапы применяют их в finish.
+
+    Задача запускается, когда каждый этап извлечения либо запросил результат,
+    либо выбыл (взят из кэша или упал), — этапы из кэша не пересчитываются.
+    """
+    def __init__(self, owner: SummaryGenerationService, text: str, lang: str, stages: Iterable[str]):
+        self.owner = owner
+        self.text = text
+        self.lang = lang
+        self._undecided = set(stages)
+        self._requested: List[str] = []
+        self._started = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.terms: Optional[List[str]] = None
+
+    def release(self, stage: str) -> None:
+        self._undecided.discard(stage)
+        self._maybe_start()
+
+    async def result(self, stage: str) -> Any:
+        self._undecided.discard(stage)
+        self._requested.append(stage)
+        self._maybe_start()
+        await self._started.wait()
+        # shield: таймаут одного этапа не должен отменять общую задачу
+        output = (await asyncio.shield(self._task))[stage]
+        if isinstance(output, Exception):
+            raise output
+        return output
+
+    def _maybe_start(self) -> None:
+        if self._task is None and self._requested and not self._undecided:
+            self._task = asyncio.create_task(self._run(list(self._requested)))
+            self._started.set()
+
+    async def _run(self, stages: List[str]) -> Dict[str, Any]:
+        jobs = {stage: self.owner._stage_service(stage).analysis_job(self.lang) for stage in stages}
+        self.terms, outputs = await self.owner.compute.run(run_analysis_jobs, self.text, self.lang, jobs)
+        return outputs
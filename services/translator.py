@@ -1,16 +1,108 @@
-import argostranslate.translate
-import argostranslate.package
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from .phrase_cache import PhraseCache
 
-def ensure_argos_pair(src: str, tgt: str) -> bool:
-    """Проверка наличия установленной пары src→tgt и ее установка, если отсутствует."""
+# Параметры пакетного перевода (как в argos: beam 4, пакеты до 32 фраз)
+BATCH_BEAM_SIZE = 4
+BATCH_MAX_SIZE = 32
+
+def load_argos_translation(src: str, tgt: str):
+    """Объект перевода argos (ITranslation) для установленной пары src→tgt или None."""
     try:
+        # argos импортируется при загрузке моделей, а не при импорте модуля
+        import argostranslate.translate
+
         langs = argostranslate.translate.get_installed_languages()
         from_lang = next((l for l in langs if l.code == src), None)
         to_lang = next((l for l in langs if l.code == tgt), None)
-        if from_lang and to_lang and from_lang.get_translation(to_lang):
-            return True
+        if from_lang is None or to_lang is None:
+            return None
+        return from_lang.get_translation(to_lang)
+    except Exception:
+        return None
+
+
+class ArgosBatchModel:
+    """
+    Пакетный перевод моделью пакета argos напрямую.
+
+    translate() в argos делит вход на абзацы и переводит каждый отдельным
+    вызовом модели, поэтому склейка фраз через перевод строки не экономит
+    вызовы. Здесь фразы токенизируются SentencePiece пакета и переводятся
+    одним вызовом ctranslate2 translate_batch.
+    """
+    def __init__(self, translator, tokenizer, beam_size: int = BATCH_BEAM_SIZE, max_batch_size: int = BATCH_MAX_SIZE):
+        self.translator = translator
+        self.tokenizer = tokenizer
+        self.beam_size = beam_size
+        self.max_batch_size = max_batch_size
+
+    def translate_batch(self, phrases: List[str]) -> List[str]:
+        tokens = self.tokenizer.encode(phrases, out_type=str)
+        results = self.translator.translate_batch(
+            tokens, beam_size=self.beam_size, max_batch_size=self.max_batch_size, replace_unknowns=True
+        )
+        return [self.tokenizer.decode(result.hypotheses[0]).strip() for result in results]
+
+
+def load_argos_batch_model(translation) -> Optional[ArgosBatchModel]:
+    """
+    ArgosBatchModel для объекта перевода argos (пакет с CTranslate2-моделью и
+    sentencepiece.model) или None, если пакет устроен иначе.
+    """
+    pkg = getattr(translation, "pkg", None)
+    if pkg is None:
+        return None
+    model_dir = Path(pkg.package_path) / "model"
+    sp_model = Path(pkg.package_path) / "sentencepiece.model"
+    if not (model_dir.is_dir() and sp_model.is_file()):
+        return None
+    try:
+        import ctranslate2
+        import sentencepiece
+        from argostranslate import settings
+
+        translator = getattr(translation, "translator", None)
+        if translator is None:
+            translator = ctranslate2.Translator(str(model_dir), device=settings.device)
+            # argos создаёт тот же переводчик лениво — отдаём ему готовый, чтобы модель загружалась один раз
+            translation.translator = translator
+        tokenizer = sentencepiece.SentencePieceProcessor(model_file=str(sp_model))
     except Exception:
-        pass # Игнорируем и пробуем установить
+        return None
+    return ArgosBatchModel(translator, tokenizer)
+
+
+def _pair_installed(src: str, tgt: str) -> bool:
+    return load_argos_translation(src, tgt) is not None
+
+
+def ensure_argos_pair(src: str, tgt: str, local_dir: Optional[Path] = None, allow_download: bool = True) -> bool:
+    """
+    Проверка наличия установленной пары src→tgt и ее установка, если отсутствует.
+
+    Сначала ищется локальный пакет *.argosmodel в local_dir (например,
+    translate-ru_en-1_9.argosmodel); индекс пакетов из сети запрашивается только
+    при allow_download=True.
+    """
+    if _pair_installed(src, tgt):
+        return True
+    try:
+        import argostranslate.package
+    except ImportError:
+        return False
+
+    if local_dir is not None and local_dir.is_dir():
+        for pkg_path in sorted(local_dir.glob(f"*{src}_{tgt}*.argosmodel")):
+            try:
+                argostranslate.package.install_from_path(pkg_path)
+            except Exception:
+                continue
+            if _pair_installed(src, tgt):
+                return True
+
+    if not allow_download:
+        return False
 
     try:
         argostranslate.package.update_package_index()
@@ -26,19 +118,79 @@ def ensure_argos_pair(src: str, tgt: str) -> bool:
 
 
 class LocalTranslator:
-    """Локальный переводчик, использующий argos-translate."""
-    def __init__(self):
-        # Проверяем и устанавливаем необходимые пары
-        self.ru_en_ok = ensure_argos_pair("ru", "en")
-        self.en_ru_ok = ensure_argos_pair("en", "ru")
+    """
+    Локальный переводчик, использующий argos-translate.
+
+    Объекты перевода пар загружает ModelRegistry один раз при старте; переводчик
+    вызывает их напрямую, без повторного поиска установленных языков. Пара,
+    которой нет в translations, не переводится (фраза возвращается как есть).
+    batch_models — пакетные модели пар для translate_batch (см. ArgosBatchModel).
+    """
+    def __init__(
+        self,
+        translations: Dict[Tuple[str, str], object],
+        cache: Optional[PhraseCache] = None,
+        batch_models: Optional[Dict[Tuple[str, str], ArgosBatchModel]] = None,
+    ):
+        self.translations = translations
+        self.cache = cache or PhraseCache()
+        self.batch_models = batch_models or {}
+
+    def _pair_available(self, src: str, tgt: str) -> bool:
+        return (src, tgt) in self.translations
+
+    def _translate_raw(self, text: str, src: str, tgt: str) -> str:
+        return self.translations[(src, tgt)].translate(text)
+
+    def _try_translate(self, phrase: str, src: str, tgt: str) -> Optional[str]:
+        """Перевод фразы или None при ошибке или пустом результате."""
+        try:
+            return self._translate_raw(phrase, src, tgt) or None
+        except Exception as e:
+            print(f"⚠️ Ошибка перевода {src}→{tgt}: {e}")
+            return None
 
     def translate(self, phrase: str, src: str, tgt: str) -> str:
         """Выполняет перевод."""
-        if (src == "ru" and tgt == "en" and not self.ru_en_ok) or \
-           (src == "en" and tgt == "ru" and not self.en_ru_ok):
+        if not self._pair_available(src, tgt):
             return phrase
-            
-        try:
-            return argostranslate.translate.translate(phrase, src, tgt)
-        except Exception as e:
-            return phrase
\ No newline at end of file
+        return self._try_translate(phrase, src, tgt) or phrase
+
+    def translate_batch(self, phrases: List[str], src: str, tgt: str) -> List[str]:
+        """
+        Переводит список коротких фраз одним вызовом модели.
+
+        Фразы берутся из кэша (src, tgt, phrase); оставшиеся переводятся одним
+        вызовом пакетной модели пары, а без неё (или при её ошибке) — по одной.
+        В кэш попадают только успешные переводы: при ошибке фраза возвращается
+        как есть, но не запоминается. Возвращает переводы в порядке входного списка.
+        """
+        if not phrases:
+            return []
+        if not self._pair_available(src, tgt):
+            return list(phrases)
+
+        unique = list(dict.fromkeys(p for p in phrases))
+        translated: Dict[str, str] = self.cache.get_many(src, tgt, unique)
+        misses = [p for p in unique if p not in translated and p.strip()]
+        fresh: Dict[str, str] = {}
+
+        batch_model = self.batch_models.get((src, tgt))
+        # Фразы с переводом строки — несколько абзацев, их переводит argos целиком
+        batchable = [p for p in misses if "\n" not in p]
+        if batch_model is not None and batchable:
+            try:
+                outputs = batch_model.translate_batch(batchable)
+                fresh.update({p: t for p, t in zip(batchable, outputs) if t})
+            except Exception as e:
+                print(f"⚠️ Пакетный перевод {src}→{tgt} не удался, перевод по одной фразе: {e}")
+
+        for phrase in misses:
+            if phrase not in fresh:
+                result = self._try_translate(phrase, src, tgt)
+                if result is not None:
+                    fresh[phrase] = result
+
+        self.cache.put_many(src, tgt, fresh)
+        translated.update(fresh)
+        return [translated.get(p, p) for p in phrases]
@@ -0,0 +1,75 @@
+// Заполнение разделов document.html по мере готовности этапов резюмирования (SSE)
+
+function renderKeywordNodes(nodes, ul) {
+    ul.innerHTML = '';
+    if (!nodes || nodes.length === 0) {
+        ul.innerHTML = '<li><em>Нет ключевых слов</em></li>';
+        return;
+    }
+    nodes.forEach(node => {
+        const li = document.createElement('li');
+        li.appendChild(document.createTextNode(node.name));
+        if (node.children && node.children.length) {
+            const childUl = document.createElement('ul');
+            renderKeywordNodes(node.children, childUl);
+            li.appendChild(childUl);
+        }
+        ul.appendChild(li);
+    });
+}
+
+function fillStage(stage, result) {
+    document.querySelectorAll(`[data-stage="${stage}"]`).forEach(section => {
+        const value = result[section.dataset.lang];
+        const tree = section.querySelector('ul.keyword-tree');
+        if (tree) {
+            renderKeywordNodes(value, tree);
+        } else {
+            section.querySelector('p').textContent = value || '';
+        }
+    });
+}
+
+function setProgress(stage, progress) {
+    const percent = Math.round(progress * 100);
+    const bar = document.getElementById('job-progress');
+    document.getElementById('job-stage').textContent = stage || '-';
+    bar.style.width = percent + '%';
+    bar.textContent = percent + '%';
+}
+
+function streamSummaries(jobId) {
+    const source = new EventSource(`/api/jobs/${jobId}/events`);
+
+    source.addEventListener('progress', e => {
+        const data = JSON.parse(e.data);
+        setProgress(data.stage, data.progress);
+    });
+
+    source.addEventListener('stage', e => {
+        const data = JSON.parse(e.data);
+        setProgress(data.stage, data.progress);
+        fillStage(data.stage, data.result);
+    });
+
+    source.addEventListener('done', async e => {
+        source.close();
+        const docId = JSON.parse(e.data).document_id;
+        setProgress('done', 1);
+        const resp = await fetch(`/api/documents/${docId}`);
+        if (resp.ok) {
+            const doc = await resp.json();
+            document.querySelector('.original').textContent = doc.original_text;
+        }
+        document.querySelectorAll('.action-buttons a').forEach(a => {
+            a.href = a.getAttribute('href').replace('/documents//', `/documents/${docId}/`);
+        });
+        document.querySelector('.action-buttons').hidden = false;
+        history.replaceState(null, '', `/documents/${docId}`);
+    });
+
+    source.addEventListener('failed', e => {
+        source.close();
+        document.getElementById('job-error').textContent = JSON.parse(e.data).error || '';
+    });
+}
@@ -0,0 +1,93 @@
+# tests/fake_ollama.py
+"""
+Локальный поддельный сервер Ollama (/api/chat) для тестов OllamaClient и LLM-сервисов.
+
+Сервер работает в отдельном потоке; ответ на каждый запрос даёт функция
+reply(prompt) -> str, задержки задаются delay (секунды до первого байта).
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List
+
+
+class FakeOllamaServer:
+    def __init__(self, reply: Callable[[str], str], delay: float = 0.0, chunks: int = 3):
+        self.reply = reply
+        self.delay = delay
+        self.chunks = chunks
+        self.prompts: List[str] = []
+        self.streamed: List[bool] = []
+        self.concurrent = 0
+        self.max_concurrent = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FakeOllamaServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompt = payload["messages"][0]["content"]
+                with fake._lock:
+                    fake.prompts.append(prompt)
+                    fake.streamed.append(payload["stream"])
+                    fake.concurrent += 1
+                    fake.max_concurrent = max(fake.max_concurrent, fake.concurrent)
+                try:
+                    time.sleep(fake.delay)
+                    content = fake.reply(prompt)
+                    if payload["stream"]:
+                        self._stream(content)
+                    else:
+                        self._send(json.dumps({"message": {"content": content}, "done": True}).encode())
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with fake._lock:
+                        fake.concurrent -= 1
+
+            def _send(self, body: bytes):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, content: str):
+                size = max(1, -(-len(content) // fake.chunks))
+                lines = [
+                    json.dumps({"message": {"content": content[i:i + size]}, "done": False})
+                    for i in range(0, len(content), size)
+                ]
+                lines.append(json.dumps({"message": {"content": ""}, "done": True}))
+                body = ("\n".join(lines) + "\n").encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
@@ -0,0 +1,59 @@
+# tests/test_extraction_analysis.py
+"""
+Этапы извлечения над общим DocumentAnalysis: ключевые фразы по матрице токенов
+и выбор предложений с корпусным IDF по кандидатам из пула.
+"""
+import random
+
+import pytest
+
+from services.extraction_keyword.clustering import analysis_key_phrases, rank_key_phrases
+from services.extraction_text import analysis as analysis_module
+from services.extraction_text.analysis import analyze
+from services.extraction_text.scoring import IdfTable
+from services.extraction_text.summarizer import ClassicalSummarizer
+
+STOP_WORDS = frozenset({"the", "of", "and", "a", "is", "in"})
+
+
+@pytest.fixture(autouse=True)
+def stop_words(monkeypatch):
+    monkeypatch.setattr(analysis_module, "get_stopwords", lambda lang: STOP_WORDS)
+
+
+def test_key_phrases_use_analysis_tokens():
+    text = (
+        "Neural networks learn fast. Neural networks, however, need data.\n\n"
+        "The quality of data is key. Large neural networks need large data sets."
+    )
+    phrases = analysis_key_phrases(analyze(text, "en"), top_k=10)
+    by_phrase = {phrase: terms for phrase, terms, _ in phrases}
+    assert phrases[0][0] == "Neural networks"
+    assert by_phrase["Neural networks"] == ("neural", "networks")
+    # Фразы не пересекают запятые и границы предложений и не содержат стоп-слов
+    assert all("," not in phrase and "." not in phrase for phrase in by_phrase)
+    assert "networks however" not in {phrase.lower() for phrase in by_phrase}
+    assert all(STOP_WORDS.isdisjoint(terms) for terms in by_phrase.values())
+
+
+def test_rank_key_phrases_prefers_rare_corpus_terms():
+    phrases = [("common", ("common",), 2.0), ("rare", ("rare",), 1.5)]
+    idf = IdfTable(weights={"common": 1.0}, default=3.0)
+    assert [p for p, _, _ in rank_key_phrases(phrases, 1)] == ["common"]
+    assert [p for p, _, _ in rank_key_phrases(phrases, 1, idf)] == ["rare"]
+
+
+def test_idf_candidates_select_like_full_scoring():
+    rng = random.Random(7)
+    words = [f"w{i}" for i in range(60)] + sorted(STOP_WORDS)
+    text = " ".join(
+        " ".join(rng.choice(words) for _ in range(rng.randint(4, 20))).capitalize() + "."
+        for _ in range(200)
+    )
+    analysis = analyze(text, "en")
+    summarizer = ClassicalSummarizer(scoring="idf")
+    # IDF лежит в [1, default]; default — IDF термина, которого нет в корпусе
+    idf = IdfTable(weights={w: 1.0 + rng.random() * 3.0 for w in analysis.terms}, default=4.0)
+    candidates = summarizer.idf_candidates(analysis, 6, idf.default)
+    assert len(candidates.sentences) < len(analysis.sentences)
+    assert summarizer.select_idf_candidates(candidates, idf) == summarizer.select_sentences(analysis, 6, idf)
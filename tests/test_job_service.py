@@ -0,0 +1,74 @@
+# tests/test_job_service.py
+"""
+JobService на SQLite-файле: повторный запуск задачи и SSE-события завершённых задач.
+"""
+import asyncio
+
+from repository import TextRepositoryAsync
+from services.job_service import JobService
+from test_repository import make_summary
+
+
+class FakeDocumentService:
+    def __init__(self, repo: TextRepositoryAsync):
+        self.repo = repo
+        self.created = []
+
+    async def find_by_name(self, name):
+        return await self.repo.find_document_by_name(name)
+
+    async def get_document(self, doc_id):
+        doc = await self.repo.get_document(doc_id)
+        if doc is None:
+            raise ValueError(f"Документ с id={doc_id} не найден.")
+        return doc
+
+    async def create_document(self, file_name, text, name, on_stage=None):
+        self.created.append(name)
+        return await self.repo.add_document(text, make_summary(), file_name, name)
+
+
+class FakeUploader:
+    async def extract_text(self, path):
+        return "текст"
+
+
+def run_with_repo(tmp_path, scenario):
+    async def main():
+        repo = TextRepositoryAsync(f"sqlite+aiosqlite:///{tmp_path / 'texts.db'}")
+        try:
+            await repo.init_models()
+            documents = FakeDocumentService(repo)
+            await scenario(repo, documents, JobService(repo, documents, FakeUploader(), retry_interval=0))
+        finally:
+            await repo.engine.dispose()
+
+    asyncio.run(main())
+
+
+def test_rerun_after_crash_reuses_created_document(tmp_path):
+    async def scenario(repo, documents, jobs):
+        job_id = await repo.add_job(name="doc", file_name="doc.pdf", file_path=str(tmp_path / "doc.pdf"), file_sha256="0")
+        # Документ сохранён, но процесс упал до отметки задачи выполненной
+        doc_id = await repo.add_document("текст", make_summary(), "doc.pdf", "doc")
+        await jobs._process(job_id)
+        job = await repo.get_job(job_id)
+        assert (job.status, job.document_id) == ("done", doc_id)
+        assert documents.created == []
+
+    run_with_repo(tmp_path, scenario)
+
+
+def test_events_of_done_job_with_deleted_document(tmp_path):
+    async def scenario(repo, documents, jobs):
+        job_id = await repo.add_job(name="doc", file_name="doc.pdf", file_path=str(tmp_path / "doc.pdf"), file_sha256="0")
+        await jobs._process(job_id)
+        events = [event async for event in jobs.stream_events(job_id)]
+        assert [name for name, _ in events][-1] == "done"
+
+        await repo.delete_document((await repo.get_job(job_id)).document_id)
+        jobs.events = type(jobs.events)()  # подписка после перезапуска процесса: истории событий нет
+        events = [event async for event in jobs.stream_events(job_id)]
+        assert len(events) == 1 and events[0][0] == "failed"
+
+    run_with_repo(tmp_path, scenario)
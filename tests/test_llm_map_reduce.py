@@ -0,0 +1,127 @@
+# tests/test_llm_map_reduce.py
+"""Map-reduce LLM-сервисов на поддельном клиенте: промпты фрагментов и объединения."""
+import asyncio
+import re
+
+import pytest
+
+from models import KeywordNode, KeywordTreeSummary, TextSummary
+from services.llm_keyword.keyword_tree_generator_llm import LLMKeywordService
+from services.llm_text.llm_text_summary_service import LLMTextSummaryService
+
+CHUNK_RE = re.compile(r"фрагмент (\d+) из (\d+)")
+
+
+class FakeClient:
+    """Отвечает по типу промпта и запоминает промпты и число одновременных запросов."""
+    model_name = "fake"
+
+    def __init__(self):
+        self.prompts = []
+        self.concurrent = 0
+        self.max_concurrent = 0
+
+    async def async_ask(self, prompt, schema=None):
+        self.prompts.append(prompt)
+        self.concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.concurrent -= 1
+        match = CHUNK_RE.search(prompt)
+        label = f"chunk{match.group(1)}" if match else ("reduce" if "частей" in prompt else "single")
+        if schema is TextSummary:
+            return TextSummary(ru=f"ru-{label}", en=f"en-{label}")
+        node = KeywordNode(name=label)
+        return KeywordTreeSummary(ru=[node], en=[node])
+
+
+def make_text(sentences: int) -> str:
+    return " ".join(f"Предложение номер {i} о важном предмете." for i in range(sentences))
+
+
+def chunk_prompts(client: FakeClient):
+    return [p for p in client.prompts if CHUNK_RE.search(p)]
+
+
+def test_short_text_uses_single_prompt():
+    client = FakeClient()
+    service = LLMTextSummaryService(client, chunk_chars=10_000)
+    result = asyncio.run(service.generate(make_text(5)))
+    assert result == TextSummary(ru="ru-single", en="en-single")
+    assert len(client.prompts) == 1 and not chunk_prompts(client)
+
+
+def test_text_chunks_are_summarized_in_parallel_and_reduced():
+    client = FakeClient()
+    service = LLMTextSummaryService(client, chunk_chars=400, max_parallel=3)
+    text = make_text(60)
+    result = asyncio.run(service.generate(text))
+
+    chunks = chunk_prompts(client)
+    total = int(CHUNK_RE.search(chunks[0]).group(2))
+    assert total > 3 and len(chunks) == total
+    assert sorted(int(CHUNK_RE.search(p).group(1)) for p in chunks) == list(range(1, total + 1))
+    # Каждое предложение попадает ровно в один фрагмент, фрагменты не длиннее бюджета
+    for i in range(60):
+        assert sum(f"номер {i} о" in p for p in chunks) == 1
+    assert client.max_concurrent == 3
+
+    reduces = [p for p in client.prompts if not CHUNK_RE.search(p)]
+    assert reduces and all("Резюме частей (RU)" in p for p in reduces)
+    # Итоговый reduce видит результаты всех частей (напрямую или через промежуточные reduce)
+    seen = "\n".join(reduces)
+    assert all(f"ru-chunk{i}" in seen for i in range(1, total + 1))
+    assert result == TextSummary(ru="ru-reduce", en="en-reduce")
+
+
+def test_keyword_trees_are_merged_in_reduce_prompt():
+    client = FakeClient()
+    service = LLMKeywordService(client, chunk_chars=400, max_parallel=2)
+    result = asyncio.run(service.generate(make_text(30)))
+
+    chunks = chunk_prompts(client)
+    total = len(chunks)
+    assert total > 1 and client.max_concurrent == 2
+    reduces = [p for p in client.prompts if "Деревья частей" in p]
+    seen = "\n".join(reduces)
+    assert all(f'"name":"chunk{i}"' in seen for i in range(1, total + 1))
+    assert result.ru[0].name == "reduce"
+
+
+class FailingChunkClient(FakeClient):
+    """Фрагмент 1 падает сразу, остальные запросы «висят», пока их не отменят."""
+    def __init__(self):
+        super().__init__()
+        self.cancelled = 0
+
+    async def async_ask(self, prompt, schema=None):
+        self.prompts.append(prompt)
+        if CHUNK_RE.search(prompt).group(1) == "1":
+            raise RuntimeError("сбой фрагмента")
+        self.concurrent += 1
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.concurrent -= 1
+
+
+def test_failed_chunk_cancels_sibling_requests():
+    client = FailingChunkClient()
+    service = LLMTextSummaryService(client, chunk_chars=400, max_parallel=3)
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(service.generate(make_text(60)), timeout=2)
+        # Запросы остальных фрагментов отменены и завершены к моменту ошибки
+        assert client.concurrent == 0
+        started = len(client.prompts)
+        await asyncio.sleep(0.05)
+        assert len(client.prompts) == started
+
+    asyncio.run(main())
+    assert client.cancelled == len(client.prompts) - 1 > 0
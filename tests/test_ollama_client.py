@@ -0,0 +1,100 @@
+# tests/test_ollama_client.py
+import asyncio
+import json
+
+import pytest
+
+from fake_ollama import FakeOllamaServer
+from models import TextSummary
+from services.llm_text.llm_text_summary_service import LLMTextSummaryService
+from services.ollama_client import OllamaClient, OllamaError
+
+
+def make_client(server: FakeOllamaServer, **kwargs) -> OllamaClient:
+    return OllamaClient(model_name="fake", host=server.url, api_key="test", **kwargs)
+
+
+def test_streamed_answer_is_joined_and_measured():
+    async def main(server):
+        client = make_client(server)
+        try:
+            answer = await client.async_ask("привет")
+        finally:
+            await client.aclose()
+        return answer, client.metrics.snapshot()
+
+    with FakeOllamaServer(lambda prompt: f"ответ на: {prompt}") as server:
+        answer, metrics = asyncio.run(main(server))
+    assert answer == "ответ на: привет"
+    assert server.streamed == [True]
+    assert metrics["requests"] == 1 and metrics["failures"] == 0 and metrics["in_flight"] == 0
+    assert metrics["ttft_avg"] > 0
+
+
+def test_schema_answer_is_validated():
+    summary = TextSummary(ru="резюме", en="summary")
+
+    async def main(server):
+        client = make_client(server)
+        try:
+            return await client.async_ask("резюме", schema=TextSummary)
+        finally:
+            await client.aclose()
+
+    with FakeOllamaServer(lambda prompt: summary.model_dump_json()) as server:
+        assert asyncio.run(main(server)) == summary
+
+
+def test_semaphore_limits_concurrent_requests():
+    async def main(server):
+        client = make_client(server, max_concurrency=2)
+        try:
+            answers = await asyncio.gather(*(client.async_ask(str(i)) for i in range(6)))
+        finally:
+            await client.aclose()
+        return answers, client.metrics.snapshot()
+
+    with FakeOllamaServer(lambda prompt: prompt, delay=0.2) as server:
+        answers, metrics = asyncio.run(main(server))
+    assert answers == [str(i) for i in range(6)]
+    assert server.max_concurrent == 2
+    assert metrics["requests"] == 6
+    # Последние запросы ждали слот минимум два «оборота» сервера
+    assert metrics["queue_wait_max"] >= 0.3
+
+
+def test_read_timeout_raises_without_second_request():
+    async def main(server):
+        client = make_client(server, read_timeout=0.2)
+        try:
+            with pytest.raises(OllamaError):
+                await client.async_ask("медленно")
+        finally:
+            await client.aclose()
+        return client.metrics.snapshot()
+
+    with FakeOllamaServer(lambda prompt: json.dumps({"late": True}), delay=1.0) as server:
+        metrics = asyncio.run(main(server))
+    # Таймаут потока не порождает непотоковый повтор: повторяет вызывающий сервис
+    assert server.streamed == [True]
+    assert metrics["requests"] == 1 and metrics["failures"] == 1 and metrics["in_flight"] == 0
+
+
+def test_services_retry_transport_errors():
+    summary = TextSummary(ru="резюме", en="summary")
+    replies = iter([OllamaError("таймаут чтения"), summary])
+
+    class FlakyClient:
+        model_name = "fake"
+        calls = 0
+
+        async def async_ask(self, prompt, schema=None):
+            self.calls += 1
+            reply = next(replies)
+            if isinstance(reply, Exception):
+                raise reply
+            return reply
+
+    client = FlakyClient()
+    assert asyncio.run(LLMTextSummaryService(client).generate("Короткий текст.")) == summary
+    assert client.calls == 2
@@ -0,0 +1,51 @@
+# tests/test_pdf_extraction.py
+import asyncio
+
+import pytest
+
+pytest.importorskip("pdfminer")
+canvas = pytest.importorskip("reportlab.pdfgen.canvas")
+
+from pdfminer.high_level import extract_text as pdfminer_extract_text
+
+from file_handler import FileUploader, extract_pdf_pages
+from services.compute_pool import ComputePool
+
+PAGES = 40
+
+
+@pytest.fixture(scope="module")
+def pdf_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("pdf") / "doc.pdf"
+    pdf = canvas.Canvas(str(path))
+    for i in range(PAGES):
+        pdf.drawString(72, 720, f"Page number {i}")
+        pdf.drawString(72, 700, f"second line {i}")
+        pdf.showPage()
+    pdf.save()
+    return path
+
+
+def test_page_ranges_match_whole_document_extraction(pdf_path):
+    reference = pdfminer_extract_text(str(pdf_path)).split("\f")[:PAGES]
+    pages = []
+    for start in range(0, PAGES, 16):
+        pages += extract_pdf_pages(str(pdf_path), start, min(start + 16, PAGES))
+    assert pages == reference
+
+
+def test_range_past_the_end_is_padded(pdf_path):
+    pages = extract_pdf_pages(str(pdf_path), PAGES - 1, PAGES + 2)
+    assert pages[0].startswith(f"Page number {PAGES - 1}") and pages[1:] == ["", ""]
+
+
+def test_uploader_respects_page_and_char_limits(tmp_path, pdf_path):
+    async def extract(**limits):
+        uploader = FileUploader(tmp_path, compute=ComputePool(workers=0), pages_per_task=4, **limits)
+        return await uploader.extract_text(pdf_path)
+
+    by_pages = asyncio.run(extract(max_pages=5))
+    assert "Page number 4" in by_pages and "Page number 5" not in by_pages
+
+    by_chars = asyncio.run(extract(max_chars=100))
+    assert len(by_chars) <= 100 + PAGES and by_chars.startswith("Page number 0")
@@ -0,0 +1,63 @@
+# tests/test_report_cache.py
+"""ReportCache: один рендер на документ при конкурентных запросах, в том числе после ошибки рендера."""
+import asyncio
+
+from services.report_cache import ReportCache
+
+
+class FakeReportService:
+    """Рендер с задержкой; первый вызов может падать."""
+    def __init__(self, fail_first=False):
+        self.fail_first = fail_first
+        self.calls = 0
+        self.active = 0
+        self.max_active = 0
+
+    async def render_to_file(self, doc, path):
+        self.calls += 1
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.02)
+            if self.fail_first and self.calls == 1:
+                raise RuntimeError("сбой рендера")
+            path.write_bytes(b"%PDF")
+            return 4
+        finally:
+            self.active -= 1
+
+
+async def load_document():
+    return None
+
+
+def test_concurrent_requests_render_once(tmp_path):
+    service = FakeReportService()
+    cache = ReportCache(tmp_path, service)
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_render(1, "hash", load_document) for _ in range(5)))
+
+    paths = asyncio.run(main())
+    assert service.calls == 1
+    assert len(set(paths)) == 1 and paths[0].exists()
+    assert cache._locks == {} and cache._waiters == {}
+
+
+def test_lock_survives_failed_render_while_others_wait(tmp_path):
+    service = FakeReportService(fail_first=True)
+    cache = ReportCache(tmp_path, service)
+
+    async def main():
+        first = asyncio.create_task(cache.get_or_render(1, "hash", load_document))
+        waiting = asyncio.create_task(cache.get_or_render(1, "hash", load_document))
+        await asyncio.sleep(0.03)  # первый рендер упал, второй запрос уже рендерит
+        late = asyncio.create_task(cache.get_or_render(1, "hash", load_document))
+        return await asyncio.gather(first, waiting, late, return_exceptions=True)
+
+    first, waiting, late = asyncio.run(main())
+    assert isinstance(first, RuntimeError)
+    assert waiting == late and late.exists()
+    # Опоздавший запрос ждёт ту же блокировку и не рендерит отчёт второй раз
+    assert service.calls == 2 and service.max_active == 1
+    assert cache._locks == {} and cache._waiters == {}
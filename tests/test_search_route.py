@@ -0,0 +1,33 @@
+# tests/test_search_route.py
+"""/api/search: 501 только при неподдерживаемом поиске, а не для любой NotImplementedError."""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api_routes import router
+from services.document_service import DocumentService
+
+
+class Repo:
+    def __init__(self, supports_search):
+        self.supports_search = supports_search
+
+    async def search_documents(self, query, limit, offset):
+        raise NotImplementedError("ошибка в коде репозитория")
+
+
+def make_client(supports_search: bool) -> TestClient:
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.state.document_service = DocumentService(Repo(supports_search), summary_service=None, report_cache=None)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_search_without_fts_is_501():
+    response = make_client(supports_search=False).get("/api/search", params={"q": "текст"})
+    assert response.status_code == 501
+    assert "SQLite" in response.json()["detail"]
+
+
+def test_unimplemented_method_bug_is_not_501():
+    response = make_client(supports_search=True).get("/api/search", params={"q": "текст"})
+    assert response.status_code == 500
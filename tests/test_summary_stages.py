@@ -0,0 +1,152 @@
+# tests/test_summary_stages.py
+"""
+SummaryGenerationService: общая задача пула для этапов извлечения и ошибки кэша.
+"""
+import asyncio
+from functools import partial
+
+from models import KeywordNode, KeywordTreeSummary, TextSummary, SUMMARY_STAGES
+from services.compute_pool import ComputePool
+from services.summary_generation_service import SummaryGenerationService
+
+TEXT = "Первое предложение о важном предмете. Второе предложение о другом предмете."
+
+
+def sentence_count(analysis, fail=False):
+    if fail:
+        raise RuntimeError("сбой задания")
+    return len(analysis.sentences)
+
+
+class FakeExtraction:
+    """Этап извлечения: задание считает предложения анализа, finish строит модель."""
+    cache_version = "fake:v1"
+
+    def __init__(self, keyword=False, fail=False):
+        self.keyword = keyword
+        self.fail = fail
+
+    def analysis_job(self, lang):
+        return partial(sentence_count, fail=self.fail)
+
+    async def finish(self, text, lang, output):
+        if self.keyword:
+            node = KeywordNode(name=f"{lang}:{output}")
+            return KeywordTreeSummary(ru=[node], en=[node])
+        return TextSummary(ru=f"{lang}:{output}", en=f"{lang}:{output}")
+
+
+class FakeLLM:
+    def __init__(self, model):
+        self.model = model
+
+    async def generate(self, text, lang=None):
+        if self.model is TextSummary:
+            return TextSummary(ru="llm", en="llm")
+        return KeywordTreeSummary(ru=[], en=[])
+
+
+class CountingPool(ComputePool):
+    def __init__(self):
+        super().__init__(workers=0)
+        self.jobs = []
+
+    async def run(self, fn, *args, **kwargs):
+        self.jobs.append(sorted(args[2]))
+        return await super().run(fn, *args, **kwargs)
+
+
+class FakeCache:
+    """Кэш с готовым результатом для одного этапа; get может падать."""
+    def __init__(self, hits=None, fail=False):
+        self.hits = hits or {}
+        self.fail = fail
+        self.puts = []
+
+    @staticmethod
+    def text_hash(text):
+        return "hash"
+
+    async def get(self, text_hash, stage, version, model):
+        if self.fail:
+            raise RuntimeError("БД недоступна")
+        return self.hits.get(stage)
+
+    async def put(self, text_hash, stage, version, value):
+        self.puts.append(stage)
+
+
+def make_service(cache=None, text_fail=False):
+    pool = CountingPool()
+    service = SummaryGenerationService(
+        FakeLLM(TextSummary), FakeLLM(KeywordTreeSummary),
+        FakeExtraction(fail=text_fail), FakeExtraction(keyword=True),
+        cache=cache, compute=pool,
+    )
+    return service, pool
+
+
+def test_extraction_stages_share_one_pool_task():
+    service, pool = make_service()
+    result = asyncio.run(service.generate_full_summary(TEXT))
+    assert pool.jobs == [["extraction_keyword_summary", "extraction_text_summary"]]
+    assert result.extraction_text_summary.ru == "ru:2"
+    assert result.extraction_keyword_summary.ru[0].name == "ru:2"
+    assert result.stage_status == {}
+
+
+def test_document_terms_come_from_the_shared_analysis():
+    service, pool = make_service()
+    _, terms = asyncio.run(service.summarize_document(TEXT))
+    assert len(pool.jobs) == 1
+    assert set(terms) == {"первое", "предложение", "о", "важном", "предмете", "второе", "другом"}
+
+
+def test_cached_stage_is_not_computed():
+    cached = TextSummary(ru="кэш", en="cache")
+    service, pool = make_service(FakeCache(hits={"extraction_text_summary": cached}))
+    result = asyncio.run(service.generate_full_summary(TEXT))
+    assert pool.jobs == [["extraction_keyword_summary"]]
+    assert result.extraction_text_summary == cached
+
+
+def test_no_terms_when_extraction_stages_are_cached():
+    hits = {"extraction_text_summary": TextSummary(ru="кэш", en="cache"),
+            "extraction_keyword_summary": KeywordTreeSummary(ru=[], en=[])}
+    service, pool = make_service(FakeCache(hits=hits))
+    _, terms = asyncio.run(service.summarize_document(TEXT))
+    assert pool.jobs == [] and terms is None
+
+
+def test_failed_job_fails_only_its_stage():
+    service, _ = make_service(text_fail=True)
+    result = asyncio.run(service.generate_full_summary(TEXT))
+    assert result.stage_status["extraction_text_summary"].status == "failed"
+    assert "extraction_keyword_summary" not in result.stage_status
+
+
+def test_cache_error_is_a_failed_stage():
+    service, pool = make_service(FakeCache(fail=True))
+    result = asyncio.run(service.generate_full_summary(TEXT))
+    assert pool.jobs == []
+    assert {status.status for status in result.stage_status.values()} == {"failed"}
+    assert len(result.stage_status) == 4
+
+
+class SlowCache(FakeCache):
+    """Кэш, ожидающий заблокированную БД дольше таймаута этапа."""
+    async def get(self, text_hash, stage, version, model):
+        await asyncio.sleep(10)
+
+
+def test_slow_cache_lookup_is_bounded_by_stage_timeout():
+    pool = CountingPool()
+    service = SummaryGenerationService(
+        FakeLLM(TextSummary), FakeLLM(KeywordTreeSummary),
+        FakeExtraction(), FakeExtraction(keyword=True),
+        cache=SlowCache(), compute=pool,
+        stage_timeouts={stage: 0.05 for stage in SUMMARY_STAGES},
+    )
+    result = asyncio.run(asyncio.wait_for(service.generate_full_summary(TEXT), timeout=2))
+    assert {status.status for status in result.stage_status.values()} == {"timeout"}
+    assert len(result.stage_status) == 4
@@ -0,0 +1,66 @@
+# tests/test_translator.py
+"""LocalTranslator.translate_batch: один вызов пакетной модели и кэширование только успешных переводов."""
+from services.phrase_cache import PhraseCache
+from services.translator import LocalTranslator
+
+
+class FakeTranslation:
+    """Объект перевода argos: переводит по одной фразе, может падать."""
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def translate(self, text):
+        self.calls.append(text)
+        if self.fail:
+            raise RuntimeError("модель недоступна")
+        return f"en:{text}"
+
+
+class FakeBatchModel:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def translate_batch(self, phrases):
+        self.calls.append(list(phrases))
+        if self.fail:
+            raise RuntimeError("сбой пакета")
+        return [f"batch:{p}" for p in phrases]
+
+
+def make_translator(translation, batch_model=None):
+    return LocalTranslator(
+        {("ru", "en"): translation},
+        cache=PhraseCache(),
+        batch_models={("ru", "en"): batch_model} if batch_model else None,
+    )
+
+
+def test_misses_are_translated_in_one_batch_call_and_cached():
+    translation, batch = FakeTranslation(), FakeBatchModel()
+    translator = make_translator(translation, batch)
+    assert translator.translate_batch(["кот", "пёс", "кот", ""], "ru", "en") == ["batch:кот", "batch:пёс", "batch:кот", ""]
+    assert batch.calls == [["кот", "пёс"]] and translation.calls == []
+
+    assert translator.translate_batch(["пёс", "мышь"], "ru", "en") == ["batch:пёс", "batch:мышь"]
+    assert batch.calls[1] == ["мышь"]
+
+
+def test_batch_failure_falls_back_to_single_phrases():
+    translation, batch = FakeTranslation(), FakeBatchModel(fail=True)
+    translator = make_translator(translation, batch)
+    assert translator.translate_batch(["кот", "пёс"], "ru", "en") == ["en:кот", "en:пёс"]
+    assert translation.calls == ["кот", "пёс"]
+
+
+def test_failed_translations_are_not_cached():
+    translation = FakeTranslation(fail=True)
+    translator = make_translator(translation)
+    # Ошибка перевода: фраза возвращается как есть, но не становится «переводом» в кэше
+    assert translator.translate_batch(["кот"], "ru", "en") == ["кот"]
+    assert translator.cache.get_many("ru", "en", ["кот"]) == {}
+
+    translation.fail = False
+    assert translator.translate_batch(["кот"], "ru", "en") == ["en:кот"]
+    assert translation.calls == ["кот", "кот"]
@@ -1,22 +1,39 @@
-from fastapi import APIRouter, Request, Form, UploadFile, File, Depends, status
+from typing import Optional
+from fastapi import APIRouter, Request, Form, UploadFile, File, Depends, Query, status
 from fastapi.responses import HTMLResponse, RedirectResponse
 
-from dependencies import get_document_service, get_uploader
+from dependencies import get_document_service, get_uploader, get_job_service
 from services.document_service import DocumentService
-from file_handler import FileUploader
-from fastapi.responses import StreamingResponse
-from io import BytesIO
+from services.job_service import JobService
+from file_handler import FileUploader, UploadTooLargeError
+from fastapi.responses import FileResponse
+from http_cache import cache_headers, not_modified
 
 router = APIRouter()
 
 @router.get("/", response_class=HTMLResponse)
-async def index(request: Request, service: DocumentService = Depends(get_document_service)):
-    docs = await service.list_documents_info()
+async def index(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    service: DocumentService = Depends(get_document_service),
+):
+    try:
+        page = await service.list_documents_info(limit=limit, cursor=cursor)
+    except ValueError as e:
+        return request.app.templates.TemplateResponse(
+            "error.html",
+            {"request": request, "message": str(e)},
+            status_code=400
+        )
     return request.app.templates.TemplateResponse(
         "index.html",
         {
             "request": request,
-            "documents": docs
+            "documents": page.items,
+            "next_cursor": page.next_cursor,
+            "limit": limit,
+            "is_first_page": cursor is None
         }
     )
 
@@ -25,7 +42,7 @@ async def upload_document(
     request: Request,
     file: UploadFile = File(...),
     name: str = Form(...),
-    service: DocumentService = Depends(get_document_service),
+    jobs: JobService = Depends(get_job_service),
     uploader: FileUploader = Depends(get_uploader),
 ):
     if not name.strip():
@@ -35,7 +52,7 @@ async def upload_document(
             status_code=400
         )
 
-    if await service.find_by_name(name.strip()):
+    if await jobs.is_name_taken(name.strip()):
         return request.app.templates.TemplateResponse(
             "error.html",
             {"request": request, "message": f"Документ с именем '{name}' уже существует"},
@@ -43,11 +60,20 @@ async def upload_document(
         )
 
     try:
-        saved_path = await uploader.save_upload(file)  # должен быть async
-        text = await uploader.extract_text(saved_path)  # должен быть async
-        orig_filename = "_".join(saved_path.name.split("_")[1:])
-        doc_id = await service.create_document(file_name=orig_filename, text=text or "", name=name.strip())
-        return RedirectResponse(url=f"/documents/{doc_id}", status_code=status.HTTP_303_SEE_OTHER)
+        saved = await uploader.save_upload(file)
+        job_id = await jobs.submit(name=name.strip(), upload=saved)
+        job = await jobs.get_job(job_id)
+        return request.app.templates.TemplateResponse(
+            "document.html",
+            {"request": request, "doc": None, "job": job},
+            status_code=status.HTTP_202_ACCEPTED
+        )
+    except UploadTooLargeError as e:
+        return request.app.templates.TemplateResponse(
+            "error.html",
+            {"request": request, "message": str(e)},
+            status_code=413
+        )
     except Exception as e:
         return request.app.templates.TemplateResponse(
             "error.html",
@@ -55,13 +81,34 @@ async def upload_document(
             status_code=500
         )
 
+@router.get("/jobs/{job_id}", response_class=HTMLResponse)
+async def view_job(job_id: int, request: Request, jobs: JobService = Depends(get_job_service)):
+    try:
+        job = await jobs.get_job(job_id)
+    except ValueError as e:
+        return request.app.templates.TemplateResponse(
+            "error.html",
+            {"request": request, "message": str(e)},
+            status_code=404
+        )
+    if job.status == "done" and job.document_id is not None:
+        return RedirectResponse(url=f"/documents/{job.document_id}", status_code=status.HTTP_303_SEE_OTHER)
+    return request.app.templates.TemplateResponse(
+        "document.html",
+        {"request": request, "doc": None, "job": job}
+    )
+
 @router.get("/documents/{doc_id}", response_class=HTMLResponse)
 async def view_document(doc_id: int, request: Request, service: DocumentService = Depends(get_document_service)):
     try:
+        headers = cache_headers(await service.get_validators(doc_id), variant="html")
+        if (cached := not_modified(request, headers)) is not None:
+            return cached
         doc = await service.get_document(doc_id)
         return request.app.templates.TemplateResponse(
             "document.html",
-            {"request": request, "doc": doc}
+            {"request": request, "doc": doc},
+            headers=headers
         )
     except ValueError as e:
         return request.app.templates.TemplateResponse(
@@ -76,22 +123,29 @@ async def delete_document_form(doc_id: int, service: DocumentService = Depends(g
     return RedirectResponse(url="/", status_code=status.HTTP_303_SEE_OTHER)
 
 @router.get("/documents/{doc_id}/report/download")
-async def download_report(doc_id: int, service: DocumentService = Depends(get_document_service)):
-    pdf_bytes = await service.generate_report(doc_id)
-    return StreamingResponse(
-        BytesIO(pdf_bytes),
+async def download_report(doc_id: int, request: Request, service: DocumentService = Depends(get_document_service)):
+    headers = cache_headers(await service.get_validators(doc_id), variant="pdf")
+    if (cached := not_modified(request, headers)) is not None:
+        return cached
+    return FileResponse(
+        await service.get_report_path(doc_id),
         media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="document_{doc_id}.pdf"'}
+        filename=f"document_{doc_id}.pdf",
+        headers=headers
     )
 
 
 @router.get("/documents/{doc_id}/report/pdf")
-async def report_pdf(doc_id: int, service: DocumentService = Depends(get_document_service)):
-    pdf_bytes = await service.generate_report(doc_id)
-    return StreamingResponse(
-        BytesIO(pdf_bytes),
+async def report_pdf(doc_id: int, request: Request, service: DocumentService = Depends(get_document_service)):
+    headers = cache_headers(await service.get_validators(doc_id), variant="pdf")
+    if (cached := not_modified(request, headers)) is not None:
+        return cached
+    return FileResponse(
+        await service.get_report_path(doc_id),
         media_type="application/pdf",
-        headers={"Content-Disposition": f'inline; filename="document_{doc_id}.pdf"'}
+        filename=f"document_{doc_id}.pdf",
+        content_disposition_type="inline",
+        headers=headers
     )
 
 @router.get("/documents/{doc_id}/report/print", response_class=HTMLResponse)